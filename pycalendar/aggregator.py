@@ -14,7 +14,16 @@
 # You should have received a copy of the GNU General Public License along with
 # pycalender.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio as _asyncio
+import collections as _collections
+import concurrent.futures as _futures
+import contextlib as _contextlib
+import inspect as _inspect
+import urllib.parse as _urllib_parse
 
+from . import dedup as _dedup
+from . import interning as _interning
+from . import stats as _stats
 from .component import calendar as _component_calendar
 from .property import calendar as _property_calendar
 
@@ -74,8 +83,223 @@ class Aggregator (list):
     END:VEVENT
     END:VCALENDAR
     <BLANKLINE>
+
+    Fetching many feeds one after another spends most of its time
+    waiting on the network.  Set ``workers`` to fetch feeds in a
+    thread pool, and ``host_connections`` to limit the number of
+    simultaneous requests to any single host.  Processors still run
+    in the calling thread as each feed arrives, and the aggregate
+    calendar lists feeds in the same order as the aggregator itself,
+    regardless of which feed finished first.
+
+    >>> bootcamps = sorted(
+    ...     name for name in os.listdir(os.path.join(data_dir, 'bootcamps'))
+    ...     if name.endswith('.ics'))
+    >>> urls = ['{}/bootcamps/{}'.format(base_url, name) for name in bootcamps]
+    >>> serial = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls])
+    >>> serial.fetch()
+    >>> concurrent = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls],
+    ...     workers=8, host_connections=4)
+    >>> concurrent.fetch()
+    >>> str(concurrent.calendar) == str(serial.calendar)
+    True
+    >>> len(concurrent.calendar['VEVENT'])
+    105
+
+    From asyncio code, use ``.async_fetch``, which fetches feeds
+    without blocking the event loop (or tying up a thread per
+    request).  Processors may be coroutine functions.
+
+    >>> import asyncio
+    >>> async def count(feed):
+    ...     await asyncio.sleep(0)
+    ...     counts.append(len(feed.get('VEVENT', [])))
+    >>> counts = []
+    >>> asynchronous = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls],
+    ...     processors=[count])
+    >>> asyncio.run(asynchronous.async_fetch(concurrency=16, timeout=10))
+    >>> str(asynchronous.calendar) == str(serial.calendar)
+    True
+    >>> sum(counts)
+    105
+
+    Fetching again only rebuilds the contributions of feeds whose
+    content changed (see ``Feed.fetch``).  Unchanged feeds keep their
+    previous contribution, and processors are not run on them again.
+
+    >>> counts = []
+    >>> asyncio.run(asynchronous.async_fetch(concurrency=16, timeout=10))
+    >>> counts
+    []
+    >>> str(asynchronous.calendar) == str(serial.calendar)
+    True
+
+    In streaming mode, feeds are never parsed into complete trees.
+    Instead, processors are called with each top-level component as
+    soon as it has been parsed, and the component is dropped if any
+    processor returns ``False``.  Streaming fetches feeds one at a
+    time, ignoring ``workers``.
+
+    >>> def recent(feed, component):
+    ...     return component['DTSTART'].value.year >= 2013
+    >>> streaming = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls],
+    ...     processors=[recent], streaming=True)
+    >>> streaming.fetch()
+    >>> len(streaming.calendar['VEVENT'])
+    67
+    >>> 'VEVENT' in streaming[0]
+    False
+    >>> streaming.fetch()  # unchanged feeds keep their contributions
+    >>> len(streaming.calendar['VEVENT'])
+    67
+
+    Feeds that are unchanged since they were fetched elsewhere are
+    reloaded, since there is no previous contribution to reuse.
+
+    >>> feed = Feed(url=urls[0])
+    >>> _ = list(feed.iterfetch())
+    >>> late = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[feed], streaming=True)
+    >>> late.fetch()
+    >>> len(late.calendar['VEVENT'])
+    1
+
+    Set ``interner_size`` to share repeated strings, parameter maps
+    and values between the feeds (see ``pycalendar.interning``).
+    Each fetch gets a fresh table with at most ``interner_size``
+    entries of each kind.
+
+    >>> interned = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls], interner_size=10000)
+    >>> interned.fetch()
+    >>> str(interned.calendar) == str(serial.calendar)
+    True
+    >>> events = interned.calendar['VEVENT']
+    >>> events[0]['DTSTAMP'].value is events[1]['DTSTAMP'].value
+    True
+
+    Pass a ``Stats`` instance to record per-stage timings and
+    counters (see ``pycalendar.stats``).  It is shared with any feeds
+    that don't have their own.
+
+    >>> from .stats import Stats
+    >>> instrumented = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls], stats=Stats())
+    >>> instrumented.fetch()
+    >>> instrumented.write(stream=io.StringIO())
+    >>> list(instrumented.stats.totals())
+    ['fetch', 'hash', 'unfold', 'parse', 'process', 'merge', 'write']
+    >>> instrumented.stats.totals()['parse'].components
+    105
+    >>> for line in instrumented.stats.openmetrics().splitlines():
+    ...     if 'stsci' in line and 'seconds' not in line:
+    ...         print(line)
+    ... # doctest: +ELLIPSIS
+    pycalendar_stage_calls_total{stage="fetch",feed="file://.../2012-01-stsci.ics"} 1
+    ...
+    pycalendar_stage_lines_total{stage="unfold",feed="file://.../2012-01-stsci.ics"} 15
+    pycalendar_stage_components_total{stage="parse",feed="file://.../2012-01-stsci.ics"} 1
+    pycalendar_stage_components_total{stage="merge",feed="file://.../2012-01-stsci.ics"} 1
+
+    Pass ``indexes`` (see ``pycalendar.index``) to keep them in sync
+    with the aggregate calendar.  Refetching only updates them with
+    the contributions of feeds that changed.
+
+    >>> import datetime
+    >>> from .index.interval import EventIndex
+    >>> indexed = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls], indexes=[EventIndex()])
+    >>> indexed.fetch()
+    >>> events = indexed.indexes[0]
+    >>> len(events)
+    105
+    >>> [e['UID'].value for e in events.after(
+    ...     point=datetime.date(2013, 7, 1), count=2)]
+    ['2013-07-oklahoma@software-carpentry.org', '2013-07-oslo@software-carpentry.org']
+    >>> indexed.pop().url  # doctest: +ELLIPSIS
+    'file://.../test/data/bootcamps/2013-11-whoi.ics'
+    >>> indexed.fetch()
+    >>> len(events)
+    104
+
+    Set ``dedup`` to keep only the newest copy of components that
+    several feeds share (see ``pycalendar.dedup``).
+
+    >>> deduplicated = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url=url) for url in urls + urls[:10]],
+    ...     dedup=True, indexes=[EventIndex()])
+    >>> deduplicated.fetch()
+    >>> len(deduplicated.calendar['VEVENT'])
+    105
+    >>> len(deduplicated.indexes[0])
+    105
+    >>> deduplicated.fetch()
+    >>> del deduplicated[:10]
+    >>> deduplicated.fetch()
+    >>> len(deduplicated.indexes[0])
+    105
+
+    Refetching only reprocesses feeds whose content changed, and
+    ``write`` reuses the text of components from unchanged feeds.
+
+    >>> first = io.StringIO()
+    >>> indexed.write(stream=first)
+    >>> indexed[0] = Feed(url=indexed[0].url)
+    >>> indexed.fetch()
+    >>> second = io.StringIO()
+    >>> indexed.write(stream=second)
+    >>> second.getvalue() == first.getvalue()
+    True
+    >>> fresh = io.StringIO()
+    >>> indexed.calendar.write(stream=fresh)
+    >>> second.getvalue() == fresh.getvalue()
+    True
+
+    If a fetch fails part way through (e.g. a feed is unreachable),
+    the previous aggregate and indexes are kept, and the next
+    successful fetch rebuilds the whole aggregate.
+
+    >>> import shutil
+    >>> import tempfile
+    >>> mirror_dir = tempfile.mkdtemp()
+    >>> for name in bootcamps[:6]:
+    ...     _ = shutil.copy(os.path.join(data_dir, 'bootcamps', name),
+    ...                     mirror_dir)
+    >>> paths = [os.path.join(mirror_dir, name) for name in bootcamps[:6]]
+    >>> mirrored = Aggregator(
+    ...     prodid='-//pycalendar//NONSGML testing//EN',
+    ...     feeds=[Feed(url='file://{}'.format(path)) for path in paths],
+    ...     indexes=[EventIndex()])
+    >>> mirrored.fetch()
+    >>> os.rename(paths[3], paths[3] + '.missing')
+    >>> mirrored.fetch()  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+      ...
+    FileNotFoundError: ...
+    >>> len(mirrored.calendar['VEVENT']), len(mirrored.indexes[0])
+    (6, 6)
+    >>> os.rename(paths[3] + '.missing', paths[3])
+    >>> mirrored.fetch()
+    >>> len(mirrored.calendar['VEVENT']), len(mirrored.indexes[0])
+    (6, 6)
+    >>> shutil.rmtree(mirror_dir)
     """
-    def __init__(self, prodid, version='2.0', feeds=None, processors=None):
+    def __init__(self, prodid, version='2.0', feeds=None, processors=None,
+                 workers=1, host_connections=None, streaming=False,
+                 interner_size=None, dedup=False, indexes=None, stats=None):
         super(Aggregator, self).__init__()
         self.calendar = _component_calendar.Calendar()
         self.calendar.add_property(_property_calendar.Version(value=version))
@@ -86,17 +310,344 @@ class Aggregator (list):
         if not processors:
             processors = []
         self.processors = processors
+        self.workers = workers
+        self.host_connections = host_connections
+        self.streaming = streaming
+        self.interner_size = interner_size
+        self.dedup = dedup
+        if not indexes:
+            indexes = []
+        self.indexes = indexes
+        self.stats = stats
+        self._interner = None
+        self._contributions = {}
+        self._deduplicator = _dedup.Deduplicator()
+        self._kept = {}
+        self._serialized = {}  # {id(component): (component, text)}
 
     def fetch(self):
+        if self.streaming:
+            return self._fetch_streaming()
+        # feeds may arrive out of order, so hold early arrivals until
+        # all of their predecessors have been merged
+        arrived = {}
+        merged = 0
+        with self._merging() as merge:
+            for index,feed in self._fetch_feeds():
+                if self._changed(feed=feed, contributions=merge.previous):
+                    with self._timer(stage='process', feed=feed):
+                        for processor in self.processors:
+                            processor(feed)
+                arrived[index] = feed
+                while merged in arrived:
+                    self._merge(feed=arrived.pop(merged), merge=merge)
+                    merged += 1
+
+    def _fetch_streaming(self):
+        with self._merging() as merge:
+            for feed in self:
+                contribution = self._iterfetch(feed=feed)
+                if not self._changed(feed=feed, contributions=merge.previous):
+                    contribution = None  # reuse the previous contribution
+                elif feed.changed is False:
+                    # unchanged, but there is nothing to reuse (e.g. the
+                    # feed was fetched elsewhere), so reload it
+                    feed.invalidate()
+                    contribution = self._iterfetch(feed=feed)
+                self._merge(feed=feed, merge=merge, contribution=contribution)
+
+    def _iterfetch(self, feed):
+        "Stream a feed, returning the contribution its processors keep"
+        contribution = dict((name, []) for name in feed.subcomponents)
+        for component in feed.iterfetch():
+            with self._timer(stage='process', feed=feed):
+                for processor in self.processors:
+                    if processor(feed, component) is False:
+                        break
+                else:
+                    contribution[component.name].append(component)
+        return contribution
+
+    async def async_fetch(self, concurrency=None, timeout=None):
+        """Fetch feeds concurrently without blocking the event loop
+
+        At most ``concurrency`` feeds (defaulting to ``workers``) are
+        fetched at once, with ``host_connections`` limiting the number
+        of simultaneous requests to a single host.  ``timeout`` (in
+        seconds) bounds each feed's request.  Processors that return
+        awaitables (e.g. coroutine functions) are awaited.
+        """
+        arrived = {}
+        merged = 0
+        with self._merging() as merge:
+            async for index,feed in self._async_fetch_feeds(
+                    concurrency=concurrency, timeout=timeout):
+                if self._changed(feed=feed, contributions=merge.previous):
+                    with self._timer(stage='process', feed=feed):
+                        for processor in self.processors:
+                            result = processor(feed)
+                            if _inspect.isawaitable(result):
+                                await result
+                arrived[index] = feed
+                while merged in arrived:
+                    self._merge(feed=arrived.pop(merged), merge=merge)
+                    merged += 1
+
+    @_contextlib.contextmanager
+    def _merging(self):
+        """Rebuild the aggregate from the feeds merged in a ``with`` block
+
+        The new aggregate only replaces the old one (and updates the
+        indexes and caches) once the block completes.  If it raises,
+        the old aggregate is kept, and the feeds are invalidated so the
+        next fetch rebuilds their contributions from scratch.
+        """
+        merge = self._start_merge()
+        try:
+            yield merge
+        except BaseException:
+            self._abort_merge(merge=merge)
+            raise
+        self._finish_merge(merge=merge)
+
+    def _start_merge(self):
+        if self.stats is not None:
+            for feed in self:
+                if feed.stats is None:
+                    feed.stats = self.stats
+        if self.interner_size:  # a fresh table for each run
+            interner = _interning.Interner(maxsize=self.interner_size)
+            for feed in self:
+                if feed.interner is None or feed.interner is self._interner:
+                    feed.interner = interner
+            self._interner = interner
+        merge = _Merge(
+            previous=self._contributions,
+            duplicates=self._deduplicator.duplicates)
+        self._deduplicator.clear()
+        return merge
+
+    @staticmethod
+    def _changed(feed, contributions):
+        return feed.changed is not False or id(feed) not in contributions
+
+    def _merge(self, feed, merge, contribution=None):
+        """Add a feed's contribution to the aggregate being rebuilt
+
+        Unchanged feeds reuse their contribution from the previous
+        fetch.  Otherwise the contribution is taken from the feed's
+        subcomponents, unless it has already been collected (e.g. while
+        streaming).
+        """
+        with self._timer(stage='merge', feed=feed) as stats:
+            if not self._changed(feed=feed, contributions=merge.previous):
+                contribution = merge.previous[id(feed)][1]
+            else:
+                if contribution is None:
+                    contribution = dict(
+                        (name, list(feed.get(name, [])))
+                        for name in feed.subcomponents)
+                if id(feed) in merge.previous:
+                    merge.replaced.append(merge.previous[id(feed)][1])
+                merge.added.append(contribution)
+            merge.contributions[id(feed)] = (feed, contribution)
+            for name,components in contribution.items():
+                target = merge.subcomponents.setdefault(name, [])
+                if self.dedup:
+                    self._deduplicator.extend(
+                        target=target, components=components)
+                else:
+                    target.extend(components)
+                stats.components += len(components)
+
+    def _finish_merge(self, merge):
+        """Swap in the rebuilt aggregate
+
+        Contributions that were replaced, or whose feeds are no longer
+        aggregated, are dropped from the caches and indexes.  When
+        deduplicating, a changed feed can also replace or restore
+        copies from unchanged feeds, so the indexes are updated with
+        the difference between the old and new aggregate components.
+        """
+        for name in self.calendar.subcomponents:
+            self.calendar.pop(name, None)
+        self.calendar.update(merge.subcomponents)
+        self._contributions = merge.contributions
+        removed = merge.replaced + [
+            contribution for key,(feed, contribution) in merge.previous.items()
+            if key not in merge.contributions]
+        with self._timer(stage='merge'):
+            for contribution in removed:
+                self._forget(contribution=contribution)
+            if self.indexes and not self.dedup:
+                self._update_indexes(removed=removed, added=merge.added)
+        if self.indexes and self.dedup:
+            kept = dict(
+                (id(c), c) for name in self.calendar.subcomponents
+                for c in self.calendar.get(name, []))
+            with self._timer(stage='merge'):
+                self._update_indexes(
+                    removed=[{None: [c for k,c in self._kept.items()
+                                     if k not in kept]}],
+                    added=[{None: [c for k,c in kept.items()
+                                   if k not in self._kept]}])
+            self._kept = kept
+
+    def _abort_merge(self, merge):
+        "Keep the old aggregate after a failed merge"
+        for contribution in merge.added:
+            self._deduplicator.forget(
+                components=[c for components in contribution.values()
+                            for c in components])
+        self._deduplicator.clear()
+        self._deduplicator.duplicates = merge.duplicates
         for feed in self:
-            feed.fetch()
-            for processor in self.processors:
-                processor(feed)
-            for name in feed.subcomponents:
-                if name not in self.calendar:
-                    self.calendar[name] = []
-                for component in feed.get(name, []):
-                    self.calendar[name].append(component)
+            feed.invalidate()
+
+    def _forget(self, contribution):
+        "Drop cached data for a contribution that is being replaced"
+        for components in contribution.values():
+            self._deduplicator.forget(components=components)
+            for component in components:
+                entry = self._serialized.get(id(component))
+                if entry is not None and entry[0] is component:
+                    del self._serialized[id(component)]
+
+    def _update_indexes(self, removed, added):
+        "Update the indexes with lists of removed and added contributions"
+        removed = [c for contribution in removed
+                   for components in contribution.values()
+                   for c in components]
+        added = [c for contribution in added
+                 for components in contribution.values()
+                 for c in components]
+        for index in self.indexes:
+            index.update(removed=removed, added=added)
+
+    def _fetch_feeds(self):
+        """Iterate through ``(index, feed)`` pairs as the feeds arrive
+        """
+        if not self.workers or self.workers <= 1:
+            for index,feed in enumerate(self):
+                feed.fetch()
+                yield (index, feed)
+            return
+        queues = _collections.OrderedDict()
+        for index,feed in enumerate(self):
+            host = self._host(url=feed.url)
+            if host not in queues:
+                queues[host] = _collections.deque()
+            queues[host].append(index)
+        active = _collections.Counter()
+        running = {}
+        with _futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                for host in queues:
+                    self._submit(
+                        executor=executor, queue=queues[host], host=host,
+                        active=active, running=running)
+                while running:
+                    done,pending = _futures.wait(
+                        running, return_when=_futures.FIRST_COMPLETED)
+                    for future in done:
+                        index,host = running.pop(future)
+                        future.result()  # re-raise any fetch errors
+                        active[host] -= 1
+                        self._submit(
+                            executor=executor, queue=queues[host], host=host,
+                            active=active, running=running)
+                        yield (index, self[index])
+            finally:
+                for future in running:
+                    future.cancel()
+
+    async def _async_fetch_feeds(self, concurrency=None, timeout=None):
+        """Asynchronously iterate through ``(index, feed)`` pairs as they arrive
+        """
+        if concurrency is None:
+            concurrency = self.workers
+        semaphore = _asyncio.Semaphore(max(concurrency or 1, 1))
+        host_semaphores = {}
+        if self.host_connections:
+            for feed in self:
+                host = self._host(url=feed.url)
+                if host not in host_semaphores:
+                    host_semaphores[host] = _asyncio.Semaphore(
+                        self.host_connections)
+
+        async def fetch(index, feed):
+            host_semaphore = host_semaphores.get(self._host(url=feed.url))
+            if host_semaphore is not None:
+                await host_semaphore.acquire()
+            try:
+                async with semaphore:
+                    await feed.async_fetch(timeout=timeout)
+            finally:
+                if host_semaphore is not None:
+                    host_semaphore.release()
+            return (index, feed)
+
+        tasks = [_asyncio.ensure_future(fetch(index=index, feed=feed))
+                 for index,feed in enumerate(self)]
+        try:
+            for task in _asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _submit(self, executor, queue, host, active, running):
+        """Submit queued fetches for ``host`` up to the connection limit
+        """
+        while queue and (not self.host_connections or
+                         active[host] < self.host_connections):
+            index = queue.popleft()
+            future = executor.submit(self[index].fetch)
+            running[future] = (index, host)
+            active[host] += 1
+
+    @staticmethod
+    def _host(url):
+        return _urllib_parse.urlsplit(url).netloc.lower()
+
+    def _timer(self, stage, feed=None):
+        if feed is not None:
+            feed = feed.url
+        return _stats.timer(stats=self.stats, stage=stage, feed=feed)
 
     def write(self, stream):
-        self.calendar.write(stream=stream)
+        """Write the aggregate calendar to a text stream
+
+        The text of each component is cached until its feed changes,
+        so rewriting after a refresh only serializes the components
+        of changed feeds.
+        """
+        with self._timer(stage='write') as stats:
+            if self.stats is not None:
+                stream = _CountingStream(stream=stream, stats=stats)
+            chunks = []
+            self.calendar._serialize(
+                chunks=chunks, serialized=self._serialized)
+            stream.write(''.join(chunks))
+
+
+class _Merge (object):
+    "An aggregate being rebuilt by ``Aggregator._merging``"
+    def __init__(self, previous, duplicates):
+        self.previous = previous  # {id(feed): (feed, contribution)}
+        self.duplicates = duplicates  # the deduplicator's previous count
+        self.contributions = {}
+        self.subcomponents = {}  # {name: [component, ...]}
+        self.replaced = []  # previous contributions of changed feeds
+        self.added = []  # new contributions of changed feeds
+
+
+class _CountingStream (object):
+    "Wrap a text stream, counting the UTF-8 bytes written to it"
+    def __init__(self, stream, stats):
+        self.stream = stream
+        self.stats = stats
+
+    def write(self, text):
+        self.stats.bytes += len(text.encode('UTF-8'))
+        return self.stream.write(text)
@@ -0,0 +1,245 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+r"""Non-blocking URL fetching on top of asyncio streams
+
+This is a minimal HTTP/1.1 client covering what feed fetching needs
+(``GET`` requests, redirects, chunked and length-delimited bodies, and
+``file://`` URLs).  It mirrors ``urllib.request.urlopen`` closely
+enough that the fetching code in ``feed`` can treat the two
+responses the same way.
+
+>>> import asyncio
+>>> import os
+>>> root_dir = os.curdir
+>>> data_file = os.path.abspath(os.path.join(
+...         root_dir, 'test', 'data', 'geohash.ics'))
+>>> url = 'file://{}'.format(data_file.replace(os.sep, '/'))
+
+>>> async def first_lines(url, count=3):
+...     response = await urlopen(url=url)
+...     lines = []
+...     async for line in response:
+...         lines.append(line)
+...         if len(lines) == count:
+...             break
+...     response.close()
+...     return (response.status, response.info()['Content-type'], lines)
+>>> asyncio.run(first_lines(url=url))  # doctest: +NORMALIZE_WHITESPACE
+(200, 'text/calendar',
+ [b'BEGIN:VCALENDAR\r\n', b'VERSION:2.0\r\n',
+  b'PRODID:-//Example Calendar//NONSGML v1.0//EN\r\n'])
+"""
+
+import asyncio as _asyncio
+import email.parser as _email_parser
+import email.utils as _email_utils
+import http.client as _http_client
+import mimetypes as _mimetypes
+import os as _os
+import ssl as _ssl
+import urllib.error as _urllib_error
+import urllib.parse as _urllib_parse
+import urllib.request as _urllib_request
+
+
+_REDIRECTS = [301, 302, 303, 307, 308]
+
+
+class Response (object):
+    """A response whose body can be iterated over line by line
+
+    Use ``async for line in response`` to iterate over the body's
+    lines (as ``bytes``, including the line endings), or ``await
+    response.read()`` to get the whole body at once.
+    """
+    def __init__(self, url, status, reason, headers, chunks, writer=None):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._chunks = chunks
+        self._writer = writer
+
+    def info(self):
+        return self.headers
+
+    def geturl(self):
+        return self.url
+
+    async def read(self):
+        return b''.join([chunk async for chunk in self._chunks])
+
+    async def __aiter__(self):
+        pending = b''
+        async for chunk in self._chunks:
+            pending += chunk
+            start = 0
+            while True:
+                end = pending.find(b'\n', start)
+                if end < 0:
+                    break
+                yield pending[start:end + 1]
+                start = end + 1
+            pending = pending[start:]
+        if pending:
+            yield pending
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+async def urlopen(url, headers=None, max_redirects=5):
+    """Open a URL, returning a ``Response``
+
+    Follows redirects, and raises ``urllib.error.HTTPError`` for other
+    non-2xx statuses, like ``urllib.request.urlopen``.
+    """
+    if headers is None:
+        headers = {}
+    for i in range(max_redirects + 1):
+        scheme = _urllib_parse.urlsplit(url).scheme.lower()
+        if scheme == 'file':
+            return await _open_file(url=url)
+        elif scheme not in ['http', 'https']:
+            raise _urllib_error.URLError(
+                'unknown url type: {}'.format(scheme))
+        response = await _open_http(url=url, headers=headers)
+        if response.status in _REDIRECTS and 'Location' in response.headers:
+            response.close()
+            url = _urllib_parse.urljoin(url, response.headers['Location'])
+            continue
+        if not 200 <= response.status < 300:
+            response.close()
+            raise _urllib_error.HTTPError(
+                url, response.status, response.reason, response.headers, None)
+        return response
+    raise _urllib_error.URLError(
+        'too many redirects ({}) for {}'.format(max_redirects, url))
+
+
+async def _open_file(url):
+    path = _urllib_request.url2pathname(_urllib_parse.urlsplit(url).path)
+    loop = _asyncio.get_running_loop()
+    headers = await loop.run_in_executor(None, file_headers, path)
+    data = await loop.run_in_executor(None, _read_file, path)
+    return Response(
+        url=url, status=200, reason='OK', headers=headers,
+        chunks=_iterate(data))
+
+
+def file_headers(path):
+    """Return the headers ``urllib`` would give for a local file
+    """
+    stat = _os.stat(path)
+    content_type = _mimetypes.guess_type(path)[0] or 'text/plain'
+    return _email_parser.Parser(_class=_http_client.HTTPMessage).parsestr(
+        'Content-type: {}\nContent-length: {}\nLast-modified: {}\n'.format(
+            content_type, stat.st_size,
+            _email_utils.formatdate(stat.st_mtime, usegmt=True)))
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def _iterate(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _open_http(url, headers):
+    parts = _urllib_parse.urlsplit(url)
+    secure = parts.scheme.lower() == 'https'
+    port = parts.port or (443 if secure else 80)
+    if secure:
+        reader,writer = await _asyncio.open_connection(
+            host=parts.hostname, port=port,
+            ssl=_ssl.create_default_context(), server_hostname=parts.hostname)
+    else:
+        reader,writer = await _asyncio.open_connection(
+            host=parts.hostname, port=port)
+    try:
+        path = parts.path or '/'
+        if parts.query:
+            path = '{}?{}'.format(path, parts.query)
+        request_headers = {
+            'Host': parts.netloc,
+            'Connection': 'close',
+            'Accept-Encoding': 'identity',
+            }
+        request_headers.update(headers)
+        request = ['GET {} HTTP/1.1'.format(path)]
+        request.extend(
+            '{}: {}'.format(key, value)
+            for key,value in request_headers.items())
+        request.extend(['', ''])
+        writer.write('\r\n'.join(request).encode('ISO-8859-1'))
+        await writer.drain()
+        status_line = await reader.readline()
+        try:
+            version,status,reason = status_line.decode(
+                'ISO-8859-1').rstrip('\r\n').split(' ', 2)
+        except ValueError:
+            version,status = status_line.decode('ISO-8859-1').split()
+            reason = ''
+        if not version.startswith('HTTP/'):
+            raise _http_client.BadStatusLine(status_line)
+        header_lines = []
+        while True:
+            line = await reader.readline()
+            if line in [b'\r\n', b'\n', b'']:
+                break
+            header_lines.append(line)
+        response_headers = _email_parser.BytesParser(
+            _class=_http_client.HTTPMessage).parsebytes(b''.join(header_lines))
+    except BaseException:
+        writer.close()
+        raise
+    return Response(
+        url=url, status=int(status), reason=reason, headers=response_headers,
+        chunks=_read_body(reader=reader, headers=response_headers),
+        writer=writer)
+
+
+async def _read_body(reader, headers, size=65536):
+    if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+        while True:
+            line = await reader.readline()
+            length = int(line.split(b';', 1)[0].strip(), 16)
+            if length == 0:
+                while await reader.readline() not in [b'\r\n', b'\n', b'']:
+                    pass  # skip trailers
+                return
+            yield await reader.readexactly(length)
+            await reader.readline()  # the CRLF following the chunk data
+    elif 'Content-Length' in headers:
+        remaining = int(headers['Content-Length'])
+        while remaining > 0:
+            chunk = await reader.read(min(size, remaining))
+            if not chunk:
+                raise _asyncio.IncompleteReadError(chunk, remaining)
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        while True:
+            chunk = await reader.read(size)
+            if not chunk:
+                return
+            yield chunk
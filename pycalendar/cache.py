@@ -0,0 +1,121 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Bounded caches for memoizing expensive lookups
+"""
+
+import collections as _collections
+import threading as _threading
+
+
+class LRUCache (object):
+    """A thread-safe, least-recently-used cache with hit/miss statistics
+
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.lookup('a', lambda: 1)
+    1
+    >>> cache.lookup('b', lambda: 2)
+    2
+    >>> cache.lookup('a', lambda: 3)
+    1
+    >>> cache.lookup('c', lambda: 4)  # evicts 'b'
+    4
+    >>> 'b' in cache
+    False
+    >>> cache.stats()
+    {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+    Shrinking ``maxsize`` evicts the least recently used entries.
+    Set it to ``None`` for an unbounded cache, or to ``0`` to disable
+    caching.
+
+    >>> cache.maxsize = 1
+    >>> list(cache)
+    ['c']
+    >>> cache.clear()
+    >>> cache.stats()
+    {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 1}
+    """
+    def __init__(self, maxsize=128):
+        self._data = _collections.OrderedDict()
+        self._lock = _threading.Lock()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<{}.{} {}>'.format(
+            self.__module__, type(self).__name__, self.stats())
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def lookup(self, key, function):
+        """Return the cached value for ``key``, calling ``function`` on misses
+
+        Exceptions raised by ``function`` propagate, and nothing is
+        cached for ``key``.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return value
+        value = function()
+        if self._maxsize != 0:
+            with self._lock:
+                self._data[key] = value
+                self._evict()
+        return value
+
+    def clear(self):
+        "Drop all entries and reset the statistics"
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self._maxsize,
+            }
+
+    def _evict(self):
+        if self._maxsize is not None:
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
@@ -120,19 +120,124 @@ def register(component):
     COMPONENT[component.name] = component
 
 
-def parse(stream):
+def parse(stream, **kwargs):
     """Load a single component from a stream
+
+    Additional keyword arguments (e.g. ``lazy``) are passed through to
+    ``property.parse``.
+    """
+    return _parse_lines(
+        lines=_unfold.unfold(stream=stream), stream=stream, **kwargs)
+
+
+def parse_bytes(buffer, **kwargs):
+    r"""Load a single component from a bytes-like buffer of UTF-8 data
+
+    This skips the text stream used by ``parse``, finding lines and
+    folds in the raw bytes (see ``unfold.unfold_bytes``).
+
+    >>> calendar = parse_bytes(
+    ...     b'BEGIN:VEVENT\r\nUID:abc\r\nSUMMARY:Caf\xc3\xa9\r\nEND:VEVENT\r\n')
+    >>> calendar['SUMMARY'].value
+    'Café'
+    """
+    return _parse_lines(
+        lines=_unfold.unfold_bytes(buffer=buffer),
+        stream='<{}-byte buffer>'.format(len(buffer)), **kwargs)
+
+
+def parse_file(path, **kwargs):
+    """Load a single component from a file, via ``mmap``
+
+    ``path`` may be a filesystem path or a ``file://`` URL.  This is
+    the fastest way to load large local files.
+
+    >>> import codecs
+    >>> import os
+    >>> data_file = os.path.abspath(os.path.join(
+    ...         os.curdir, 'test', 'data', 'geohash.ics'))
+    >>> with codecs.open(data_file, 'r', 'UTF-8') as f:
+    ...     str(parse_file(path=data_file)) == str(parse(stream=f))
+    True
+    """
+    with _unfold.map_file(path=path) as buffer:
+        return _parse_lines(
+            lines=_unfold.unfold_bytes(buffer=buffer), stream=path, **kwargs)
+
+
+def iterparse(stream, root=None, **kwargs):
+    """Iterate through a component's subcomponents as they are parsed
+
+    Each top-level subcomponent (e.g. a ``VEVENT`` in a
+    ``VCALENDAR``) is yielded as soon as its ``END`` line arrives,
+    without being added to the parent.  Dropping the ones you don't
+    need keeps memory use independent of the stream length.  The
+    parent's properties are added to ``root`` (a fresh component if
+    you don't pass one in).
+
+    >>> import codecs
+    >>> import os
+    >>> data_file = os.path.abspath(os.path.join(
+    ...         os.curdir, 'test', 'data', 'geohash.ics'))
+    >>> from .calendar import Calendar
+    >>> root = Calendar()
+    >>> with codecs.open(data_file, 'r', 'UTF-8') as f:
+    ...     for component in iterparse(stream=f, root=root):
+    ...         print(component.name, component['UID'].value)
+    VEVENT 2013-06-30@geohash.invalid
+    >>> print(root)
+    BEGIN:VCALENDAR
+    PRODID:-//Example Calendar//NONSGML v1.0//EN
+    VERSION:2.0
+    END:VCALENDAR
     """
     lines = _unfold.unfold(stream=stream)
+    root = _begin(lines=lines, stream=stream, component=root)
+    return root.iterread(lines=lines, **kwargs)
+
+
+def iterparse_bytes(buffer, root=None, **kwargs):
+    """Like ``iterparse``, but for a bytes-like buffer (see ``parse_bytes``)
+    """
+    lines = _unfold.unfold_bytes(buffer=buffer)
+    root = _begin(
+        lines=lines, stream='<{}-byte buffer>'.format(len(buffer)),
+        component=root)
+    return root.iterread(lines=lines, **kwargs)
+
+
+def iterparse_file(path, root=None, **kwargs):
+    """Like ``iterparse``, but for a memory-mapped file (see ``parse_file``)
+    """
+    with _unfold.map_file(path=path) as buffer:
+        lines = _unfold.unfold_bytes(buffer=buffer)
+        root = _begin(lines=lines, stream=path, component=root)
+        for component in root.iterread(lines=lines, **kwargs):
+            yield component
+
+
+def _parse_lines(lines, stream, **kwargs):
+    component = _begin(lines=lines, stream=stream)
+    component.read(lines=lines, **kwargs)
+    return component
+
+
+def _begin(lines, stream, component=None):
+    """Read the opening ``BEGIN`` line, returning the component it opens
+    """
     line = next(lines)
     prop = _property.parse(line=line)
     if prop.name != 'BEGIN':
         raise ValueError(
             "stream {} must start with 'BEGIN:...', not {!r}".format(
                 stream, line))
-    component_class = COMPONENT[prop.value]
-    component = component_class()
-    component.read(lines=lines)
+    if component is None:
+        component_class = COMPONENT[prop.value]
+        component = component_class()
+    elif prop.value != component.name:
+        raise ValueError(
+            "stream {} must start with 'BEGIN:{}', not {!r}".format(
+                stream, component.name, line))
     return component
 
 
@@ -56,23 +56,36 @@ class Component (dict):
         return '<{}.{} name:{} at {:#x}>'.format(
             self.__module__, type(self).__name__, self.name, id(self))
 
-    def read(self, stream=None, lines=None):
+    def read(self, stream=None, lines=None, **kwargs):
         """Read an input stream and parse into properties and subcomponents
+
+        Additional keyword arguments (e.g. ``lazy``) are passed
+        through to ``property.parse``.
+        """
+        for component in self.iterread(stream=stream, lines=lines, **kwargs):
+            self.add_component(component)
+
+    def iterread(self, stream=None, lines=None, **kwargs):
+        """Like ``read``, but yield subcomponents instead of adding them
+
+        Properties are still added to this component.  Each direct
+        subcomponent is yielded as soon as its ``END`` line is read,
+        and it is up to the caller to keep it (or not).
         """
         if lines is None:
             lines = _unfold.unfold(stream=stream)
         elif stream is not None:
             raise ValueError("cannot specify both 'stream' and 'lines'")
         for line in lines:
-            prop = _property.parse(line)
+            prop = _property.parse(line, **kwargs)
             if prop.name == 'BEGIN':  # a subcomponent
                 if prop.value not in self.subcomponents:
                     raise ValueError('invalid component {} for {!r}'.format(
                         prop.value, self))
                 component_class = _COMPONENT[prop.value]
                 component = component_class()
-                component.read(lines=lines)
-                self.add_component(component)
+                component.read(lines=lines, **kwargs)
+                yield component
             elif prop.name == 'END':  # we're done with this component
                 if prop.value != self.name:
                     raise ValueError('cannot close {!r} with {}'.format(
@@ -93,8 +106,13 @@ class Component (dict):
     def add_property(self, property):
         name = property.name
         if name not in self.required and name not in self.optional:
-            raise ValueError('invalid property {} for {!r}'.format(name, self))
-        if name in self.multiple:
+            if type(property).name not in self.optional:  # e.g. X-PROP
+                raise ValueError(
+                    'invalid property {} for {!r}'.format(name, self))
+            if name not in self:
+                self[name] = []
+            self[name].append(property)
+        elif name in self.multiple:
             if name not in self:
                 self[name] = []
             self[name].append(property)
@@ -102,27 +120,67 @@ class Component (dict):
             self[name] = property
 
     def write(self, stream, newline='\r\n'):
-        stream.write('BEGIN:{}{}'.format(self.name, newline))
-        for prop in _itertools.chain(self.required, self.optional):
-            self._write_property_by_name(
-                name=prop, stream=stream, newline=newline)
-        for component in self.subcomponents:
-            self._write_component_by_name(
-                name=component, stream=stream, newline=newline)
-        stream.write('END:{}{}'.format(self.name, newline))
-
-    def _write_component_by_name(self, name, stream, newline='\r\n'):
-        component = self.get(name, [])
-        if isinstance(component, list):
-            for c in component:
-                c.write(stream=stream, newline=newline)
-        else:
-            component.write(stream=stream, newline=newline)
+        chunks = []
+        self._serialize(chunks=chunks, newline=newline)
+        stream.write(''.join(chunks))
 
-    def _write_property_by_name(self, name, stream, newline='\r\n'):
-        prop = self.get(name, [])
-        if isinstance(prop, list):
-            for p in prop:
-                p.write(stream=stream, newline=newline)
-        else:
-            prop.write(stream=stream, newline=newline)
+    def _serialize(self, chunks, newline='\r\n', serialized=None):
+        """Append the serialized component to the list ``chunks``
+
+        Properties are written in ``required`` + ``optional`` order,
+        followed by the subcomponents.  Only the entries that are
+        actually present are visited.
+
+        ``serialized`` (``{id(subcomponent): (subcomponent, text)}``)
+        caches the text of the direct subcomponents between calls, so
+        only new subcomponents are serialized.  Cached subcomponents
+        must not be modified.
+        """
+        chunks.append('BEGIN:{}{}'.format(self.name, newline))
+        order = _write_order(cls=type(self))
+        names = []
+        for name in self:
+            rank = order.get(name, None)
+            if rank is None:  # a property without its own class
+                value = self[name]
+                if value and isinstance(value, list):
+                    rank = order.get(type(value[0]).name, None)
+                if rank is None:
+                    continue
+            names.append((rank, name))
+        names.sort()
+        for rank,name in names:
+            value = self[name]
+            if isinstance(value, list):
+                for v in value:
+                    if serialized is not None and isinstance(v, Component):
+                        entry = serialized.get(id(v))
+                        if entry is None or entry[0] is not v:
+                            c = []
+                            v._serialize(chunks=c, newline=newline)
+                            entry = serialized[id(v)] = (v, ''.join(c))
+                        chunks.append(entry[1])
+                    else:
+                        v._serialize(chunks=chunks, newline=newline)
+            else:
+                value._serialize(chunks=chunks, newline=newline)
+        chunks.append('END:{}{}'.format(self.name, newline))
+
+
+_WRITE_ORDER = {}
+
+
+def _write_order(cls):
+    """Return ``{name: rank}`` for the entries written by ``cls``
+
+    This is computed once per component class.
+    """
+    try:
+        return _WRITE_ORDER[cls]
+    except KeyError:
+        order = {}
+        for name in _itertools.chain(
+                cls.required, cls.optional, cls.subcomponents):
+            order.setdefault(name, len(order))
+        _WRITE_ORDER[cls] = order
+        return order
@@ -14,9 +14,16 @@
 # You should have received a copy of the GNU General Public License along with
 # pycalender.  If not, see <http://www.gnu.org/licenses/>.
 
+import logging as _logging
+
+from .. import property as _property
+from .. import tzinfo as _tzinfo
 from . import base as _base
 
 
+_LOG = _logging.getLogger(__name__)
+
+
 class Calendar (_base.Component):
     """A calendar
 
@@ -47,3 +54,35 @@ class Calendar (_base.Component):
         'VIANA-COMP',
         'VXCOMP',
         ]
+    tzinfos = None  # {TZID: tzinfo} for the VTIMEZONEs read
+
+    def iterread(self, stream=None, lines=None, tzinfos=None, **kwargs):
+        r"""Like ``Component.iterread``, compiling ``VTIMEZONE``\s as they pass
+
+        Compiled zones are stored in ``.tzinfos`` (by ``TZID``) and
+        used to decode ``TZID`` references (see ``property.parse``).
+        References that neither the table nor ``pytz`` know yet are
+        kept raw until the whole calendar has been read, so zones may
+        follow the components that use them.  Pass ``tzinfos`` to
+        seed the table.  Zones that fail to compile are logged and
+        skipped, falling back to ``pytz``.
+        """
+        if tzinfos is None:
+            tzinfos = {}
+        self.tzinfos = tzinfos
+        deferred = []
+        for component in super(Calendar, self).iterread(
+                stream=stream, lines=lines, tzinfos=tzinfos,
+                deferred=deferred, **kwargs):
+            if component.name == 'VTIMEZONE':
+                try:
+                    tzinfos[component['TZID'].value] = _tzinfo.compile(
+                        component=component)
+                except (KeyError, ValueError) as error:
+                    _LOG.warning('could not compile {!r}: {}'.format(
+                        component, error))
+            yield component
+        _property.resolve(
+            properties=deferred, tzinfos=tzinfos,
+            lazy=kwargs.get('lazy', False),
+            interner=kwargs.get('interner', None))
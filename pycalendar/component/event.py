@@ -34,7 +34,7 @@ class Event (_base.Component):
         'CREATED',
         'DESCRIPTION',
         'GEO',
-        'LAST-MOD',
+        'LAST-MODIFIED',
         'LOCATION',
         'ORGANIZER',
         'PRIORITY',
@@ -43,7 +43,7 @@ class Event (_base.Component):
         'SUMMARY',
         'TRANSP',
         'URL',
-        'RECURID',
+        'RECURRENCE-ID',
         # should not occur more than once
         'RRULE',
         # must not occur more than once
@@ -23,3 +23,30 @@ class FreeBusy (_base.Component):
     As defined in :RFC:`5545`, section 3.6.4 (Free/Busy Component).
     """
     name = 'VFREEBUSY'
+    required = [
+        'DTSTAMP',
+        'UID',
+        ]
+    optional = [
+        # must not occur more than once
+        'CONTACT',
+        'DTSTART',
+        'DTEND',
+        'ORGANIZER',
+        'URL',
+        # may occur more than once
+        'ATTENDEE',
+        'COMMENT',
+        'FREEBUSY',
+        'RSTATUS',
+        'X-PROP',
+        'IANA-PROP',
+        ]
+    multiple = [
+        'ATTENDEE',
+        'COMMENT',
+        'FREEBUSY',
+        'RSTATUS',
+        'X-PROP',
+        'IANA-PROP',
+        ]
@@ -21,5 +21,61 @@ class TimeZone (_base.Component):
     """A time zone
 
     As defined in :RFC:`5545`, section 3.6.5 (Time Zone Component).
+    Use ``tzinfo.compile`` to turn one into a ``datetime.tzinfo``.
     """
     name = 'VTIMEZONE'
+    required = [
+        'TZID',
+        ]
+    optional = [
+        # must not occur more than once
+        'LAST-MODIFIED',
+        'TZURL',
+        # may occur more than once
+        'X-PROP',
+        'IANA-PROP',
+        ]
+    multiple = [
+        'X-PROP',
+        'IANA-PROP',
+        ]
+    subcomponents = [
+        'STANDARD',
+        'DAYLIGHT',
+        ]
+
+
+class _Observance (_base.Component):
+    "Shared contents of ``STANDARD`` and ``DAYLIGHT`` subcomponents"
+    required = [
+        'DTSTART',
+        'TZOFFSETTO',
+        'TZOFFSETFROM',
+        ]
+    optional = [
+        # should not occur more than once
+        'RRULE',
+        # may occur more than once
+        'COMMENT',
+        'RDATE',
+        'TZNAME',
+        'X-PROP',
+        'IANA-PROP',
+        ]
+    multiple = [
+        'COMMENT',
+        'RDATE',
+        'TZNAME',
+        'X-PROP',
+        'IANA-PROP',
+        ]
+
+
+class Standard (_Observance):
+    "Standard time observance in a ``VTIMEZONE``"
+    name = 'STANDARD'
+
+
+class Daylight (_Observance):
+    "Daylight saving time observance in a ``VTIMEZONE``"
+    name = 'DAYLIGHT'
@@ -0,0 +1,360 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+r"""Drop duplicate components while merging feeds
+
+Calendars that share events (e.g. a group calendar and its members'
+calendars) contribute several copies of the same component.  Copies
+are identified by ``(UID, RECURRENCE-ID)`` (time zones by ``TZID``)
+and the newest copy wins, with the highest ``SEQUENCE`` and, when
+sequences tie, the latest ``DTSTAMP``.
+
+Publishers that post the same real-world event under different
+``UID``\s need fuzzy matching instead (see ``clusters`` and
+``collapse``).  Comparing every pair of events doesn't scale, so
+events are first grouped into blocks (by default, by ``DTSTART`` day
+and a coarse ``GEO`` cell), and only events sharing a block are
+compared.
+"""
+
+import datetime as _datetime
+import math as _math
+
+from .index import interval as _interval
+from .index import text as _text
+
+
+def key(component):
+    """Return the identity shared by copies of ``component``
+
+    Returns ``None`` for components without a ``UID`` (or ``TZID``
+    for ``VTIMEZONE``), which are never considered duplicates.
+    ``RECURRENCE-ID`` is compared as an instant, so the same
+    occurrence matches across time zones.
+    """
+    if component.name == 'VTIMEZONE':
+        if 'TZID' not in component:
+            return None
+        return (component.name, component['TZID'].value)
+    if 'UID' not in component:
+        return None
+    recurrence_id = component.get('RECURRENCE-ID')
+    if recurrence_id is not None:
+        recurrence_id = _interval.timestamp(recurrence_id.value)
+    return (component.name, component['UID'].value, recurrence_id)
+
+
+def version(component):
+    """Return a sortable ``(SEQUENCE, DTSTAMP)`` for ``component``
+
+    Missing values sort before present ones.
+    """
+    sequence = component.get('SEQUENCE')
+    if sequence is None:
+        sequence = 0
+    else:
+        sequence = sequence.value
+    dtstamp = component.get('DTSTAMP')
+    if dtstamp is None:
+        dtstamp = float('-inf')
+    else:
+        dtstamp = _interval.timestamp(dtstamp.value)
+    return (sequence, dtstamp)
+
+
+class Deduplicator (object):
+    """Keep the newest copy of each component as they stream in
+
+    ``extend`` works like ``list.extend``, except that a component
+    whose ``key`` has already been added replaces the earlier copy
+    in place if it is newer (see ``version``), and is dropped
+    otherwise.  Each component costs one dict lookup, so feeds can be
+    merged as they arrive, without a post-processing pass.  Keys and
+    versions are remembered between ``clear`` calls, so re-merging a
+    component is cheap; ``forget`` components that won't come back.
+
+    >>> from .component.event import Event
+    >>> from .property.change import DateTimeStamp, SequenceNumber
+    >>> from .property.descriptive import Summary
+    >>> from .property.relationship import UniqueIdentifier
+    >>> def event(summary, sequence=None, uid='a@example.com'):
+    ...     event = Event()
+    ...     event.add_property(UniqueIdentifier(value=uid))
+    ...     event.add_property(DateTimeStamp(value=DTSTAMP))
+    ...     event.add_property(Summary(value=summary))
+    ...     if sequence is not None:
+    ...         event.add_property(SequenceNumber(value=sequence))
+    ...     return event
+    >>> import datetime
+    >>> DTSTAMP = datetime.datetime(2013, 6, 1, tzinfo=datetime.timezone.utc)
+
+    >>> events = []
+    >>> deduplicator = Deduplicator()
+    >>> deduplicator.extend(target=events, components=[
+    ...     event('first'), event('other', uid='b@example.com')])
+    >>> deduplicator.extend(target=events, components=[
+    ...     event('tie'), event('update', sequence=1)])
+    >>> [e['SUMMARY'].value for e in events]
+    ['update', 'other']
+    >>> deduplicator.duplicates
+    2
+    """
+    def __init__(self):
+        self.seen = {}  # {key: (target, index, version)}
+        self.duplicates = 0
+        self._identities = {}  # {id(component): (component, key, version)}
+
+    def __repr__(self):
+        return '<{}.{} keys:{} duplicates:{}>'.format(
+            self.__module__, type(self).__name__, len(self.seen),
+            self.duplicates)
+
+    def clear(self):
+        "Start a new merge"
+        self.seen.clear()
+        self.duplicates = 0
+
+    def forget(self, components):
+        "Drop the remembered keys and versions of ``components``"
+        identities = self._identities
+        for component in components:
+            entry = identities.get(id(component))
+            if entry is not None and entry[0] is component:
+                del identities[id(component)]
+
+    def extend(self, target, components):
+        seen = self.seen
+        for component in components:
+            k,v = self._identify(component=component)
+            if k is None:
+                target.append(component)
+                continue
+            try:
+                t,index,old = seen[k]
+            except KeyError:
+                seen[k] = (target, len(target), v)
+                target.append(component)
+                continue
+            self.duplicates += 1
+            if v > old:
+                t[index] = component
+                seen[k] = (t, index, v)
+
+    def _identify(self, component):
+        entry = self._identities.get(id(component))
+        if entry is None or entry[0] is not component:
+            k = key(component)
+            if k is None:
+                v = None
+            else:
+                v = version(component)
+            entry = self._identities[id(component)] = (component, k, v)
+        return entry[1:]
+
+
+FIELDS = ('SUMMARY', 'LOCATION')
+CELL_SIZE = 0.25  # degrees
+
+
+def normalize(text):
+    """Case-fold ``text`` and collapse punctuation and whitespace
+
+    >>> normalize('Software Carpentry:  Boot-Camp')
+    'software carpentry boot camp'
+    """
+    return ' '.join(_text.tokenize(text))
+
+
+def jaccard(a, b):
+    """Return the Jaccard similarity of the words in two strings
+
+    >>> jaccard('software carpentry boot camp', 'boot camp oslo')
+    0.4
+    """
+    a = set(a.split())
+    b = set(b.split())
+    if not (a or b):
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def day(component):
+    """Return the ``DTSTART`` day of a component, or ``None``
+
+    Times with a time zone use the UTC day, so publishers in
+    different time zones agree.
+    """
+    dtstart = component.get('DTSTART')
+    if dtstart is None:
+        return None
+    value = dtstart.value
+    if isinstance(value, _datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(_datetime.timezone.utc)
+        value = value.date()
+    return value
+
+
+def geo_cell(component, cell_size=CELL_SIZE):
+    "Return the ``(row, column)`` grid cell of a component's ``GEO``"
+    geo = component.get('GEO')
+    if geo is None:
+        return None
+    latitude,longitude = geo.value
+    return (_math.floor(latitude / cell_size),
+            _math.floor(longitude / cell_size))
+
+
+def day_and_cell(component):
+    """The default blocking key: ``(name, day, geo_cell)``
+
+    Components without ``GEO`` share a block with the other
+    components on that day that lack it.
+    """
+    d = day(component)
+    if d is None:
+        return None
+    return (component.name, d, geo_cell(component))
+
+
+BLOCK_KEYS = (day_and_cell,)
+
+
+def clusters(components, threshold=0.6, keys=BLOCK_KEYS, fields=FIELDS,
+             measure=jaccard):
+    """Return lists of components that look like the same event
+
+    Each function in ``keys`` maps a component to a hashable block
+    (or ``None`` to leave it out), and two components are compared
+    only if some key puts them in the same block.  Their similarity
+    is the mean ``measure`` of the normalized ``fields`` they both
+    have, and pairs scoring at least ``threshold`` are linked.
+    Clusters are the connected groups with more than one component,
+    in the order of their first member.
+
+    >>> from .component.event import Event
+    >>> from .property import parse
+    >>> def event(uid, summary, location, geo='59.94;10.72',
+    ...           dtstart='20130618T090000Z'):
+    ...     e = Event()
+    ...     for line in [
+    ...             'UID:{}'.format(uid), 'DTSTART:{}'.format(dtstart),
+    ...             'SUMMARY:{}'.format(summary),
+    ...             'LOCATION:{}'.format(location), 'GEO:{}'.format(geo)]:
+    ...         e.add_property(parse(line))
+    ...     return e
+    >>> events = [
+    ...     event('a', 'Software Carpentry: Boot Camp', 'University of Oslo'),
+    ...     event('b', 'Boot camp (Tufts)', 'Tufts', geo='42.41;-71.12'),
+    ...     event('c', 'software carpentry boot camp Oslo', 'Univ. of Oslo'),
+    ...     event('d', 'Software Carpentry: Boot Camp', 'University of Oslo',
+    ...           dtstart='20130619T090000Z'),
+    ...     ]
+    >>> [[e['UID'].value for e in c] for c in clusters(events)]
+    [['a', 'c']]
+
+    Any function of two normalized strings can replace ``jaccard``.
+
+    >>> import difflib
+    >>> def ratio(a, b):
+    ...     return difflib.SequenceMatcher(a=a, b=b).ratio()
+    >>> [[e['UID'].value for e in c]
+    ...  for c in clusters(events, threshold=0.9, measure=ratio)]
+    []
+    """
+    components = list(components)
+    texts = []
+    for component in components:
+        text = {}
+        for field in fields:
+            prop = component.get(field)
+            if prop is not None and isinstance(prop.value, str):
+                value = normalize(prop.value)
+                if value:
+                    text[field] = value
+        texts.append(text)
+    parent = list(range(len(components)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for key in keys:
+        blocks = {}
+        for i,component in enumerate(components):
+            block = key(component)
+            if block is not None:
+                blocks.setdefault(block, []).append(i)
+        for block in blocks.values():
+            for x,i in enumerate(block):
+                for j in block[x + 1:]:
+                    a = find(i)
+                    b = find(j)
+                    if a == b:
+                        continue
+                    if _similarity(
+                            texts[i], texts[j], measure) >= threshold:
+                        parent[max(a, b)] = min(a, b)
+    groups = {}
+    for i in range(len(components)):
+        groups.setdefault(find(i), []).append(components[i])
+    return [group for root,group in sorted(groups.items())
+            if len(group) > 1]
+
+
+def collapse(components, **kwargs):
+    """Return ``components`` with each cluster replaced by its newest copy
+
+    Accepts the same keyword arguments as ``clusters``.  The newest
+    copy (see ``version``, with ties going to the earliest) takes the
+    place of the cluster's first member.
+
+    >>> from .component.event import Event
+    >>> from .property import parse
+    >>> def event(uid, summary, sequence):
+    ...     e = Event()
+    ...     for line in [
+    ...             'UID:{}'.format(uid), 'DTSTART:20130618T090000Z',
+    ...             'SUMMARY:{}'.format(summary),
+    ...             'SEQUENCE:{}'.format(sequence)]:
+    ...         e.add_property(parse(line))
+    ...     return e
+    >>> events = [
+    ...     event('a', 'Boot camp', 0), event('b', 'Lunch', 0),
+    ...     event('c', 'boot camp', 2)]
+    >>> [e['UID'].value for e in collapse(events)]
+    ['c', 'b']
+    """
+    components = list(components)
+    replace = {}  # {id(first member): newest}
+    drop = set()
+    for group in clusters(components, **kwargs):
+        newest = group[0]
+        for component in group[1:]:
+            if version(component) > version(newest):
+                newest = component
+        replace[id(group[0])] = newest
+        drop.update(id(c) for c in group[1:])
+    return [replace.get(id(c), c) for c in components if id(c) not in drop]
+
+
+def _similarity(a, b, measure):
+    scores = [measure(a[field], b[field]) for field in a if field in b]
+    if not scores:
+        return 0.0
+    return sum(scores) / len(scores)
@@ -23,10 +23,14 @@ from . import base as _base
 
 from . import date as _date
 from . import datetime as _datetime
+from . import duration as _duration
 from . import geo as _geo
 from . import numeric as _numeric
+from . import period as _period
+from . import recur as _recur
 from . import text as _text
 from . import time as _time
+from . import utcoffset as _utcoffset
 
 
 DTYPE = {}
@@ -39,10 +43,14 @@ def register(dtype):
 for module in [
         _date,
         _datetime,
+        _duration,
         _geo,
         _numeric,
+        _period,
+        _recur,
         _text,
         _time,
+        _utcoffset,
         ]:
     for name in dir(module):
         if name.startswith('_'):
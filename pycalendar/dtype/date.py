@@ -21,21 +21,31 @@ As defined in :RFC:`5545`, section 3.3.4 (Date).
 
 import datetime as _datetime
 
+from .. import cache as _cache
 from . import base as _base
 
 
+CACHE = _cache.LRUCache(maxsize=1024)
+
+
 class Date (_base.DataType):
     name = 'DATE'
 
     @classmethod
-    def decode(cls, property, value):
+    def decode(cls, property, value, tzinfos=None):
         """Decode dates without times
 
         As defined in :RFC:`5545`, section 3.3.4 (Date).
 
         >>> Date.decode(property={}, value='19970714')
         datetime.date(1997, 7, 14)
+
+        Decoded values are memoized in ``CACHE``.
         """
+        return CACHE.lookup(value, lambda: cls._decode(value=value))
+
+    @classmethod
+    def _decode(cls, value):
         if len(value) != 8:
             raise ValueError(value)
         year = int(value[0:4])
@@ -45,4 +55,10 @@ class Date (_base.DataType):
 
     @classmethod
     def encode(cls, property, value):
-        return value.strftime('%Y%m%d')
+        """Encode dates without times
+
+        >>> import datetime
+        >>> Date.encode(property={}, value=datetime.date(1997, 7, 14))
+        '19970714'
+        """
+        return '{:04d}{:02d}{:02d}'.format(value.year, value.month, value.day)
@@ -21,16 +21,19 @@ As defined in :RFC:`5545`, section 3.3.5 (Date-Time).
 
 import datetime as _datetime
 
+from .. import cache as _cache
 from . import base as _base
-from . import date as _date
 from . import time as _time
 
 
+CACHE = _cache.LRUCache(maxsize=4096)
+
+
 class DateTime (_base.DataType):
     name = 'DATE-TIME'
 
     @classmethod
-    def decode(cls, property, value):
+    def decode(cls, property, value, tzinfos=None):
         """Parse dates with times
 
         As defined in :RFC:`5545`, section 3.3.5 (Date-Time).
@@ -61,7 +64,7 @@ class DateTime (_base.DataType):
         >>> DateTime.decode(property=ny, value='20071104T013000')
         ... # doctest: +NORMALIZE_WHITESPACE
         datetime.datetime(2007, 11, 4, 1, 30,
-          tzinfo=<DstTzInfo 'America/New_York' EST-1 day, 19:00:00 STD>)
+          tzinfo=<DstTzInfo 'America/New_York' EDT-1 day, 20:00:00 DST>)
 
         If the local time described does not occur (when changing from
         standard to daylight time), the ``DATE-TIME`` value is interpreted
@@ -99,16 +102,61 @@ class DateTime (_base.DataType):
         >>> DateTime.decode(property=ny, value='19970714T133000')
         ... # doctest: +NORMALIZE_WHITESPACE
         datetime.datetime(1997, 7, 14, 13, 30,
-          tzinfo=<DstTzInfo 'America/New_York' EST-1 day, 19:00:00 STD>)
+          tzinfo=<DstTzInfo 'America/New_York' EDT-1 day, 20:00:00 DST>)
+
+        Feeds tend to repeat the same values (e.g. ``DTSTAMP``), so
+        decoded values are memoized in ``CACHE``, keyed on the value
+        and ``TZID`` (or its entry in ``tzinfos``).  Adjust
+        ``CACHE.maxsize`` to trade memory for hits.
+
+        >>> CACHE.clear()
+        >>> for i in range(3):
+        ...     d = DateTime.decode(property=ny, value='19970714T133000')
+        >>> CACHE.stats()['hits']
+        2
         """
-        date,time = value.split('T')
-        date = _date.Date.decode(property=property, value=date)
-        time = _time.Time.decode(property=property, value=time)
-        return _datetime.datetime.combine(date=date, time=time)
+        tzid = property.get('TZID', None)
+        if tzinfos and tzid in tzinfos:
+            tzinfo = tzinfos[tzid]
+            return CACHE.lookup(
+                (value, tzinfo),
+                lambda: cls._decode(value=value, tzid=tzid, tzinfos=tzinfos))
+        return CACHE.lookup(
+            (value, tzid), lambda: cls._decode(value=value, tzid=tzid))
+
+    @classmethod
+    def _decode(cls, value, tzid, tzinfos=None):
+        if len(value) not in [15,16] or value[8] != 'T':
+            raise ValueError(value)
+        second = int(value[13:15])
+        if second == 60:  # positive leap second not supported by Python
+            second = 59
+        if value.endswith('Z'):
+            tzinfo = _datetime.timezone.utc
+        elif tzid:
+            tzinfo = _time.get_timezone(tzid=tzid, tzinfos=tzinfos)
+        else:
+            tzinfo = None
+        naive = _datetime.datetime(
+            year=int(value[0:4]), month=int(value[4:6]), day=int(value[6:8]),
+            hour=int(value[9:11]), minute=int(value[11:13]), second=second)
+        if tzinfo is None:
+            return naive
+        return _time.localize(naive=naive, tzinfo=tzinfo)
 
     @classmethod
     def encode(cls, property, value):
-        return '{}T{}'.format(
-            _date.Date.encode(property=property, value=value.date()),
-            _time.Time.encode(property=property, value=value.timetz()),
-            )
+        """Encode dates with times
+
+        >>> import datetime
+        >>> DateTime.encode(property={}, value=datetime.datetime(
+        ...     1997, 7, 14, 17, 30, tzinfo=datetime.timezone.utc))
+        '19970714T173000Z'
+        """
+        if value.tzinfo == _datetime.timezone.utc:
+            format = '{:04d}{:02d}{:02d}T{:02d}{:02d}{:02d}Z'
+        else:
+            format = '{:04d}{:02d}{:02d}T{:02d}{:02d}{:02d}'
+        return format.format(
+            value.year, value.month, value.day,
+            value.hour, value.minute, value.second)
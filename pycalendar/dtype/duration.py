@@ -0,0 +1,107 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for processing durations
+
+As defined in :RFC:`5545`, section 3.3.6 (Duration).
+"""
+
+import datetime as _datetime
+import re as _re
+
+from . import base as _base
+
+
+_DURATION_REGEXP = _re.compile(
+    '([+-])?P(?:([0-9]+)W|([0-9]+)D(?:T(?=[0-9])'
+    '(?:([0-9]+)H)?(?:([0-9]+)M)?(?:([0-9]+)S)?)?|'
+    'T(?=[0-9])(?:([0-9]+)H)?(?:([0-9]+)M)?(?:([0-9]+)S)?)\\Z')
+
+
+class Duration (_base.DataType):
+    name = 'DURATION'
+
+    @classmethod
+    def decode(cls, property, value):
+        """Decode durations
+
+        As defined in :RFC:`5545`, section 3.3.6 (Duration).
+
+        >>> Duration.decode(property={}, value='P15DT5H0M20S')
+        datetime.timedelta(days=15, seconds=18020)
+        >>> Duration.decode(property={}, value='P7W')
+        datetime.timedelta(days=49)
+        >>> Duration.decode(property={}, value='-PT15M')
+        datetime.timedelta(days=-1, seconds=85500)
+        >>> Duration.decode(property={}, value='P1DT')
+        Traceback (most recent call last):
+          ...
+        ValueError: P1DT
+        """
+        match = _DURATION_REGEXP.match(value)
+        if match is None:
+            raise ValueError(value)
+        sign,weeks,days,hours,minutes,seconds = match.groups()[:6]
+        if hours is None and minutes is None and seconds is None:
+            hours,minutes,seconds = match.groups()[6:]
+        duration = _datetime.timedelta(
+            weeks=int(weeks or 0), days=int(days or 0),
+            hours=int(hours or 0), minutes=int(minutes or 0),
+            seconds=int(seconds or 0))
+        if sign == '-':
+            duration = -duration
+        return duration
+
+    @classmethod
+    def encode(cls, property, value):
+        """Encode durations
+
+        >>> import datetime
+        >>> Duration.encode(property={}, value=datetime.timedelta(
+        ...     days=15, hours=5, seconds=20))
+        'P15DT5H0M20S'
+        >>> Duration.encode(property={}, value=datetime.timedelta(
+        ...     hours=5, minutes=3))
+        'PT5H3M'
+        >>> Duration.encode(property={}, value=datetime.timedelta(weeks=2))
+        'P2W'
+        >>> Duration.encode(property={}, value=-datetime.timedelta(minutes=15))
+        '-PT15M'
+        >>> Duration.encode(property={}, value=datetime.timedelta(0))
+        'PT0S'
+        """
+        sign = ''
+        if value < _datetime.timedelta(0):
+            sign = '-'
+            value = -value
+        days = value.days
+        seconds = value.seconds
+        if not seconds and days and not days % 7:
+            return '{}P{}W'.format(sign, days // 7)
+        date = time = ''
+        if days:
+            date = '{}D'.format(days)
+        if seconds or not days:
+            hours,seconds = divmod(seconds, 3600)
+            minutes,seconds = divmod(seconds, 60)
+            if hours:
+                time += '{}H'.format(hours)
+            if minutes or (hours and seconds):  # dur-hour needs dur-minute
+                time += '{}M'.format(minutes)
+            if seconds or not time:
+                time += '{}S'.format(seconds)
+            time = 'T{}'.format(time)
+        return '{}P{}{}'.format(sign, date, time)
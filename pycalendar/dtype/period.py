@@ -0,0 +1,80 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for processing periods of time
+
+As defined in :RFC:`5545`, section 3.3.9 (Period of Time).
+"""
+
+from . import base as _base
+from . import datetime as _datetime
+from . import duration as _duration
+
+
+class Period (_base.DataType):
+    name = 'PERIOD'
+
+    @classmethod
+    def decode(cls, property, value, tzinfos=None):
+        """Decode periods of time
+
+        As defined in :RFC:`5545`, section 3.3.9 (Period of Time).
+        Periods are ``(start, end)`` tuples, where ``end`` is a
+        ``timedelta`` for periods given by their duration.
+
+        >>> Period.decode(property={}, value='19970101T180000Z/19970102T070000Z')
+        ... # doctest: +NORMALIZE_WHITESPACE
+        (datetime.datetime(1997, 1, 1, 18, 0, tzinfo=datetime.timezone.utc),
+         datetime.datetime(1997, 1, 2, 7, 0, tzinfo=datetime.timezone.utc))
+        >>> Period.decode(property={}, value='19970101T180000Z/PT5H30M')
+        ... # doctest: +NORMALIZE_WHITESPACE
+        (datetime.datetime(1997, 1, 1, 18, 0, tzinfo=datetime.timezone.utc),
+         datetime.timedelta(seconds=19800))
+        """
+        try:
+            start,end = value.split('/')
+        except ValueError:
+            raise ValueError(value)
+        start = _datetime.DateTime.decode(
+            property=property, value=start, tzinfos=tzinfos)
+        if end.lstrip('+-').startswith('P'):
+            end = _duration.Duration.decode(property=property, value=end)
+        else:
+            end = _datetime.DateTime.decode(
+                property=property, value=end, tzinfos=tzinfos)
+        return (start, end)
+
+    @classmethod
+    def encode(cls, property, value):
+        """Encode periods of time
+
+        >>> import datetime
+        >>> start = datetime.datetime(
+        ...     1997, 1, 1, 18, tzinfo=datetime.timezone.utc)
+        >>> Period.encode(property={}, value=(
+        ...     start, start + datetime.timedelta(hours=13)))
+        '19970101T180000Z/19970102T070000Z'
+        >>> Period.encode(property={}, value=(
+        ...     start, datetime.timedelta(hours=5, minutes=30)))
+        '19970101T180000Z/PT5H30M'
+        """
+        start,end = value
+        start = _datetime.DateTime.encode(property=property, value=start)
+        if hasattr(end, 'total_seconds'):
+            end = _duration.Duration.encode(property=property, value=end)
+        else:
+            end = _datetime.DateTime.encode(property=property, value=end)
+        return '{}/{}'.format(start, end)
@@ -0,0 +1,192 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for processing recurrence rules
+
+As defined in :RFC:`5545`, section 3.3.10 (Recurrence Rule).
+"""
+
+from . import base as _base
+from . import date as _date
+from . import datetime as _datetime
+
+
+FREQUENCIES = [
+    'SECONDLY', 'MINUTELY', 'HOURLY', 'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY']
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# rule parts taking integer lists, in the order they are encoded
+_INTEGER_LISTS = [
+    'BYSECOND', 'BYMINUTE', 'BYHOUR', 'BYMONTHDAY', 'BYYEARDAY',
+    'BYWEEKNO', 'BYMONTH', 'BYSETPOS']
+
+
+class Rule (object):
+    """A decoded recurrence rule
+
+    ``byday`` holds ``(ordinal, weekday)`` pairs, where ``ordinal`` is
+    ``None`` or a (possibly negative) integer and ``weekday`` counts
+    from Monday (``0``) like ``datetime.date.weekday``.  ``wkst`` is
+    also a weekday integer.  The other ``by*`` parts are lists of
+    integers, or ``None`` if the rule doesn't use them.
+    """
+    def __init__(self, freq, until=None, count=None, interval=1,
+                 bysecond=None, byminute=None, byhour=None, byday=None,
+                 bymonthday=None, byyearday=None, byweekno=None,
+                 bymonth=None, bysetpos=None, wkst=0):
+        if freq not in FREQUENCIES:
+            raise ValueError('invalid recurrence frequency {!r}'.format(freq))
+        if until is not None and count is not None:
+            raise ValueError('recurrence rules cannot set both UNTIL and COUNT')
+        if interval < 1:
+            raise ValueError('invalid recurrence interval {}'.format(interval))
+        self.freq = freq
+        self.until = until
+        self.count = count
+        self.interval = interval
+        self.bysecond = bysecond
+        self.byminute = byminute
+        self.byhour = byhour
+        self.byday = byday
+        self.bymonthday = bymonthday
+        self.byyearday = byyearday
+        self.byweekno = byweekno
+        self.bymonth = bymonth
+        self.bysetpos = bysetpos
+        self.wkst = wkst
+
+    def __repr__(self):
+        return '<{}.{} {}>'.format(
+            self.__module__, type(self).__name__,
+            Recur.encode(property={}, value=self))
+
+    def __eq__(self, other):
+        if not isinstance(other, Rule):
+            return NotImplemented
+        return vars(self) == vars(other)
+
+    def __hash__(self):
+        return hash(Recur.encode(property={}, value=self))
+
+
+class Recur (_base.DataType):
+    name = 'RECUR'
+
+    @classmethod
+    def decode(cls, property, value):
+        """Decode recurrence rules
+
+        As defined in :RFC:`5545`, section 3.3.10 (Recurrence Rule).
+
+        >>> rule = Recur.decode(
+        ...     property={}, value='FREQ=MONTHLY;BYDAY=-1FR,2MO;COUNT=10')
+        >>> rule.freq, rule.count, rule.byday
+        ('MONTHLY', 10, [(-1, 4), (2, 0)])
+        >>> rule = Recur.decode(
+        ...     property={}, value='FREQ=WEEKLY;UNTIL=19971224T000000Z;WKST=SU')
+        >>> rule.until, rule.wkst
+        (datetime.datetime(1997, 12, 24, 0, 0, tzinfo=datetime.timezone.utc), 6)
+        >>> Recur.decode(property={}, value='FREQ=FORTNIGHTLY')
+        Traceback (most recent call last):
+          ...
+        ValueError: invalid recurrence frequency 'FORTNIGHTLY'
+        """
+        kwargs = {}
+        for part in value.split(';'):
+            try:
+                key,val = part.split('=', 1)
+            except ValueError:
+                raise ValueError('invalid recurrence rule part {!r}'.format(
+                    part))
+            key = key.upper()
+            name = key.lower()
+            if name in kwargs:
+                raise ValueError('repeated recurrence rule part {}'.format(key))
+            if key == 'FREQ':
+                kwargs[name] = val.upper()
+            elif key == 'UNTIL':
+                if 'T' in val:
+                    kwargs[name] = _datetime.DateTime.decode(
+                        property={}, value=val)
+                else:
+                    kwargs[name] = _date.Date.decode(property={}, value=val)
+            elif key in ['COUNT', 'INTERVAL']:
+                kwargs[name] = int(val)
+            elif key == 'WKST':
+                kwargs[name] = WEEKDAYS.index(val.upper())
+            elif key == 'BYDAY':
+                kwargs[name] = [cls._decode_weekday(value=v)
+                                for v in val.split(',')]
+            elif key in _INTEGER_LISTS:
+                kwargs[name] = [int(v) for v in val.split(',')]
+            else:
+                raise ValueError('unknown recurrence rule part {}'.format(key))
+        if 'freq' not in kwargs:
+            raise ValueError('recurrence rule without FREQ: {!r}'.format(value))
+        return Rule(**kwargs)
+
+    @staticmethod
+    def _decode_weekday(value):
+        weekday = value[-2:].upper()
+        if weekday not in WEEKDAYS:
+            raise ValueError('invalid weekday {!r}'.format(value))
+        ordinal = value[:-2]
+        if ordinal:
+            ordinal = int(ordinal)
+            if not ordinal:
+                raise ValueError('invalid weekday {!r}'.format(value))
+        else:
+            ordinal = None
+        return (ordinal, WEEKDAYS.index(weekday))
+
+    @classmethod
+    def encode(cls, property, value):
+        """Encode recurrence rules
+
+        >>> Recur.encode(property={}, value=Recur.decode(
+        ...     property={}, value='BYDAY=MO,-1FR;FREQ=MONTHLY;INTERVAL=2'))
+        'FREQ=MONTHLY;INTERVAL=2;BYDAY=MO,-1FR'
+        """
+        parts = ['FREQ={}'.format(value.freq)]
+        if value.until is not None:
+            if hasattr(value.until, 'hour'):
+                until = _datetime.DateTime.encode(property={}, value=value.until)
+            else:
+                until = _date.Date.encode(property={}, value=value.until)
+            parts.append('UNTIL={}'.format(until))
+        if value.count is not None:
+            parts.append('COUNT={:d}'.format(value.count))
+        if value.interval != 1:
+            parts.append('INTERVAL={:d}'.format(value.interval))
+        for key in _INTEGER_LISTS[:3]:
+            cls._encode_list(parts=parts, key=key, value=value)
+        if value.byday is not None:
+            parts.append('BYDAY={}'.format(','.join(
+                '{}{}'.format('' if ordinal is None else ordinal,
+                              WEEKDAYS[weekday])
+                for ordinal,weekday in value.byday)))
+        for key in _INTEGER_LISTS[3:]:
+            cls._encode_list(parts=parts, key=key, value=value)
+        if value.wkst != 0:
+            parts.append('WKST={}'.format(WEEKDAYS[value.wkst]))
+        return ';'.join(parts)
+
+    @staticmethod
+    def _encode_list(parts, key, value):
+        values = getattr(value, key.lower())
+        if values is not None:
+            parts.append('{}={}'.format(key, ','.join(str(v) for v in values)))
@@ -135,3 +135,7 @@ class Text (_base.DataType):
 
 class UniversalResourceLocator (Text):
     name = 'URI'
+
+
+class CalendarUserAddress (UniversalResourceLocator):
+    name = 'CAL-ADDRESS'
@@ -23,14 +23,88 @@ import datetime as _datetime
 
 import pytz as _pytz
 
+from .. import cache as _cache
 from . import base as _base
 
 
+TIMEZONES = _cache.LRUCache(maxsize=128)
+STANDARD_YEAR = 2013  # the reference year for ``standard``
+
+
+def get_timezone(tzid, tzinfos=None):
+    r"""Return the ``tzinfo`` for ``tzid``, caching the ``pytz`` lookup
+
+    ``tzinfos`` (e.g. compiled ``VTIMEZONE``\s) take precedence.
+
+    >>> get_timezone('America/New_York') is get_timezone('America/New_York')
+    True
+    """
+    if tzinfos and tzid in tzinfos:
+        return tzinfos[tzid]
+    return TIMEZONES.lookup(tzid, lambda: _pytz.timezone(tzid))
+
+
+def is_timezone(tzid, tzinfos=None):
+    """Return ``True`` if ``get_timezone`` can resolve ``tzid``
+
+    >>> is_timezone('America/New_York'), is_timezone('Custom Eastern')
+    (True, False)
+    """
+    try:
+        get_timezone(tzid=tzid, tzinfos=tzinfos)
+    except _pytz.UnknownTimeZoneError:
+        return False
+    return True
+
+
+def localize(naive, tzinfo):
+    """Attach ``tzinfo`` to a naive datetime
+
+    ``pytz`` zones must be attached with their ``localize`` method
+    (passing them as ``tzinfo=`` gives their first, usually local mean
+    time, offset).  Following :RFC:`5545`, section 3.3.5, ambiguous
+    times use their first occurrence, and nonexistent times use the
+    offset from before the gap.
+
+    >>> import datetime
+    >>> ny = get_timezone('America/New_York')
+    >>> localize(datetime.datetime(2007, 7, 4, 9, 30), ny).isoformat()
+    '2007-07-04T09:30:00-04:00'
+    >>> localize(datetime.datetime(2007, 11, 4, 1, 30), ny).isoformat()
+    '2007-11-04T01:30:00-04:00'
+    >>> localize(datetime.datetime(2007, 3, 11, 2, 30), ny).isoformat()
+    '2007-03-11T02:30:00-05:00'
+    """
+    if not hasattr(tzinfo, 'localize'):
+        return naive.replace(tzinfo=tzinfo)
+    try:
+        return tzinfo.localize(naive, is_dst=None)
+    except _pytz.AmbiguousTimeError:
+        return tzinfo.localize(naive, is_dst=True)
+    except _pytz.NonExistentTimeError:
+        return tzinfo.localize(naive, is_dst=False)
+
+
+def standard(tzinfo, year=STANDARD_YEAR):
+    """Return a ``pytz`` zone's standard-time ``tzinfo`` in ``year``
+
+    That is, the offset on January 1st or July 1st, whichever isn't
+    daylight saving time.  The fixed ``year`` keeps the result
+    independent of the date the code runs on.
+    """
+    for month in [1, 7]:
+        local = localize(
+            naive=_datetime.datetime(year, month, 1), tzinfo=tzinfo)
+        if not local.dst():
+            break
+    return local.tzinfo
+
+
 class Time (_base.DataType):
     name = 'TIME'
 
     @classmethod
-    def decode(cls, property, value):
+    def decode(cls, property, value, tzinfos=None):
         """Decode times without dates
 
         As defined in :RFC:`5545`, section 3.3.12 (Time).
@@ -43,12 +117,21 @@ class Time (_base.DataType):
         datetime.time(8, 30)
         >>> Time.decode(property={}, value='133000Z')
         datetime.time(13, 30, tzinfo=datetime.timezone.utc)
+
+        Times without dates can't tell whether daylight saving time
+        applies, so ``pytz`` zones get their standard offset (see
+        ``standard``).
+
         >>> Time.decode(property={'TZID': 'America/New_York'}, value='083000')
         ... # doctest: +NORMALIZE_WHITESPACE
         datetime.time(8, 30,
           tzinfo=<DstTzInfo 'America/New_York' EST-1 day, 19:00:00 STD>)
+        >>> Time.decode(property={'TZID': 'Australia/Sydney'}, value='083000')
+        ... # doctest: +NORMALIZE_WHITESPACE
+        datetime.time(8, 30,
+          tzinfo=<DstTzInfo 'Australia/Sydney' AEST+10:00:00 STD>)
         """
-        tzinfo = property.get('TZID', None)
+        tzid = property.get('TZID', None)
         if len(value) not in [6,7]:
             raise ValueError(value)
         hour = int(value[0:2])
@@ -58,13 +141,28 @@ class Time (_base.DataType):
             second = 59
         if value.endswith('Z'):
             tzinfo = _datetime.timezone.utc
-        elif tzinfo:
-            tzinfo = _pytz.timezone(tzinfo)
+        elif tzid:
+            tzinfo = get_timezone(tzid=tzid, tzinfos=tzinfos)
+        else:
+            tzinfo = None
+        if hasattr(tzinfo, 'localize'):  # pytz
+            tzinfo = standard(tzinfo=tzinfo)
         return _datetime.time(
             hour=hour, minute=minute, second=second, tzinfo=tzinfo)
 
     @classmethod
     def encode(cls, property, value):
+        """Encode times without dates
+
+        >>> import datetime
+        >>> Time.encode(property={}, value=datetime.time(23, 0))
+        '230000'
+        >>> Time.encode(property={}, value=datetime.time(
+        ...     7, 0, tzinfo=datetime.timezone.utc))
+        '070000Z'
+        """
         if value.tzinfo == _datetime.timezone.utc:
-            return value.strftime('%H%M%SZ')
-        return value.strftime('%H%M%S')
+            return '{:02d}{:02d}{:02d}Z'.format(
+                value.hour, value.minute, value.second)
+        return '{:02d}{:02d}{:02d}'.format(
+            value.hour, value.minute, value.second)
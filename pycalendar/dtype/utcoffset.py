@@ -0,0 +1,78 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for processing UTC offsets
+
+As defined in :RFC:`5545`, section 3.3.14 (UTC Offset).
+"""
+
+import datetime as _datetime
+import re as _re
+
+from . import base as _base
+
+
+_UTC_OFFSET_REGEXP = _re.compile('([+-])([0-9]{2})([0-9]{2})([0-9]{2})?\\Z')
+
+
+class UTCOffset (_base.DataType):
+    name = 'UTC-OFFSET'
+
+    @classmethod
+    def decode(cls, property, value):
+        """Decode UTC offsets
+
+        As defined in :RFC:`5545`, section 3.3.14 (UTC Offset).
+
+        >>> UTCOffset.decode(property={}, value='-0500')
+        datetime.timedelta(days=-1, seconds=68400)
+        >>> UTCOffset.decode(property={}, value='+013045')
+        datetime.timedelta(seconds=5445)
+        >>> UTCOffset.decode(property={}, value='-0000')
+        Traceback (most recent call last):
+          ...
+        ValueError: -0000
+        """
+        match = _UTC_OFFSET_REGEXP.match(value)
+        if match is None or value.startswith('-') and not int(value[1:]):
+            raise ValueError(value)
+        sign,hours,minutes,seconds = match.groups()
+        offset = _datetime.timedelta(
+            hours=int(hours), minutes=int(minutes), seconds=int(seconds or 0))
+        if sign == '-':
+            offset = -offset
+        return offset
+
+    @classmethod
+    def encode(cls, property, value):
+        """Encode UTC offsets
+
+        >>> import datetime
+        >>> UTCOffset.encode(property={}, value=datetime.timedelta(hours=-5))
+        '-0500'
+        >>> UTCOffset.encode(property={}, value=datetime.timedelta(0))
+        '+0000'
+        """
+        sign = '+'
+        seconds = int(value.total_seconds())
+        if seconds < 0:
+            sign = '-'
+            seconds = -seconds
+        hours,seconds = divmod(seconds, 3600)
+        minutes,seconds = divmod(seconds, 60)
+        if seconds:
+            return '{}{:02d}{:02d}{:02d}'.format(sign, hours, minutes, seconds)
+        return '{}{:02d}{:02d}'.format(sign, hours, minutes)
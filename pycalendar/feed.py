@@ -14,13 +14,20 @@
 # You should have received a copy of the GNU General Public License along with
 # pycalender.  If not, see <http://www.gnu.org/licenses/>.
 
-import codecs as _codecs
+import asyncio as _asyncio
+import hashlib as _hashlib
+import io as _io
 import logging as _logging
+import urllib.error as _urllib_error
+import urllib.parse as _urllib_parse
 import urllib.request as _urllib_request
 
 from . import USER_AGENT as _USER_AGENT
+from . import aio as _aio
 from . import property as _property
+from . import stats as _stats
 from . import unfold as _unfold
+from . import validator as _validator
 from .component import calendar as _calendar
 
 
@@ -95,41 +102,411 @@ class Feed (_calendar.Calendar):
     URL:http://xkcd.com/426/
     DTEND;VALUE=DATE:20130701
     END:VEVENT
+
+    From asyncio code, use ``.async_fetch`` instead of ``.fetch`` to
+    avoid blocking the event loop while the feed downloads.
+
+    >>> import asyncio
+    >>> f = Feed(url=url)
+    >>> asyncio.run(f.async_fetch(timeout=10))
+    >>> f['VEVENT'][0]['SUMMARY'].value
+    'XKCD geohashing, Boston graticule'
+
+    Give the feed a validator store to send conditional requests
+    (``If-None-Match`` and ``If-Modified-Since``) on later fetches.
+    Use a ``DirectoryValidatorStore`` to keep the validators across
+    restarts.
+
+    >>> from .validator import MemoryValidatorStore
+    >>> f = Feed(url=url, validators=MemoryValidatorStore())
+    >>> f.fetch()
+    >>> f.changed
+    True
+    >>> sorted(f.validators.get(url))
+    ['Last-Modified']
+
+    Refetching an identical body skips parsing altogether.
+
+    >>> f = Feed(url=url)
+    >>> f.fetch()
+    >>> f.changed
+    True
+    >>> event = f['VEVENT'][0]
+    >>> f.fetch()
+    >>> f.changed
+    False
+    >>> f['VEVENT'][0] is event
+    True
+
+    To process very large feeds without building the whole component
+    tree, use ``.iterfetch``, which yields each top-level subcomponent
+    as soon as it has been parsed.
+
+    >>> f = Feed(url=url)
+    >>> for component in f.iterfetch():
+    ...     print(component.name, component['UID'].value)
+    VEVENT 2013-06-30@geohash.invalid
+    >>> 'VEVENT' in f
+    False
+    >>> f['PRODID'].value
+    '-//Example Calendar//NONSGML v1.0//EN'
+
+    If you only pass most properties through (e.g. when aggregating
+    and republishing), set ``lazy`` to skip decoding property values
+    until they are actually used.
+
+    >>> f = Feed(url=url, lazy=True)
+    >>> f.fetch()
+    >>> f['VEVENT'][0]['GEO'].value
+    (42.226663, -71.28676)
+
+    Set ``verbatim`` to have unmodified properties written back
+    exactly as they were read, skipping re-encoding and keeping
+    republished feeds byte-stable.
+
+    >>> f = Feed(url=url, lazy=True, verbatim=True)
+    >>> f.fetch()
+    >>> geo = f['VEVENT'][0]['GEO']
+    >>> print(geo)
+    GEO:42.226663;-71.28676
+    >>> geo.value = (42.226663, -71.28676)
+    >>> print(geo)
+    GEO:42.226663;-71.286760
+
+    Feeds with many repeated values can share them through an
+    ``Interner`` (see ``pycalendar.interning``).
+
+    >>> from .interning import Interner
+    >>> f = Feed(url=url, interner=Interner())
+    >>> f.fetch()
+    >>> f['VEVENT'][0]['DTSTART'].value
+    datetime.date(2013, 6, 30)
+
+    To see where the time goes, pass a ``Stats`` instance, which
+    records wall time and counters for each stage (see
+    ``pycalendar.stats``).
+
+    >>> from .stats import Stats
+    >>> f = Feed(url=url, stats=Stats())
+    >>> f.fetch()
+    >>> for stage,stats in f.stats.totals().items():
+    ...     print(stage, stats.bytes, stats.lines, stats.components)
+    fetch 370 0 0
+    hash 0 0 0
+    unfold 0 14 0
+    parse 0 0 1
     """
-    def __init__(self, url, user_agent=None):
+    def __init__(self, url, user_agent=None, validators=None, lazy=False,
+                 verbatim=False, interner=None, stats=None):
         super(Feed, self).__init__(type='VCALENDAR')
         self.url = url
         if user_agent is None:
             user_agent = _USER_AGENT
         self.user_agent = user_agent
+        self.validators = validators
+        self.lazy = lazy
+        self.verbatim = verbatim
+        self.interner = interner
+        self.stats = stats
+        self.changed = None
+        self.digest = None
+        self._fetched = False  # or the mode of the last load
 
     def __repr__(self):
         return '<{}.{} url:{}>'.format(
             self.__module__, type(self).__name__, self.url)
 
     def fetch(self):
+        """Fetch and parse the feed
+
+        If the feed has a validator store, send a conditional request.
+        When the server answers ``304 Not Modified``, the previously
+        parsed content is kept.  Servers that ignore conditional
+        requests often resend identical bodies, so the raw body is
+        hashed before decoding, and if the digest matches the last
+        fetch's, the previously parsed content is kept as well.
+        Afterwards, ``.changed`` is ``False`` if the content was kept
+        and ``True`` if it was (re)loaded.
+
+        ``file://`` URLs are memory-mapped and parsed straight from
+        the mapped bytes.
+        """
+        for component in self._fetch(mode='tree'):
+            self.add_component(component)
+
+    def iterfetch(self):
+        """Fetch the feed, yielding top-level subcomponents as they are parsed
+
+        This works like ``.fetch``, except that the subcomponents are
+        yielded instead of being stored in the feed (the feed's own
+        properties are still stored).  Unchanged feeds yield nothing
+        and set ``.changed`` to ``False``, so callers should hang on
+        to anything they'll need for the next fetch.
+
+        HTTP bodies are parsed in chunks as they download, hashed
+        along the way, and never held in memory (or stored in the
+        validator store) as a whole.  So unless the server answers
+        ``304 Not Modified``, their components are yielded even if
+        the body turns out to be unchanged, in which case
+        ``.changed`` is still set to ``False`` afterwards.
+        """
+        return self._fetch(mode='stream')
+
+    def invalidate(self):
+        """Forget what was loaded last, so the next fetch reloads the feed
+
+        Afterwards, the next fetch sends an unconditional request (or
+        restores a stored body) and parses it, even if it is
+        unchanged.
+        """
+        self.digest = None
+        self._fetched = False
+
+    def _fetch(self, mode):
+        if _urllib_parse.urlsplit(self.url).scheme.lower() == 'file':
+            with _unfold.map_file(path=self.url) as buffer:
+                with self._timer(stage='fetch') as stats:
+                    info = _aio.file_headers(path=_urllib_request.url2pathname(
+                        _urllib_parse.urlsplit(self.url).path))
+                    self._check_content_type(info=info)
+                    stats.bytes += len(buffer)
+                # the mapping closes after loading, and modification
+                # times are revalidated without the body, so don't store it
+                for component in self._load(
+                        body=buffer, info=info, mode=mode, store_body=False):
+                    yield component
+            return
+        headers,entry = self._request_headers(mode=mode)
+        request = _urllib_request.Request(url=self.url, headers=headers)
+        if mode == 'stream':
+            try:
+                with self._timer(stage='fetch') as stats:
+                    f = _urllib_request.urlopen(url=request)
+            except _urllib_error.HTTPError as error:
+                if error.code != 304:
+                    raise
+            else:
+                with f:
+                    info = f.info()
+                    self._check_content_type(info=info)
+                    for component in self._load_stream(
+                            response=f, info=info, stats=stats):
+                        yield component
+                return
+            body = None
+        else:
+            try:
+                with self._timer(stage='fetch') as stats:
+                    with _urllib_request.urlopen(url=request) as f:
+                        info = f.info()
+                        self._check_content_type(info=info)
+                        body = f.read()
+                    stats.bytes += len(body)
+            except _urllib_error.HTTPError as error:
+                if error.code != 304:
+                    raise
+                body = None
+        if body is None:
+            components = self._not_modified(entry=entry, mode=mode)
+        else:
+            components = self._load(body=body, info=info, mode=mode)
+        for component in components:
+            yield component
+
+    async def async_fetch(self, timeout=None):
+        """Fetch the feed without blocking the event loop
+
+        ``timeout`` (in seconds) bounds the whole request, including
+        reading and parsing the body.  Otherwise this works like
+        ``.fetch``.
+        """
+        if timeout is not None:
+            return await _asyncio.wait_for(self.async_fetch(), timeout=timeout)
+        headers,entry = self._request_headers(mode='tree')
+        with self._timer(stage='fetch') as stats:
+            try:
+                response = await _aio.urlopen(url=self.url, headers=headers)
+            except _urllib_error.HTTPError as error:
+                if error.code != 304:
+                    raise
+                body = None
+            else:
+                try:
+                    info = response.info()
+                    self._check_content_type(info=info)
+                    body = await response.read()
+                finally:
+                    response.close()
+                stats.bytes += len(body)
+        if body is None:
+            components = self._not_modified(entry=entry, mode='tree')
+        else:
+            components = self._load(body=body, info=info, mode='tree')
+        for component in components:
+            self.add_component(component)
+
+    def _request_headers(self, mode):
+        """Return request headers and the validator entry they are based on
+        """
+        headers = {
+            'User-Agent': self.user_agent,
+            }
+        entry = None
+        if self.validators is not None:
+            entry = self.validators.get(self.url)
+        if entry and (self._fetched == mode or
+                      entry.get('body', None) is not None):
+            if entry.get('ETag', None):
+                headers['If-None-Match'] = entry['ETag']
+            if entry.get('Last-Modified', None):
+                headers['If-Modified-Since'] = entry['Last-Modified']
+        return (headers, entry)
+
+    def _not_modified(self, entry, mode):
+        if self._fetched == mode:
+            self.changed = False
+        else:  # restore the content from the validator store
+            for component in self._load(body=entry['body'], mode=mode):
+                yield component
+
+    def _load(self, body, info=None, mode='tree', store_body=True):
+        """Parse ``body``, yielding its subcomponents
+
+        ``mode`` records whether the caller is keeping the
+        subcomponents in the feed (``'tree'``) or streaming them
+        (``'stream'``).  Unchanged bodies are only skipped if they
+        were loaded in the same mode.  Set ``store_body`` to ``False``
+        to keep ``body`` out of the validator store.
+        """
+        with self._timer(stage='hash'):
+            digest = _hashlib.sha256(body).digest()
+        if self._fetched == mode and digest == self.digest:
+            self.changed = False
+        else:
+            for component in self._read_lines(
+                    lines=_unfold.unfold_bytes(buffer=body),
+                    stream='<{}-byte buffer>'.format(len(body))):
+                yield component
+            self.digest = digest
+            self._fetched = mode
+            self.changed = True
+        if not store_body:
+            body = None
+        self._store_validators(info=info, body=body)
+
+    def _load_stream(self, response, info, stats):
+        """Parse an HTTP response in chunks, yielding its subcomponents
+
+        The body is hashed as it is read, and only its digest is kept.
+        The bytes read are added to ``stats`` (the ``fetch`` stage).
+        """
+        previous = (self._fetched, self.digest)
+        reader = _HashingReader(raw=response)
+        stream = _io.TextIOWrapper(
+            _io.BufferedReader(reader), encoding='UTF-8', newline='')
+        for component in self._read_lines(
+                lines=_unfold.unfold(stream=stream), stream=self.url):
+            yield component
+        stats.bytes += reader.bytes
+        self.digest = reader.hash.digest()
+        self._fetched = 'stream'
+        self.changed = previous != ('stream', self.digest)
+        self._store_validators(info=info)
+
+    def _read_lines(self, lines, stream):
+        "Clear the feed and parse ``lines``, yielding its subcomponents"
         self.clear()
-        request = _urllib_request.Request(
-            url=self.url,
-            headers={
-                'User-Agent': self.user_agent,
-                },
-            )
-        with _urllib_request.urlopen(url=request) as f:
-            info = f.info()
-            content_type = info.get('Content-type', None)
-            if content_type != 'text/calendar':
-                raise ValueError(content_type)
-            codec = _codecs.lookup('UTF-8')
-            with codec.streamreader(stream=f) as stream:
-                self.parse(stream=stream)
+        self.digest = None
+        self._fetched = False
+        if self.stats is not None:
+            lines = self.stats.timed(
+                lines, stage='unfold', feed=self.url, counter='lines')
+        self._begin(lines=lines, stream=stream)
+        components = self.iterread(lines=lines, **self._parse_kwargs())
+        if self.stats is not None:
+            components = self.stats.timed(
+                components, stage='parse', feed=self.url,
+                counter='components', exclude='unfold')
+        for component in components:
+            yield component
+
+    def _store_validators(self, info, body=None):
+        if self.validators is None or info is None:
+            return
+        entry = dict(
+            (key, info[key]) for key in _validator.VALIDATORS
+            if info.get(key, None))
+        if entry:
+            if body is not None:
+                entry['body'] = body
+            self.validators.set(self.url, entry)
+        else:
+            self.validators.delete(self.url)
+
+    def _timer(self, stage):
+        return _stats.timer(stats=self.stats, stage=stage, feed=self.url)
+
+    def _check_content_type(self, info):
+        content_type = info.get('Content-type', None)
+        if content_type != 'text/calendar':
+            raise ValueError(content_type)
 
     def parse(self, stream):
-        lines = _unfold.unfold(stream=stream)
+        self._parse_lines(lines=_unfold.unfold(stream=stream), stream=stream)
+
+    def parse_bytes(self, buffer):
+        """Parse a bytes-like buffer (e.g. ``bytes`` or an ``mmap``) of UTF-8
+        """
+        self._parse_lines(
+            lines=_unfold.unfold_bytes(buffer=buffer),
+            stream='<{}-byte buffer>'.format(len(buffer)))
+
+    async def async_parse(self, stream):
+        """Parse an asynchronous iterable of lines (``str`` or UTF-8 ``bytes``)
+
+        The parser is synchronous, so the unfolded lines of the whole
+        feed are collected before parsing starts.  For large feeds,
+        prefer ``iterfetch``, which parses as the body arrives.
+        """
+        lines = [line async for line in _unfold.async_unfold(stream=stream)]
+        self._parse_lines(lines=iter(lines), stream=stream)
+
+    def _parse_lines(self, lines, stream):
+        self._begin(lines=lines, stream=stream)
+        self.read(lines=lines, **self._parse_kwargs())
+
+    def _parse_kwargs(self):
+        "Keyword arguments for ``property.parse``"
+        return {
+            'lazy': self.lazy,
+            'verbatim': self.verbatim,
+            'interner': self.interner,
+            }
+
+    def _begin(self, lines, stream):
         line = next(lines)
         prop = _property.parse(line=line)
         if prop.name != 'BEGIN' or prop.value != self.name:
             raise ValueError(
                 "stream {} must start with 'BEGIN:VCALENDAR', not {!r}".format(
                     stream, line))
-        self.read(lines=lines)
+
+
+class _HashingReader (_io.RawIOBase):
+    "Read from a binary stream, hashing and counting the bytes read"
+    def __init__(self, raw):
+        super(_HashingReader, self).__init__()
+        self.raw = raw
+        self.hash = _hashlib.sha256()
+        self.bytes = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            with memoryview(buffer) as view:
+                self.hash.update(view[:count])
+            self.bytes += count
+        return count
@@ -0,0 +1,527 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Free/busy time as slot bitmaps
+
+A ``Bitmap`` covers a time window split into fixed-length slots,
+with one bit per slot stored in a Python ``int``.  That keeps a
+month of 5-minute slots in about a kilobyte, and unions,
+intersections and complements across calendars run as single
+big-integer operations.
+
+>>> import datetime
+>>> from .component.calendar import Calendar
+>>> from .component.event import Event
+>>> from .property import parse
+>>> def calendar(*events):
+...     c = Calendar()
+...     for lines in events:
+...         e = Event()
+...         for line in lines:
+...             e.add_property(parse(line))
+...         c.add_component(e)
+...     return c
+>>> room_a = calendar(
+...     ['UID:a1', 'DTSTART:20130701T090000Z', 'DTEND:20130701T103000Z'],
+...     ['UID:a2', 'DTSTART:20130701T140000Z', 'DURATION:PT1H',
+...      'STATUS:TENTATIVE'],
+...     ['UID:a3', 'DTSTART:20130701T120000Z', 'DURATION:PT1H',
+...      'TRANSP:TRANSPARENT'])
+>>> room_b = calendar(
+...     ['UID:b1', 'DTSTART:20130701T100000Z', 'DTEND:20130701T110000Z',
+...      'RRULE:FREQ=HOURLY;INTERVAL=4;COUNT=3'])
+>>> utc = datetime.timezone.utc
+>>> start = datetime.datetime(2013, 7, 1, 8, tzinfo=utc)
+>>> end = datetime.datetime(2013, 7, 1, 18, tzinfo=utc)
+>>> a = busy(calendars=[room_a], start=start, end=end)
+>>> b = busy(calendars=[room_b], start=start, end=end)
+>>> def show(bitmap):
+...     for s,e in bitmap.periods():
+...         print(s.strftime('%H:%M'), e.strftime('%H:%M'))
+>>> show(a)
+09:00 10:30
+14:00 15:00
+>>> show(a | b)  # when either room is busy
+09:00 11:00
+14:00 15:00
+>>> show(~a & ~b)  # when both rooms are free
+08:00 09:00
+11:00 14:00
+15:00 18:00
+
+Summarize calendars as ``VFREEBUSY`` components.
+
+>>> print(freebusy(
+...     calendars=[room_a], start=start, end=end, uid='room-a',
+...     dtstamp=datetime.datetime(2013, 6, 30, tzinfo=utc)))
+BEGIN:VFREEBUSY
+DTSTAMP:20130630T000000Z
+UID:room-a
+DTSTART:20130701T080000Z
+DTEND:20130701T180000Z
+FREEBUSY;FBTYPE=BUSY:20130701T090000Z/20130701T103000Z
+FREEBUSY;FBTYPE=BUSY-TENTATIVE:20130701T140000Z/20130701T150000Z
+END:VFREEBUSY
+"""
+
+import datetime as _datetime
+import heapq as _heapq
+import math as _math
+import uuid as _uuid
+
+from . import recurrence as _recurrence
+from .component import freebusy as _component_freebusy
+from .dtype import time as _time
+from .index import interval as _interval
+from .property import change as _property_change
+from .property import datetime as _property_datetime
+from .property import relationship as _property_relationship
+
+
+SLOT = _datetime.timedelta(minutes=5)
+
+WORKING_HOURS = (_datetime.time(9), _datetime.time(17))
+
+WORKING_DAYS = (0, 1, 2, 3, 4)  # Monday through Friday
+
+_EPOCH = _datetime.datetime(1970, 1, 1, tzinfo=_datetime.timezone.utc)
+
+
+class Bitmap (object):
+    """Busy slots in ``[start, end)``, one bit per ``slot``
+
+    Bit ``i`` covers ``[start + i * slot, start + (i + 1) * slot)``,
+    and any overlap with a busy period marks the whole slot busy.
+    Bitmaps combine with ``|`` (union), ``&`` (intersection), ``-``
+    (difference) and ``~`` (complement) if they share a window and
+    slot length.
+
+    >>> import datetime
+    >>> bitmap = Bitmap(
+    ...     start=datetime.date(2013, 7, 1), end=datetime.date(2013, 7, 2),
+    ...     slot=datetime.timedelta(hours=1))
+    >>> len(bitmap)
+    24
+    >>> bitmap.add(
+    ...     start=datetime.datetime(2013, 7, 1, 9, 30),
+    ...     end=datetime.datetime(2013, 7, 1, 11))
+    >>> bitmap.count(), bitmap.busy(datetime.datetime(2013, 7, 1, 10, 59))
+    (2, True)
+    >>> bin(bitmap.bits)
+    '0b11000000000'
+    """
+    def __init__(self, start, end, slot=SLOT, bits=0):
+        self.start = _interval.timestamp(start)
+        self.end = _interval.timestamp(end)
+        self.slot = slot.total_seconds()
+        if self.slot <= 0:
+            raise ValueError('invalid slot length {}'.format(slot))
+        self.slots = max(0, _math.ceil((self.end - self.start) / self.slot))
+        self._mask = (1 << self.slots) - 1
+        self.bits = bits & self._mask
+
+    def __repr__(self):
+        return '<{}.{} {}/{} busy>'.format(
+            self.__module__, type(self).__name__, self.count(), self.slots)
+
+    def __len__(self):
+        return self.slots
+
+    def __bool__(self):
+        return bool(self.bits)
+
+    def __eq__(self, other):
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return self._layout() == other._layout() and self.bits == other.bits
+
+    def __or__(self, other):
+        return self._new(bits=self.bits | self._check(other).bits)
+
+    def __and__(self, other):
+        return self._new(bits=self.bits & self._check(other).bits)
+
+    def __sub__(self, other):
+        return self._new(bits=self.bits & ~self._check(other).bits)
+
+    def __invert__(self):
+        return self._new(bits=~self.bits)
+
+    def copy(self):
+        return self._new(bits=self.bits)
+
+    def count(self):
+        "Return the number of busy slots"
+        return bin(self.bits).count('1')
+
+    def add(self, start, end):
+        "Mark ``[start, end)`` (dates or datetimes) busy"
+        self.add_seconds(
+            start=_interval.timestamp(start), end=_interval.timestamp(end))
+
+    def add_seconds(self, start, end):
+        "Mark ``[start, end)`` (in POSIX seconds) busy"
+        first = max(0, int((start - self.start) // self.slot))
+        last = min(self.slots, _math.ceil((end - self.start) / self.slot))
+        if last > first:
+            self.bits |= ((1 << (last - first)) - 1) << first
+
+    def busy(self, point):
+        "Return ``True`` if the slot holding ``point`` is busy"
+        i = int((_interval.timestamp(point) - self.start) // self.slot)
+        return 0 <= i < self.slots and bool(self.bits >> i & 1)
+
+    def runs(self):
+        "Iterate through ``(first slot, stop slot)`` runs of busy slots"
+        bits = self.bits
+        offset = 0
+        while bits:
+            skip = (bits & -bits).bit_length() - 1  # trailing zeros
+            bits >>= skip
+            offset += skip
+            length = (~bits & (bits + 1)).bit_length() - 1  # trailing ones
+            yield (offset, offset + length)
+            bits >>= length
+            offset += length
+
+    def periods(self):
+        "Return merged busy periods as ``(start, end)`` UTC datetimes"
+        return [(self._datetime(slot=first), self._datetime(slot=stop))
+                for first,stop in self.runs()]
+
+    def _datetime(self, slot):
+        seconds = min(self.start + slot * self.slot, self.end)
+        return _EPOCH + _datetime.timedelta(seconds=seconds)
+
+    def _layout(self):
+        return (self.start, self.slot, self.slots)
+
+    def _check(self, other):
+        if self._layout() != other._layout():
+            raise ValueError('cannot combine {!r} with {!r}'.format(self, other))
+        return other
+
+    def _new(self, bits):
+        bitmap = object.__new__(type(self))
+        bitmap.start = self.start
+        bitmap.end = self.end
+        bitmap.slot = self.slot
+        bitmap.slots = self.slots
+        bitmap._mask = self._mask
+        bitmap.bits = bits & self._mask
+        return bitmap
+
+
+def fbtype(event):
+    """Return an event's free/busy type, or ``None`` if it takes no time
+
+    Transparent and cancelled events don't block time, and
+    tentative events are ``BUSY-TENTATIVE``.
+    """
+    if 'TRANSP' in event and event['TRANSP'].value.upper() == 'TRANSPARENT':
+        return None
+    status = event['STATUS'].value.upper() if 'STATUS' in event else None
+    if status == 'CANCELLED':
+        return None
+    if status == 'TENTATIVE':
+        return 'BUSY-TENTATIVE'
+    return 'BUSY'
+
+
+def events(calendar, start, end):
+    """Return the ``VEVENT``\\s that might be busy in ``[start, end)``
+
+    ``calendar`` may be a ``Calendar``, whose events are all checked
+    (so each query costs O(all events)), or an ``EventIndex`` (see
+    ``pycalendar.index.interval``), which only visits the events
+    near the window.  Either way, recurring events are only returned
+    if their span (see ``component_span``) overlaps the window, so
+    finished and future series aren't expanded.
+
+    >>> import datetime
+    >>> from .component.calendar import Calendar
+    >>> from .component.event import Event
+    >>> from .index.interval import EventIndex
+    >>> from .property import parse
+    >>> c = Calendar()
+    >>> for lines in [
+    ...         ['UID:a', 'DTSTART:20130701T090000Z', 'DURATION:PT1H'],
+    ...         ['UID:b', 'DTSTART:20130601T090000Z', 'DURATION:PT1H',
+    ...          'RRULE:FREQ=DAILY;UNTIL=20130610T090000Z'],
+    ...         ['UID:c', 'DTSTART:20130601T090000Z', 'DURATION:PT1H',
+    ...          'RRULE:FREQ=DAILY']]:
+    ...     e = Event()
+    ...     for line in lines:
+    ...         e.add_property(parse(line))
+    ...     c.add_component(e)
+    >>> index = EventIndex()
+    >>> index.update(added=c['VEVENT'])
+    >>> start = datetime.datetime(2013, 7, 1, tzinfo=datetime.timezone.utc)
+    >>> end = start + datetime.timedelta(days=1)
+    >>> [e['UID'].value for e in events(calendar=c, start=start, end=end)]
+    ['a', 'c']
+    >>> [e['UID'].value for e in events(calendar=index, start=start, end=end)]
+    ['c', 'a']
+    """
+    if isinstance(calendar, _interval.EventIndex):
+        return calendar.candidates(start=start, end=end)
+    a = _interval.timestamp(start)
+    b = _interval.timestamp(end)
+    found = []
+    for event in calendar.get('VEVENT', []):
+        if _interval.recurs(component=event):
+            span = _interval.component_span(component=event)
+        else:
+            span = _interval.component_interval(component=event)
+        if span is not None and span[0] < b and (span[1] > a or span[0] >= a):
+            found.append(event)
+    return found
+
+
+def busy_bitmaps(calendars, start, end, slot=SLOT):
+    """Return ``{fbtype: Bitmap}`` for the ``VEVENT``\\s of ``calendars``
+
+    Each calendar may be a ``Calendar`` or an ``EventIndex`` (see
+    ``events``).  Recurring events contribute each occurrence in the
+    window.
+    """
+    bitmaps = {
+        'BUSY': Bitmap(start=start, end=end, slot=slot),
+        'BUSY-TENTATIVE': Bitmap(start=start, end=end, slot=slot),
+        }
+    for calendar in calendars:
+        for event in events(calendar=calendar, start=start, end=end):
+            kind = fbtype(event=event)
+            if kind is None:
+                continue
+            interval = _interval.component_interval(component=event)
+            if interval is None:
+                continue
+            bitmap = bitmaps[kind]
+            if not _interval.recurs(component=event):
+                bitmap.add_seconds(*interval)
+                continue
+            duration = interval[1] - interval[0]
+            for occurrence in _recurrence.occurrences(
+                    component=event, start=start, end=end):
+                t = _interval.timestamp(occurrence)
+                bitmap.add_seconds(start=t, end=t + duration)
+    return bitmaps
+
+
+def busy(calendars, start, end, slot=SLOT, tentative=True):
+    """Return a ``Bitmap`` of the time blocked by ``calendars``' events
+
+    With ``tentative`` set, tentative events count as busy.
+    """
+    bitmaps = busy_bitmaps(calendars=calendars, start=start, end=end, slot=slot)
+    if tentative:
+        return bitmaps['BUSY'] | bitmaps['BUSY-TENTATIVE']
+    return bitmaps['BUSY']
+
+
+def freebusy(calendars, start, end, slot=SLOT, uid=None, dtstamp=None):
+    """Return a ``VFREEBUSY`` component summarizing ``calendars``
+
+    ``FREEBUSY`` periods are merged per type, and time that is both
+    busy and tentatively busy is only listed as ``BUSY``.  Floating
+    times (without a time zone) and dates are treated as UTC.
+    """
+    bitmaps = busy_bitmaps(calendars=calendars, start=start, end=end, slot=slot)
+    bitmaps['BUSY-TENTATIVE'] -= bitmaps['BUSY']
+    if uid is None:
+        uid = str(_uuid.uuid4())
+    if dtstamp is None:
+        dtstamp = _datetime.datetime.now(_datetime.timezone.utc).replace(
+            microsecond=0)
+    component = _component_freebusy.FreeBusy()
+    bitmap = bitmaps['BUSY']
+    for prop in [
+            _property_change.DateTimeStamp(value=dtstamp),
+            _property_relationship.UniqueIdentifier(value=uid),
+            _property_datetime.DateTimeStart(value=bitmap._datetime(slot=0)),
+            _property_datetime.DateTimeEnd(
+                value=bitmap._datetime(slot=bitmap.slots)),
+            ]:
+        component.add_property(prop)
+    for kind in ['BUSY', 'BUSY-TENTATIVE']:
+        periods = bitmaps[kind].periods()
+        if periods:
+            component.add_property(_property_datetime.FreeBusyTime(
+                parameters={'FBTYPE': kind}, value=periods))
+    return component
+
+
+def busy_intervals(calendar, start, end, tentative=True):
+    """Lazily generate a calendar's busy ``(start, end)`` intervals
+
+    Intervals are in POSIX seconds, sorted by start, and may overlap.
+    Only intervals that might overlap ``[start, end)`` are generated,
+    with recurring events expanded lazily in that window.  The
+    calendar may be a ``Calendar`` or an ``EventIndex`` (see
+    ``events``).
+    """
+    a = _interval.timestamp(start)
+    b = _interval.timestamp(end)
+    single = []
+    streams = [single]
+    for event in events(calendar=calendar, start=start, end=end):
+        kind = fbtype(event=event)
+        if kind is None or (kind == 'BUSY-TENTATIVE' and not tentative):
+            continue
+        interval = _interval.component_interval(component=event)
+        if interval is None:
+            continue
+        if _interval.recurs(component=event):
+            streams.append(_occurrence_intervals(
+                event=event, start=start, end=end,
+                duration=interval[1] - interval[0]))
+        elif interval[0] < b and interval[1] > a:
+            single.append(interval)
+    single.sort()
+    return _heapq.merge(*streams)
+
+
+def _occurrence_intervals(event, start, end, duration):
+    for occurrence in _recurrence.occurrences(
+            component=event, start=start, end=end):
+        t = _interval.timestamp(occurrence)
+        yield (t, t + duration)
+
+
+def working_windows(start, end, hours=WORKING_HOURS, days=WORKING_DAYS,
+                    tzinfo=_datetime.timezone.utc):
+    r"""Generate ``(start, end)`` working-hour windows in POSIX seconds
+
+    ``hours`` is a ``(start, end)`` pair of local ``time``\s and
+    ``days`` holds the working weekdays (Monday is ``0``).
+    """
+    a = _interval.timestamp(start)
+    b = _interval.timestamp(end)
+    day = _datetime.datetime.fromtimestamp(a, tzinfo).date()
+    last = _datetime.datetime.fromtimestamp(b, tzinfo).date()
+    while day <= last:
+        if day.weekday() in days:
+            ws = _interval.timestamp(_time.localize(
+                naive=_datetime.datetime.combine(day, hours[0]), tzinfo=tzinfo))
+            we = _interval.timestamp(_time.localize(
+                naive=_datetime.datetime.combine(day, hours[1]), tzinfo=tzinfo))
+            ws = max(ws, a)
+            we = min(we, b)
+            if we > ws:
+                yield (ws, we)
+        day += _datetime.timedelta(days=1)
+
+
+def first_free(calendars, duration, start, end, count=1, hours=None,
+               days=WORKING_DAYS, tzinfo=_datetime.timezone.utc,
+               granularity=_datetime.timedelta(minutes=15), tentative=True):
+    """Return the first ``count`` slots when all ``calendars`` are free
+
+    Slots are ``(start, end)`` UTC datetimes lasting ``duration``,
+    starting on multiples of ``granularity`` (counted from the Unix
+    epoch), and not overlapping each other.  With ``hours`` (e.g.
+    ``WORKING_HOURS``), slots must fit inside those local hours on
+    ``days`` in ``tzinfo``.  Calendars may be ``EventIndex``\\es (see
+    ``events``).
+
+    The calendars' busy intervals are merged lazily in start order,
+    and the search stops as soon as ``count`` slots turn up, so only
+    the part of the window before the last slot is examined.
+
+    >>> import datetime
+    >>> import pytz
+    >>> from .component.calendar import Calendar
+    >>> from .component.event import Event
+    >>> from .property import parse
+    >>> def calendar(*events):
+    ...     c = Calendar()
+    ...     for lines in events:
+    ...         e = Event()
+    ...         for line in lines:
+    ...             e.add_property(parse(line))
+    ...         c.add_component(e)
+    ...     return c
+    >>> alice = calendar(
+    ...     ['UID:a1', 'DTSTART:20130701T070000Z', 'DURATION:PT2H',
+    ...      'RRULE:FREQ=DAILY'])
+    >>> bob = calendar(
+    ...     ['UID:b1', 'DTSTART:20130701T100000Z', 'DTEND:20130701T111500Z'],
+    ...     ['UID:b2', 'DTSTART:20130701T120000Z', 'DTEND:20130701T160000Z'])
+    >>> room = calendar(
+    ...     ['UID:r1', 'DTSTART;VALUE=DATE:20130702'])  # booked all day
+    >>> paris = pytz.timezone('Europe/Paris')
+    >>> for s,e in first_free(
+    ...         calendars=[alice, bob, room],
+    ...         duration=datetime.timedelta(minutes=45),
+    ...         start=datetime.datetime(2013, 7, 1, tzinfo=pytz.utc),
+    ...         end=datetime.datetime(2013, 7, 15, tzinfo=pytz.utc),
+    ...         count=3, hours=WORKING_HOURS, tzinfo=paris):
+    ...     print(s.astimezone(paris).strftime('%a %H:%M'),
+    ...           e.astimezone(paris).strftime('%H:%M'))
+    Mon 11:00 11:45
+    Mon 13:15 14:00
+    Wed 11:00 11:45
+
+    Busy intervals can run past the end of a working day.
+
+    >>> overnight = calendar(
+    ...     ['UID:o1', 'DTSTART:20130701T080000Z', 'DTEND:20130702T110000Z'])
+    >>> for s,e in first_free(
+    ...         calendars=[overnight],
+    ...         duration=datetime.timedelta(minutes=45),
+    ...         start=datetime.datetime(2013, 7, 1, tzinfo=pytz.utc),
+    ...         end=datetime.datetime(2013, 7, 15, tzinfo=pytz.utc),
+    ...         count=2, hours=WORKING_HOURS):
+    ...     print(s.strftime('%a %H:%M'), e.strftime('%H:%M'))
+    Tue 11:00 11:45
+    Tue 11:45 12:30
+    """
+    seconds = duration.total_seconds()
+    step = granularity.total_seconds()
+    a = _interval.timestamp(start)
+    b = _interval.timestamp(end)
+    if hours is None:
+        windows = iter([(a, b)])
+    else:
+        windows = working_windows(
+            start=start, end=end, hours=hours, days=days, tzinfo=tzinfo)
+    busy = _heapq.merge(*[
+        busy_intervals(
+            calendar=calendar, start=start, end=end, tentative=tentative)
+        for calendar in calendars])
+    pending = next(busy, None)
+    busy_until = a  # the latest end of the intervals consumed so far
+    slots = []
+    for ws,we in windows:
+        t = max(ws, busy_until)
+        while len(slots) < count:
+            t = _math.ceil(t / step) * step
+            if t + seconds > we:
+                break
+            # consume busy intervals starting before the slot ends
+            while pending is not None and pending[0] < t + seconds:
+                busy_until = max(busy_until, pending[1])
+                pending = next(busy, None)
+            if busy_until > t:
+                t = busy_until  # blocked, try again after it
+                continue
+            slots.append((t, t + seconds))
+            t += seconds
+        if len(slots) >= count:
+            break
+    return [(_EPOCH + _datetime.timedelta(seconds=s),
+             _EPOCH + _datetime.timedelta(seconds=e)) for s,e in slots]
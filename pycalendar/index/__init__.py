@@ -0,0 +1,29 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Indexes over aggregated calendar components
+
+Indexes have an ``update(removed, added)`` method taking iterables of
+components.  Pass them to ``Aggregator(indexes=[...])`` to keep them
+in sync with the merged calendar as feeds are refreshed.
+
+``interval.EventIndex``
+  Time ranges (overlap, point and next-N queries).
+``spatial.GeoIndex``
+  ``GEO`` positions (bounding-box, radius and nearest queries).
+``text.TextIndex``
+  Words in text properties (AND/OR and prefix queries).
+"""
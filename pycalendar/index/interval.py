@@ -0,0 +1,444 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Time-range indexing
+
+``IntervalIndex`` is a treap (a randomized balanced binary search
+tree) keyed on interval starts, with each node also tracking the
+latest end in its subtree.  That supports inserts, removals, overlap
+and point queries, and "next N" queries in logarithmic (expected)
+time, plus the size of the output.  ``EventIndex`` wraps it for
+calendar components.
+"""
+
+import datetime as _datetime
+import itertools as _itertools
+import random as _random
+
+from .. import recurrence as _recurrence
+
+
+class _Node (object):
+    __slots__ = (
+        'key', 'end', 'item', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, key, end, item):
+        self.key = key
+        self.end = end
+        self.item = item
+        self.priority = _random.random()
+        self.left = self.right = None
+        self.max_end = end
+
+
+def _update(node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+
+def _insert(node, new):
+    if node is None:
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:  # rotate right
+            child = node.left
+            node.left = child.right
+            _update(node)
+            child.right = node
+            node = child
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:  # rotate left
+            child = node.right
+            node.right = child.left
+            _update(node)
+            child.left = node
+            node = child
+    _update(node)
+    return node
+
+
+def _join(left, right):
+    "Join two treaps, where every key in ``left`` is below those in ``right``"
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _join(left.right, right)
+        _update(left)
+        return left
+    right.left = _join(left, right.left)
+    _update(right)
+    return right
+
+
+def _remove(node, key):
+    if node is None:
+        raise KeyError(key)
+    if key == node.key:
+        return _join(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    _update(node)
+    return node
+
+
+class IntervalIndex (object):
+    """Index items by half-open ``[start, end)`` intervals
+
+    Starts and ends may be any mutually comparable values (e.g.
+    numbers).  Zero-length intervals (``start == end``) are instants.
+
+    >>> index = IntervalIndex()
+    >>> for start,end,item in [
+    ...         (1, 5, 'a'), (2, 3, 'b'), (4, 9, 'c'), (6, 6, 'd'),
+    ...         (7, 8, 'e')]:
+    ...     index.add(start=start, end=end, item=item)
+    >>> len(index)
+    5
+    >>> index.overlap(start=3, end=6)
+    ['a', 'c']
+    >>> index.overlap(start=6, end=7)
+    ['c', 'd']
+    >>> index.at(point=6)
+    ['c', 'd']
+    >>> index.at(point=4)
+    ['a', 'c']
+    >>> list(index.after(point=2, count=3))
+    ['b', 'c', 'd']
+    >>> index.remove(item='c')
+    >>> index.overlap(start=3, end=6)
+    ['a']
+    >>> list(index)
+    ['a', 'b', 'd', 'e']
+    """
+    def __init__(self):
+        self._root = None
+        self._keys = {}  # {id(item): key}
+        self._counter = _itertools.count()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return self.after(point=None)
+
+    def __contains__(self, item):
+        return id(item) in self._keys
+
+    def add(self, start, end, item):
+        if end < start:
+            raise ValueError('interval ends ({}) before it starts ({})'.format(
+                end, start))
+        if id(item) in self._keys:
+            self.remove(item=item)
+        key = (start, next(self._counter))
+        self._keys[id(item)] = key
+        self._root = _insert(self._root, _Node(key=key, end=end, item=item))
+
+    def remove(self, item):
+        key = self._keys.pop(id(item))
+        self._root = _remove(self._root, key)
+
+    def clear(self):
+        self._root = None
+        self._keys.clear()
+
+    def overlap(self, start, end):
+        "Return items whose intervals overlap ``[start, end)``, by start"
+        items = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            # walk left while the subtree may hold overlapping intervals
+            while node is not None and node.max_end >= start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.key[0] >= end:
+                break  # this and all later nodes start too late
+            if node.end > start or node.key[0] >= start:
+                items.append(node.item)
+            node = node.right
+        return items
+
+    def at(self, point):
+        "Return items whose intervals contain ``point``, by start"
+        items = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None and node.max_end >= point:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            start = node.key[0]
+            if start > point:
+                break
+            if node.end > point or node.end == start == point:
+                items.append(node.item)
+            node = node.right
+        return items
+
+    def after(self, point, count=None):
+        """Iterate through items starting at or after ``point``, by start
+
+        With ``point`` set to ``None``, iterate through all items.
+        Stop after ``count`` items, if given.
+        """
+        stack = []
+        node = self._root
+        while node is not None:
+            if point is None or node.key[0] >= point:
+                stack.append(node)
+                node = node.left
+            else:
+                node = node.right
+        yielded = 0
+        while stack and (count is None or yielded < count):
+            node = stack.pop()
+            yield node.item
+            yielded += 1
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+
+def timestamp(value):
+    """Convert a ``date`` or ``datetime`` to POSIX seconds
+
+    Floating (naive) times and dates (at midnight) are treated as UTC.
+
+    >>> import pytz
+    >>> timestamp(_datetime.date(1970, 1, 2))
+    86400.0
+    >>> timestamp(_datetime.datetime(1970, 1, 1, 1))
+    3600.0
+    >>> timestamp(pytz.timezone('Europe/Paris').localize(
+    ...     _datetime.datetime(1970, 1, 1, 1)))
+    0.0
+    """
+    if not isinstance(value, _datetime.datetime):
+        value = _datetime.datetime.combine(value, _datetime.time())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_datetime.timezone.utc)
+    return value.timestamp()
+
+
+def component_interval(component):
+    """Return a component's ``(start, end)`` in POSIX seconds
+
+    The end comes from ``DTEND`` (or ``DUE``), then ``DTSTART`` plus
+    ``DURATION``.  Without either, events starting on a date last
+    for that day, and other components are instants (RFC 5545,
+    section 3.6.1).  Returns ``None`` for components without a
+    ``DTSTART``.
+    """
+    if 'DTSTART' not in component:
+        return None
+    dtstart = component['DTSTART'].value
+    start = timestamp(dtstart)
+    for name in ['DTEND', 'DUE']:
+        if name in component:
+            return (start, max(start, timestamp(component[name].value)))
+    if 'DURATION' in component:
+        duration = component['DURATION'].value
+        return (start, max(start, start + duration.total_seconds()))
+    if (component.name == 'VEVENT' and
+            not isinstance(dtstart, _datetime.datetime)):
+        return (start, start + 86400)
+    return (start, start)
+
+
+def component_span(component):
+    """Return ``(start, end)`` covering all of a component's occurrences
+
+    This is ``component_interval`` for components that don't recur.
+    Otherwise the span runs from ``DTSTART`` to the end of the last
+    ``RDATE`` or ``UNTIL``-bounded ``RRULE`` occurrence, and is
+    unbounded (ending at ``inf``) for rules without ``UNTIL``.
+
+    >>> from ..component.event import Event
+    >>> from ..property import parse
+    >>> event = Event()
+    >>> for line in ['DTSTART:19700101T000000Z', 'DURATION:PT1H',
+    ...              'RRULE:FREQ=DAILY;UNTIL=19700103T000000Z']:
+    ...     event.add_property(parse(line))
+    >>> component_span(event)
+    (0.0, 176400.0)
+    >>> event['RRULE'] = parse('RRULE:FREQ=DAILY;COUNT=3')
+    >>> component_span(event)
+    (0.0, inf)
+    """
+    interval = component_interval(component=component)
+    if interval is None:
+        return None
+    start,end = interval
+    duration = end - start
+    for rule in _recurrence.values(component=component, name='RRULE'):
+        if rule.until is None:
+            return (start, float('inf'))
+        until = timestamp(rule.until)
+        if not isinstance(rule.until, _datetime.datetime):
+            until += 86400  # the whole day
+        end = max(end, until + duration)
+    for values in _recurrence.values(component=component, name='RDATE'):
+        for value in values:
+            if isinstance(value, tuple):  # a PERIOD
+                period_start,period_end = value
+                if isinstance(period_end, _datetime.timedelta):
+                    period_end = period_start + period_end
+                end = max(end, timestamp(period_end))
+            else:
+                end = max(end, timestamp(value) + duration)
+    return (start, end)
+
+
+def recurs(component):
+    "Return ``True`` if a component has ``RRULE``\\s or ``RDATE``\\s"
+    return 'RRULE' in component or 'RDATE' in component
+
+
+class EventIndex (object):
+    """Index calendar components by the time they occupy
+
+    >>> from ..component.event import Event
+    >>> from ..property import parse
+    >>> def event(uid, *lines):
+    ...     e = Event()
+    ...     for line in ('UID:{}'.format(uid),) + lines:
+    ...         e.add_property(parse(line))
+    ...     return e
+    >>> a = event('a', 'DTSTART:20130701T090000Z', 'DTEND:20130701T100000Z')
+    >>> b = event('b', 'DTSTART:20130701T093000Z', 'DURATION:PT2H')
+    >>> c = event('c', 'DTSTART;VALUE=DATE:20130702')
+    >>> index = EventIndex()
+    >>> index.update(added=[a, b, c])
+    >>> len(index)
+    3
+
+    Query with dates or datetimes.
+
+    >>> import datetime
+    >>> utc = datetime.timezone.utc
+    >>> def uids(events):
+    ...     return [e['UID'].value for e in events]
+    >>> uids(index.overlap(
+    ...     start=datetime.datetime(2013, 7, 1, 10, tzinfo=utc),
+    ...     end=datetime.date(2013, 7, 3)))
+    ['b', 'c']
+    >>> uids(index.at(datetime.datetime(2013, 7, 1, 9, 45, tzinfo=utc)))
+    ['a', 'b']
+    >>> uids(index.after(datetime.datetime(2013, 7, 1, 9, 15), count=1))
+    ['b']
+
+    Update the index as components come and go.
+
+    >>> index.update(removed=[b])
+    >>> uids(index.at(datetime.datetime(2013, 7, 1, 9, 45, tzinfo=utc)))
+    ['a']
+
+    The intervals of recurring components only cover their first
+    occurrence, so their whole spans (see ``component_span``) are
+    indexed too.  ``candidates`` returns the components that might
+    occupy time in a window, leaving recurring ones to be expanded.
+
+    >>> d = event('d', 'DTSTART:20130601T090000Z', 'DURATION:PT1H',
+    ...           'RRULE:FREQ=WEEKLY')
+    >>> index.update(added=[d])
+    >>> uids(index.overlap(
+    ...     start=datetime.date(2013, 7, 1), end=datetime.date(2013, 7, 3)))
+    ['a', 'c']
+    >>> uids(index.candidates(
+    ...     start=datetime.date(2013, 7, 1), end=datetime.date(2013, 7, 3)))
+    ['d', 'a', 'c']
+    """
+    def __init__(self, names=('VEVENT',)):
+        self.names = names
+        self.intervals = IntervalIndex()
+        self.spans = IntervalIndex()  # recurring components only
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def __contains__(self, component):
+        return component in self.intervals
+
+    def update(self, removed=(), added=()):
+        "Remove and add components, ignoring those that aren't indexed"
+        for component in removed:
+            if component in self.intervals:
+                self.intervals.remove(item=component)
+            if component in self.spans:
+                self.spans.remove(item=component)
+        for component in added:
+            if component.name not in self.names:
+                continue
+            interval = component_interval(component=component)
+            if interval is not None:
+                start,end = interval
+                self.intervals.add(start=start, end=end, item=component)
+                if recurs(component=component):
+                    start,end = component_span(component=component)
+                    self.spans.add(start=start, end=end, item=component)
+
+    def clear(self):
+        self.intervals.clear()
+        self.spans.clear()
+
+    def overlap(self, start, end):
+        "Return components overlapping ``[start, end)``, by start"
+        return self.intervals.overlap(
+            start=timestamp(start), end=timestamp(end))
+
+    def candidates(self, start, end):
+        """Return components that might occupy time in ``[start, end)``
+
+        These are the non-recurring components overlapping the window
+        and the recurring components whose spans overlap it, by
+        ``DTSTART``.
+        """
+        start = timestamp(start)
+        end = timestamp(end)
+        items = [c for c in self.intervals.overlap(start=start, end=end)
+                 if c not in self.spans]
+        items.extend(self.spans.overlap(start=start, end=end))
+        items.sort(key=lambda c: component_interval(component=c)[0])
+        return items
+
+    def at(self, point):
+        "Return components in progress at ``point``, by start"
+        return self.intervals.at(point=timestamp(point))
+
+    def after(self, point, count=None):
+        "Iterate through components starting at or after ``point``, by start"
+        return self.intervals.after(point=timestamp(point), count=count)
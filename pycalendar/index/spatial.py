@@ -0,0 +1,269 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Geographic indexing
+
+``GeoIndex`` buckets components by their ``GEO`` position in a grid
+of latitude/longitude cells, so bounding-box, radius and nearest
+neighbor queries only look at the cells near the query.
+"""
+
+import math as _math
+
+from . import interval as _interval
+
+
+EARTH_RADIUS = 6371.0088  # mean radius, in kilometers
+
+
+def distance(a, b):
+    """Return the great-circle distance between two positions, in kilometers
+
+    Positions are ``(latitude, longitude)`` pairs in degrees, like
+    ``GEO`` values.
+
+    >>> round(distance((42.36, -71.06), (48.86, 2.35)))  # Boston to Paris
+    5531
+    """
+    lat_a,lon_a = (_math.radians(x) for x in a)
+    lat_b,lon_b = (_math.radians(x) for x in b)
+    h = (_math.sin((lat_b - lat_a) / 2) ** 2 +
+         _math.cos(lat_a) * _math.cos(lat_b) *
+         _math.sin((lon_b - lon_a) / 2) ** 2)
+    return 2 * EARTH_RADIUS * _math.asin(min(1, _math.sqrt(h)))
+
+
+class _Entry (object):
+    __slots__ = ('position', 'interval', 'item')
+
+    def __init__(self, position, interval, item):
+        self.position = position
+        self.interval = interval
+        self.item = item
+
+
+class GeoIndex (object):
+    """Index calendar components by their geographic position
+
+    >>> from ..component.event import Event
+    >>> from ..property import parse
+    >>> def event(uid, geo, start):
+    ...     e = Event()
+    ...     for line in [
+    ...             'UID:{}'.format(uid), 'GEO:{}'.format(geo),
+    ...             'DTSTART;VALUE=DATE:{}'.format(start)]:
+    ...         e.add_property(parse(line))
+    ...     return e
+    >>> boston = event('boston', '42.360100;-71.058900', '20130701')
+    >>> dover = event('dover', '42.226663;-71.286760', '20130630')
+    >>> paris = event('paris', '48.856600;2.352200', '20130701')
+    >>> fiji = event('fiji', '-17.713400;178.065000', '20130701')
+    >>> samoa = event('samoa', '-13.759000;-172.104600', '20130701')
+    >>> index = GeoIndex()
+    >>> index.update(added=[boston, dover, paris, fiji, samoa])
+    >>> len(index)
+    5
+    >>> def uids(events):
+    ...     return sorted(e['UID'].value for e in events)
+
+    Bounding boxes may cross the antimeridian (``west > east``).
+
+    >>> uids(index.bbox(south=40, west=-75, north=45, east=-70))
+    ['boston', 'dover']
+    >>> uids(index.bbox(south=-20, west=170, north=-10, east=-170))
+    ['fiji', 'samoa']
+
+    Radii and distances are in kilometers.
+
+    >>> uids(index.radius(latitude=42.36, longitude=-71.06, distance=25))
+    ['boston', 'dover']
+    >>> [(e['UID'].value, round(d)) for e,d in index.nearest(
+    ...     latitude=48.0, longitude=0.0, count=2)]
+    [('paris', 198), ('boston', 5405)]
+
+    All queries take an optional time window (see
+    ``interval.EventIndex``).
+
+    >>> import datetime
+    >>> uids(index.radius(
+    ...     latitude=42.36, longitude=-71.06, distance=25,
+    ...     start=datetime.date(2013, 7, 1), end=datetime.date(2013, 7, 2)))
+    ['boston']
+    >>> index.update(removed=[boston])
+    >>> uids(index.radius(latitude=42.36, longitude=-71.06, distance=25))
+    ['dover']
+    """
+    def __init__(self, names=('VEVENT',), cell_size=0.25):
+        self.names = names
+        self.cell_size = cell_size
+        self._rows = int(_math.ceil(180 / cell_size))
+        self._columns = int(_math.ceil(360 / cell_size))
+        self._cells = {}  # {(row, column): {id(item): _Entry}}
+        self._item_cells = {}  # {id(item): (row, column)}
+
+    def __len__(self):
+        return len(self._item_cells)
+
+    def __iter__(self):
+        for cell in self._cells.values():
+            for entry in cell.values():
+                yield entry.item
+
+    def __contains__(self, item):
+        return id(item) in self._item_cells
+
+    def add(self, position, item, interval=None):
+        """Index ``item`` at ``position`` (a ``(latitude, longitude)`` pair)
+
+        ``interval`` is an optional ``(start, end)`` in POSIX seconds,
+        for time-window filters.
+        """
+        if id(item) in self._item_cells:
+            self.remove(item=item)
+        cell = self._cell(*position)
+        self._item_cells[id(item)] = cell
+        self._cells.setdefault(cell, {})[id(item)] = _Entry(
+            position=position, interval=interval, item=item)
+
+    def remove(self, item):
+        cell = self._item_cells.pop(id(item))
+        entries = self._cells[cell]
+        del entries[id(item)]
+        if not entries:
+            del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._item_cells.clear()
+
+    def update(self, removed=(), added=()):
+        "Remove and add components, ignoring those that aren't indexed"
+        for component in removed:
+            if component in self:
+                self.remove(item=component)
+        for component in added:
+            if component.name not in self.names or 'GEO' not in component:
+                continue
+            self.add(
+                position=component['GEO'].value, item=component,
+                interval=_interval.component_interval(component=component))
+
+    def bbox(self, south, west, north, east, start=None, end=None):
+        """Return items inside a bounding box (in degrees)
+
+        If ``west > east``, the box crosses the antimeridian.  With
+        ``start`` and ``end`` (dates or datetimes), only return items
+        whose intervals overlap ``[start, end)``.
+        """
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180), (-180, east)]
+        match = self._time_filter(start=start, end=end)
+        items = []
+        for w,e in spans:
+            for entry in self._entries(south, w, north, e):
+                lat,lon = entry.position
+                if (south <= lat <= north and w <= lon <= e and
+                        match(entry)):
+                    items.append(entry.item)
+        return items
+
+    def radius(self, latitude, longitude, distance, start=None, end=None):
+        "Return items within ``distance`` kilometers of a position"
+        return [entry.item for entry,d in self._within(
+            latitude, longitude, distance, start=start, end=end)]
+
+    def nearest(self, latitude, longitude, count=1, start=None, end=None):
+        """Return the ``count`` nearest ``(item, distance)`` pairs, nearest first
+
+        Searches circles of doubling radius until they hold ``count``
+        matches (or cover the globe).
+        """
+        radius = _math.radians(self.cell_size) * EARTH_RADIUS
+        while True:
+            found = self._within(
+                latitude, longitude, radius, start=start, end=end)
+            if len(found) >= count or radius >= _math.pi * EARTH_RADIUS:
+                break
+            radius *= 2
+        found.sort(key=lambda pair: pair[1])
+        return [(entry.item, d) for entry,d in found[:count]]
+
+    def _within(self, latitude, longitude, radius, start=None, end=None):
+        "Return ``(entry, distance)`` pairs within ``radius`` kilometers"
+        center = (latitude, longitude)
+        delta = _math.degrees(radius / EARTH_RADIUS)
+        south = latitude - delta
+        north = latitude + delta
+        if south <= -90 or north >= 90:  # the circle covers a pole
+            spans = [(-180, 180)]
+        else:
+            width = _math.degrees(_math.asin(min(
+                1, _math.sin(radius / EARTH_RADIUS) /
+                _math.cos(_math.radians(latitude)))))
+            if width >= 180 or radius >= _math.pi / 2 * EARTH_RADIUS:
+                spans = [(-180, 180)]
+            elif longitude - width < -180:
+                spans = [(longitude - width + 360, 180),
+                         (-180, longitude + width)]
+            elif longitude + width > 180:
+                spans = [(longitude - width, 180),
+                         (-180, longitude + width - 360)]
+            else:
+                spans = [(longitude - width, longitude + width)]
+        match = self._time_filter(start=start, end=end)
+        found = []
+        for w,e in spans:
+            for entry in self._entries(south, w, north, e):
+                d = distance(center, entry.position)
+                if d <= radius and match(entry):
+                    found.append((entry, d))
+        return found
+
+    def _cell(self, latitude, longitude):
+        row = int((latitude + 90) // self.cell_size)
+        column = int((longitude + 180) // self.cell_size)
+        return (min(max(row, 0), self._rows - 1), column % self._columns)
+
+    def _entries(self, south, west, north, east):
+        "Iterate through entries in cells overlapping a (non-wrapping) box"
+        row_a,column_a = self._cell(max(south, -90), west)
+        row_b,column_b = self._cell(min(north, 90), min(east, 180 - 1e-9))
+        if (row_b - row_a + 1) * (column_b - column_a + 1) > len(self._cells):
+            for (row, column),entries in self._cells.items():
+                if row_a <= row <= row_b and column_a <= column <= column_b:
+                    yield from entries.values()
+            return
+        for row in range(row_a, row_b + 1):
+            for column in range(column_a, column_b + 1):
+                entries = self._cells.get((row, column))
+                if entries:
+                    yield from entries.values()
+
+    @staticmethod
+    def _time_filter(start=None, end=None):
+        if start is None and end is None:
+            return lambda entry: True
+        a = -_math.inf if start is None else _interval.timestamp(start)
+        b = _math.inf if end is None else _interval.timestamp(end)
+
+        def match(entry):
+            if entry.interval is None:
+                return False
+            s,e = entry.interval
+            return s < b and (e > a or s >= a)
+        return match
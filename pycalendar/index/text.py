@@ -0,0 +1,213 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Full-text indexing
+
+``TextIndex`` keeps per-field postings (``{field: {term: {id}}}``)
+for the text properties of calendar components, with a sorted
+vocabulary for prefix queries.
+"""
+
+import bisect as _bisect
+import itertools as _itertools
+import re as _re
+
+
+FIELDS = ('SUMMARY', 'DESCRIPTION', 'LOCATION', 'CATEGORIES')
+
+_TOKEN_REGEXP = _re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into case-folded word tokens
+
+    >>> tokenize('Software Carpentry: Boot-Camp at Straße 5')
+    ['software', 'carpentry', 'boot', 'camp', 'at', 'strasse', '5']
+    """
+    return _TOKEN_REGEXP.findall(text.casefold())
+
+
+class TextIndex (object):
+    r"""Index calendar components by the words in their text properties
+
+    >>> from ..component.event import Event
+    >>> from ..property import parse
+    >>> def event(*lines):
+    ...     e = Event()
+    ...     for line in lines:
+    ...         e.add_property(parse(line))
+    ...     return e
+    >>> a = event(
+    ...     'UID:a', 'SUMMARY:Software Carpentry bootcamp',
+    ...     'LOCATION:Oslo', 'CATEGORIES:EDUCATION,PROGRAMMING')
+    >>> b = event(
+    ...     'UID:b', 'SUMMARY:Boston geohash',
+    ...     r'DESCRIPTION:Meet at the Boston Common\, bring a GPS')
+    >>> c = event('UID:c', 'SUMMARY:Oslo bootstrapping workshop')
+    >>> index = TextIndex()
+    >>> index.update(added=[a, b, c])
+    >>> len(index)
+    3
+    >>> def uids(events):
+    ...     return [e['UID'].value for e in events]
+
+    Queries are case-insensitive, and all terms must match unless
+    ``operator`` is ``'or'``.  Terms ending in ``*`` match prefixes.
+
+    >>> uids(index.search('oslo'))
+    ['a', 'c']
+    >>> uids(index.search('Oslo BOOTCAMP'))
+    ['a']
+    >>> uids(index.search('programming gps', operator='or'))
+    ['a', 'b']
+    >>> uids(index.search('boot*'))
+    ['a', 'c']
+
+    Restrict queries to some fields.
+
+    >>> uids(index.search('oslo', fields=['SUMMARY']))
+    ['c']
+    >>> uids(index.search('common', fields=['SUMMARY', 'LOCATION']))
+    []
+
+    Update the index as components come and go.
+
+    >>> index.update(removed=[c])
+    >>> uids(index.search('boot*'))
+    ['a']
+    >>> index.terms(field='SUMMARY', prefix='b')
+    ['bootcamp', 'boston']
+    """
+    def __init__(self, names=('VEVENT',), fields=FIELDS):
+        self.names = names
+        self.fields = fields
+        self._postings = dict((field, {}) for field in fields)
+        self._vocabulary = dict((field, []) for field in fields)
+        self._items = {}  # {id(item): (sequence, item, [(field, term), ...])}
+        self._counter = _itertools.count()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        for sequence,item,keys in list(self._items.values()):
+            yield item
+
+    def __contains__(self, item):
+        return id(item) in self._items
+
+    def add(self, item, texts):
+        "Index ``item`` under ``texts``, a ``{field: [text, ...]}`` dict"
+        if id(item) in self._items:
+            self.remove(item=item)
+        keys = set()
+        for field,values in texts.items():
+            for value in values:
+                for term in tokenize(text=value):
+                    keys.add((field, term))
+        for field,term in keys:
+            postings = self._postings[field]
+            if term not in postings:
+                postings[term] = set()
+                _bisect.insort(self._vocabulary[field], term)
+            postings[term].add(id(item))
+        self._items[id(item)] = (next(self._counter), item, keys)
+
+    def remove(self, item):
+        sequence,item,keys = self._items.pop(id(item))
+        for field,term in keys:
+            postings = self._postings[field]
+            ids = postings[term]
+            ids.discard(id(item))
+            if not ids:
+                del postings[term]
+                vocabulary = self._vocabulary[field]
+                del vocabulary[_bisect.bisect_left(vocabulary, term)]
+
+    def clear(self):
+        for field in self.fields:
+            self._postings[field].clear()
+            del self._vocabulary[field][:]
+        self._items.clear()
+
+    def update(self, removed=(), added=()):
+        "Remove and add components, ignoring those that aren't indexed"
+        for component in removed:
+            if component in self:
+                self.remove(item=component)
+        for component in added:
+            if component.name not in self.names:
+                continue
+            texts = {}
+            for field in self.fields:
+                if field in component:
+                    props = component[field]
+                    if not isinstance(props, list):
+                        props = [props]
+                    texts[field] = [prop.value for prop in props]
+            self.add(item=component, texts=texts)
+
+    def terms(self, field, prefix=''):
+        "Return the indexed terms in ``field`` starting with ``prefix``"
+        vocabulary = self._vocabulary[field]
+        start = _bisect.bisect_left(vocabulary, prefix)
+        if not prefix:
+            return vocabulary[start:]
+        # U+10FFFF sorts after every other code point
+        end = _bisect.bisect_left(vocabulary, prefix + '\U0010ffff', start)
+        return vocabulary[start:end]
+
+    def matching(self, term, fields=None, prefix=False):
+        "Return the ids of items containing ``term`` (a case-folded token)"
+        if fields is None:
+            fields = self.fields
+        ids = set()
+        for field in fields:
+            postings = self._postings[field]
+            if prefix:
+                for t in self.terms(field=field, prefix=term):
+                    ids.update(postings[t])
+            elif term in postings:
+                ids.update(postings[term])
+        return ids
+
+    def search(self, query, operator='and', fields=None):
+        """Return items matching the words in ``query``, in indexing order
+
+        With ``operator='and'`` items must match every word, and with
+        ``operator='or'`` any word.  Words ending in ``*`` match
+        terms with that prefix.
+        """
+        if operator not in ('and', 'or'):
+            raise ValueError(operator)
+        matches = None
+        for word in query.split():
+            prefix = word.endswith('*')
+            terms = tokenize(text=word)
+            for i,term in enumerate(terms):
+                ids = self.matching(
+                    term=term, fields=fields,
+                    prefix=prefix and i == len(terms) - 1)
+                if matches is None:
+                    matches = ids
+                elif operator == 'and':
+                    matches &= ids
+                else:
+                    matches |= ids
+        if not matches:
+            return []
+        return [item for sequence,item,keys in sorted(
+                    (self._items[i] for i in matches), key=lambda x: x[0])]
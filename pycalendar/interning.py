@@ -0,0 +1,145 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+r"""Share repeated strings, parameter maps and values between properties
+
+Aggregated feeds repeat the same ``TZID``\s, ``VALUE=DATE``
+parameters, locations, organizers and time stamps thousands of
+times.  Passing an ``Interner`` to ``property.parse`` (e.g. through
+``Feed.interner`` or ``Aggregator(interner_size=...)``) makes equal
+values share a single object.
+"""
+
+import datetime as _datetime
+
+from .property import base as _property_base
+
+
+# immutable value types that are safe to share
+_VALUE_TYPES = (
+    str, int, float, tuple, _datetime.date, _datetime.datetime,
+    _datetime.time, _datetime.timedelta)
+
+
+class Interner (object):
+    """Bounded tables of shared strings, parameter maps and values
+
+    Once a table holds ``maxsize`` entries, new values are returned
+    unshared, so memory use stays bounded.
+
+    >>> interner = Interner(maxsize=1000)
+    >>> a = interner.string(''.join(['Snow ', 'Hill']))
+    >>> b = interner.string(''.join(['Snow ', 'Hill']))
+    >>> a is b
+    True
+
+    Parameter maps are shared as read-only ``SharedParameters``
+    (``Property`` copies them before any change).
+
+    >>> p = interner.parameters({'VALUE': 'DATE'})
+    >>> p is interner.parameters({'VALUE': 'DATE'})
+    True
+    >>> type(p).__name__
+    'SharedParameters'
+
+    Aware date-times are only shared with equal values in the same
+    time zone.
+
+    >>> import datetime
+    >>> utc = datetime.datetime(2013, 6, 30, 13, tzinfo=datetime.timezone.utc)
+    >>> edt = utc.astimezone(datetime.timezone(datetime.timedelta(hours=-4)))
+    >>> interner.value(edt) is edt
+    True
+    >>> interner.value(utc) is utc
+    True
+    >>> interner.stats()
+    {'hits': 2, 'misses': 6, 'size': 3, 'maxsize': 1000}
+    """
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._strings = {}
+        self._parameters = {}
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<{}.{} {}>'.format(
+            self.__module__, type(self).__name__, self.stats())
+
+    def string(self, string):
+        return self._lookup(table=self._strings, key=string, value=string)
+
+    def parameters(self, parameters):
+        """Return a shared, read-only copy of a parameter dict
+
+        Parameters with multiple values (lists) are not shared.
+        """
+        key = tuple(parameters.items())
+        try:
+            shared = self._parameters[key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable (multi-valued) parameters
+            return parameters
+        else:
+            self.hits += 1
+            return shared
+        key = tuple(
+            (self.string(string=k), self.string(string=v))
+            for k,v in key)
+        return self._lookup(
+            table=self._parameters, key=key,
+            value=_property_base.SharedParameters(key))
+
+    def value(self, value):
+        "Return a shared copy of an immutable decoded value"
+        if type(value) is str:
+            return self.string(string=value)
+        if not isinstance(value, _VALUE_TYPES):
+            return value
+        key = (type(value), value, getattr(value, 'tzinfo', None))
+        try:
+            return self._lookup(table=self._values, key=key, value=value)
+        except TypeError:  # e.g. a tuple holding unhashable values
+            return value
+
+    def clear(self):
+        for table in [self._strings, self._parameters, self._values]:
+            table.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': max(len(self._strings), len(self._parameters),
+                        len(self._values)),
+            'maxsize': self.maxsize,
+            }
+
+    def _lookup(self, table, key, value):
+        try:
+            shared = table[key]
+        except KeyError:
+            self.misses += 1
+            if len(table) < self.maxsize:
+                shared = table.setdefault(key, value)
+            else:
+                shared = value
+        else:
+            self.hits += 1
+        return shared
@@ -20,6 +20,9 @@ As defined in :RFC:`5545`, sections 3.7 (Calendar Properties) and 3.8
 (Component Properties).
 """
 
+import re as _re
+
+from ..dtype import time as _time
 from . import base as _base
 
 from . import alarm as _alarm
@@ -36,6 +39,21 @@ from . import timezone as _timezone
 
 PROPERTY = {}
 
+# RFC 5545, section 3.1 (Content Lines)
+_NAME = '[A-Za-z0-9-]+'
+_PARAMETER_VALUE = '(?:"[^"]*"|[^";:,]*)'
+_PARAMETER = ';{name}=(?:{value}(?:,{value})*)'.format(
+    name=_NAME, value=_PARAMETER_VALUE)
+_SIMPLE_LINE_REGEXP = _re.compile('({}):(.*)'.format(_NAME), _re.DOTALL)
+_LINE_REGEXP = _re.compile(
+    '({name})((?:{parameter})*):(.*)'.format(
+        name=_NAME, parameter=_PARAMETER),
+    _re.DOTALL)
+_PARAMETER_REGEXP = _re.compile(
+    ';({name})=({value}(?:,{value})*)'.format(
+        name=_NAME, value=_PARAMETER_VALUE))
+_PARAMETER_VALUE_REGEXP = _re.compile('(?:^|,)(?:"([^"]*)"|([^",]*))')
+
 
 def register(property):
     """Register a property class
@@ -43,22 +61,192 @@ def register(property):
     PROPERTY[property.name] = property
 
 
-def parse(line):
-    name_param,value = [x.strip() for x in line.split(':', 1)]
-    parameters = name_param.split(';')
-    name = parameters.pop(0).upper()  # names are case insensitive
-    parameters = dict(tuple(x.split('=', 1)) for x in parameters)
-    for k,v in parameters.items():
-        if ',' in v:
-            parameters[k] = v.split(',')
-    prop_class = PROPERTY[name]
-    prop = prop_class(parameters=parameters)
-    prop.check_parameters()
-    prop.value = prop.decode(value=value)
-    prop.check_value()
+def tokenize(line):
+    r"""Split an unfolded content line into ``(name, parameters, value)``
+
+    The line is matched in a single pass, with a fast path for the
+    common parameterless case.  Names are upper-cased, because they
+    are case insensitive.
+
+    >>> tokenize('DTSTAMP:20130630T000000Z')
+    ('DTSTAMP', {}, '20130630T000000Z')
+
+    Quoted parameter values may contain colons, semicolons and commas.
+    The quotes are removed, and multiple values become lists.
+
+    >>> tokenize('DESCRIPTION;ALTREP="http://example.com/a;b":Some text')
+    ('DESCRIPTION', {'ALTREP': 'http://example.com/a;b'}, 'Some text')
+    >>> tokenize('attendee;Member="mailto:a@example.com","mailto:b@example.com"'
+    ...          ';cn="Doe, Jane":mailto:jane@example.com')
+    ... # doctest: +NORMALIZE_WHITESPACE
+    ('ATTENDEE',
+     {'MEMBER': ['mailto:a@example.com', 'mailto:b@example.com'],
+      'CN': 'Doe, Jane'},
+     'mailto:jane@example.com')
+    >>> tokenize('SUMMARY;LANGUAGE=en:Colons: fine in values')
+    ('SUMMARY', {'LANGUAGE': 'en'}, 'Colons: fine in values')
+    >>> tokenize('SUMMARY;ALTREP="unterminated:text')
+    Traceback (most recent call last):
+      ...
+    ValueError: invalid content line 'SUMMARY;ALTREP="unterminated:text'
+    """
+    match = _SIMPLE_LINE_REGEXP.match(line)
+    if match is not None:
+        name,value = match.groups()
+        return (name.upper(), {}, value.strip())
+    match = _LINE_REGEXP.match(line)
+    if match is None:
+        raise ValueError('invalid content line {!r}'.format(line))
+    name,params,value = match.groups()
+    parameters = {}
+    for match in _PARAMETER_REGEXP.finditer(params):
+        key,values = match.groups()
+        if '"' in values or ',' in values:
+            values = [
+                quoted or unquoted for quoted,unquoted in
+                _PARAMETER_VALUE_REGEXP.findall(values)]
+            if len(values) == 1:
+                values = values[0]
+        parameters[key.upper()] = values
+    return (name.upper(), parameters, value.strip())
+
+
+def parse(line, lazy=False, verbatim=False, interner=None, tzinfos=None,
+          deferred=None):
+    r"""Parse an unfolded content line into a property
+
+    With ``lazy`` set, the value is only decoded when ``.value`` is
+    first read (see ``base.Property``).
+
+    >>> prop = parse(line='DTSTAMP:20130630T000000Z', lazy=True)
+    >>> print(prop)
+    DTSTAMP:20130630T000000Z
+    >>> prop.value
+    datetime.datetime(2013, 6, 30, 0, 0, tzinfo=datetime.timezone.utc)
+
+    With ``verbatim`` set, the property keeps ``line`` and writes it
+    back unchanged until its value or parameters are modified.
+
+    >>> line = 'attendee;ROLE=CHAIR;CN=Jane:mailto:jane@example.com'
+    >>> print(parse(line=line))
+    ATTENDEE;CN=Jane;ROLE=CHAIR:mailto:jane@example.com
+    >>> prop = parse(line=line, verbatim=True)
+    >>> print(prop)
+    attendee;ROLE=CHAIR;CN=Jane:mailto:jane@example.com
+    >>> prop['RSVP'] = 'TRUE'
+    >>> print(prop)
+    ATTENDEE;CN=Jane;ROLE=CHAIR;RSVP=TRUE:mailto:jane@example.com
+
+    Properties without their own class (e.g. ``X-`` properties) pass
+    through untouched.
+
+    >>> prop = parse(line=r'X-WR-CALNAME;X-FOO=bar:My\, calendar')
+    >>> prop  # doctest: +ELLIPSIS
+    <...NonStandardProperty name:X-WR-CALNAME at 0x...>
+    >>> print(prop)
+    X-WR-CALNAME;X-FOO=bar:My\, calendar
+
+    With an ``interner`` (see ``pycalendar.interning``), equal
+    parameter maps and values are shared between properties.
+
+    >>> from ..interning import Interner
+    >>> interner = Interner()
+    >>> a = parse(line='DTSTART;VALUE=DATE:20130630', interner=interner)
+    >>> b = parse(line='DTEND;VALUE=DATE:20130630', interner=interner)
+    >>> a._parameters is b._parameters and a.value is b.value
+    True
+
+    ``tzinfos`` maps ``TZID``\s to ``tzinfo`` objects that take
+    precedence over the ``pytz`` zones (see ``tzinfo.compile``).
+    Values using them are always decoded immediately.
+
+    >>> import datetime
+    >>> tzinfos = {'Example': datetime.timezone(datetime.timedelta(hours=2))}
+    >>> parse(line='DTSTART;TZID=Example:20130701T090000', lazy=True,
+    ...       tzinfos=tzinfos).value.isoformat()
+    '2013-07-01T09:00:00+02:00'
+
+    If ``deferred`` is a list, properties whose ``TZID`` is neither in
+    ``tzinfos`` nor known to ``pytz`` keep their raw value and are
+    appended to it, so they can be decoded with ``resolve`` once the
+    ``VTIMEZONE`` defining them has been read.
+
+    >>> deferred = []
+    >>> prop = parse(line='DTSTART;TZID=Later:20130701T090000',
+    ...              tzinfos={}, deferred=deferred)
+    >>> deferred == [prop]
+    True
+    >>> tzinfos['Later'] = tzinfos['Example']
+    >>> resolve(properties=deferred, tzinfos=tzinfos)
+    >>> prop.value.isoformat()
+    '2013-07-01T09:00:00+02:00'
+    """
+    name,parameters,value = tokenize(line=line)
+    try:
+        prop_class = PROPERTY[name]
+    except KeyError:
+        if name.startswith('X-'):
+            prop_class = _misc.NonStandardProperty
+        else:
+            prop_class = _misc.IANAProperty
+        prop = prop_class(name=name)
+    else:
+        prop = prop_class()
+    if parameters:
+        if interner is None:
+            prop._parameters = parameters
+        else:
+            prop._parameters = interner.parameters(parameters=parameters)
+        prop.check_parameters()
+    tzid = parameters.get('TZID', None) if parameters else None
+    if tzinfos and tzid in tzinfos:
+        _decode(prop=prop, value=value, interner=interner, tzinfos=tzinfos)
+    elif (deferred is not None and tzid is not None and
+          not _time.is_timezone(tzid=tzid)):
+        if interner is not None:
+            value = interner.string(string=value)
+        prop._raw = value
+        deferred.append(prop)
+    elif lazy:
+        if interner is not None:
+            value = interner.string(string=value)
+        prop._raw = value
+    else:
+        _decode(prop=prop, value=value, interner=interner)
+    if verbatim:
+        prop._line = line
     return prop
 
 
+def resolve(properties, tzinfos, lazy=False, interner=None):
+    r"""Decode properties whose ``TZID``\s ``parse`` deferred
+
+    Properties that have been read since are skipped.  Properties
+    whose ``TZID`` is still not in ``tzinfos`` are decoded with the
+    ``pytz`` zones (which fails as ``parse`` would have), unless
+    ``lazy`` is set, in which case they are left to fail when read.
+    """
+    for prop in properties:
+        if prop._raw is None:
+            continue
+        if lazy and prop['TZID'] not in tzinfos:
+            continue
+        _decode(
+            prop=prop, value=prop._raw, interner=interner, tzinfos=tzinfos)
+        prop._raw = None
+
+
+def _decode(prop, value, interner=None, tzinfos=None):
+    if tzinfos is None:  # e.g. for properties without date-time values
+        value = prop.decode(value=value)
+    else:
+        value = prop.decode(value=value, tzinfos=tzinfos)
+    if interner is not None:
+        value = interner.value(value=value)
+    prop._value = value
+    prop.check_value()
+
+
 for module in [
         _alarm,
         _calendar,
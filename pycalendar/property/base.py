@@ -14,32 +14,174 @@
 # You should have received a copy of the GNU General Public License along with
 # pycalender.  If not, see <http://www.gnu.org/licenses/>.
 
+import collections.abc as _collections_abc
 import io as _io
-import itertools as _itertools
+import re as _re
 
 from .. import dtype as _dtype
 
 
-class Property (dict):
-    """An iCalendar property (e.g. VERSION)
+_QUOTE_REGEXP = _re.compile('[:;,]')
+
+
+class _PropertyType (type):
+    "Give ``Property`` subclasses empty ``__slots__`` unless they set their own"
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        namespace.setdefault('__slots__', ())
+        return super(_PropertyType, mcs).__new__(
+            mcs, name, bases, namespace, **kwargs)
+
+
+class Property (object, metaclass=_PropertyType):
+    r"""An iCalendar property (e.g. VERSION)
 
     As defined in :RFC:`5545`, section 3.5 (Property).  Property names
     are defined in sections 3.7 (Calendar Properties) and 3.8
     (Component Properties).  Parameters are defined in section 3.2
     (Property Parameters), and value data types are defined in section
     3.3 (Property Value Data Types).
+
+    Properties can hold on to their encoded value (``raw``) and only
+    decode it the first time ``.value`` is read.  Until then, writing
+    the property emits the raw value unchanged.
+
+    >>> from .descriptive import Summary
+    >>> summary = Summary(raw=r'Dinner\, then dessert')
+    >>> print(summary)
+    SUMMARY:Dinner\, then dessert
+    >>> summary.value
+    'Dinner, then dessert'
+    >>> summary.value = 'Lunch'
+    >>> print(summary)
+    SUMMARY:Lunch
+
+    Properties use ``__slots__``, and behave like a dict of their
+    parameters, which is only allocated when the first parameter is
+    set.
+
+    >>> summary['LANGUAGE'] = 'en'
+    >>> summary.get('LANGUAGE')
+    'en'
+    >>> 'ALTREP' in summary
+    False
+    >>> sorted(summary.items())
+    [('LANGUAGE', 'en')]
+    >>> print(summary)
+    SUMMARY;LANGUAGE=en:Lunch
+    >>> hasattr(summary, '__dict__')
+    False
     """
+    __slots__ = ('_parameters', '_value', '_raw', '_line')
+
     name = None
     parameters = []
     dtypes = []
     separator = None
 
-    def __init__(self, parameters=None, value=None):
-        if not parameters:
-            parameters = {}
-        super(Property, self).__init__()
-        self.update(parameters)
-        self.value = value
+    def __init__(self, parameters=None, value=None, raw=None):
+        if parameters:
+            self._parameters = dict(parameters)
+        else:
+            self._parameters = None
+        self._value = value
+        self._raw = raw
+        self._line = None  # the original content line (see property.parse)
+
+    @property
+    def value(self):
+        if self._raw is not None:
+            self._value = self.decode(value=self._raw)
+            self._raw = None
+            self.check_value()
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._raw = None
+        self._line = None
+        self._value = value
+
+    # parameter access (changing the parameters invalidates any
+    # original content line)
+
+    def __getitem__(self, key):
+        if self._parameters is None:
+            raise KeyError(key)
+        return self._parameters[key]
+
+    def __setitem__(self, key, value):
+        self._writable_parameters()[key] = value
+
+    def __delitem__(self, key):
+        if self._parameters is None:
+            raise KeyError(key)
+        del self._writable_parameters()[key]
+
+    def __contains__(self, key):
+        return self._parameters is not None and key in self._parameters
+
+    def __iter__(self):
+        if self._parameters is None:
+            return iter(())
+        return iter(self._parameters)
+
+    def __len__(self):
+        if self._parameters is None:
+            return 0
+        return len(self._parameters)
+
+    def __eq__(self, other):
+        if not isinstance(other, Property):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def get(self, key, default=None):
+        if self._parameters is None:
+            return default
+        return self._parameters.get(key, default)
+
+    def keys(self):
+        return (self._parameters or {}).keys()
+
+    def values(self):
+        return (self._parameters or {}).values()
+
+    def items(self):
+        return (self._parameters or {}).items()
+
+    def clear(self):
+        self._line = None
+        self._parameters = None
+
+    def pop(self, key, *default):
+        return self._writable_parameters().pop(key, *default)
+
+    def popitem(self):
+        if not self._parameters:
+            raise KeyError('popitem(): no parameters')
+        return self._writable_parameters().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key,value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def _writable_parameters(self):
+        """Return a parameter dict that is safe to modify
+
+        Shared parameters (see ``interning.Interner``) are copied
+        first.
+        """
+        self._line = None
+        if self._parameters is None:
+            self._parameters = {}
+        elif type(self._parameters) is not dict:
+            self._parameters = dict(self._parameters)
+        return self._parameters
 
     def __hash__(self):
         return id(self)
@@ -53,9 +195,16 @@ class Property (dict):
         return '<{}.{} name:{} at {:#x}>'.format(
             self.__module__, type(self).__name__, self.name, id(self))
 
-    def decode(self, value):
+    def decode(self, value, tzinfos=None):
+        r"""Decode ``value`` with this property's data type
+
+        ``tzinfos`` maps ``TZID``\s to ``tzinfo`` objects (e.g.
+        compiled ``VTIMEZONE``\s) for the date and time data types.
+        """
         dtype = self._get_dtype()
-        return dtype.decode(property=self, value=value)
+        if tzinfos is None:
+            return dtype.decode(property=self, value=value)
+        return dtype.decode(property=self, value=value, tzinfos=tzinfos)
 
     def encode(self, value):
         dtype = self._get_dtype()
@@ -81,26 +230,125 @@ class Property (dict):
     def check_value(self):
         pass
 
+    def _format_parameter(self, value):
+        """Encode a parameter value, quoting as needed (:RFC:`5545`, 3.2)
+
+        >>> prop = Property()
+        >>> prop._format_parameter(value='en')
+        'en'
+        >>> prop._format_parameter(value='http://example.com/')
+        '"http://example.com/"'
+        >>> prop._format_parameter(value=['mailto:a@b.c', 'Doe, Jane'])
+        '"mailto:a@b.c","Doe, Jane"'
+        """
+        if isinstance(value, str):
+            if _QUOTE_REGEXP.search(value):
+                return '"{}"'.format(value)
+            return value
+        return ','.join(
+            '"{}"'.format(v) if _QUOTE_REGEXP.search(v) else v
+            for v in value)
+
     def write(self, stream, newline='\r\n', width=75):
-        name_param = self.name
-        line = '{}:{}'.format(
-            ';'.join(_itertools.chain(
-                [name_param],
-                ['{}={}'.format(key, value)
-                 for key,value in sorted(self.items())])),
-            self.encode(self.value))
-        lines = []
-        if width:
-            while len(line) > width:
-                front = line[0:width]
-                line = line[width:]
-                if not lines:
-                    width -= 1  # make room for the indent space
-                else:
-                    front = ' {}'.format(front)  # add the indent space
-                lines.append(front)
-            if lines:  # indent the last line
-                line = ' {}'.format(line)
-        lines.append(line)
-        for line in lines:
-            stream.write('{}{}'.format(line, newline))
+        chunks = []
+        self._serialize(chunks=chunks, newline=newline, width=width)
+        stream.write(''.join(chunks))
+
+    def _format(self):
+        "Return the unfolded content line"
+        if self._raw is None:
+            encoded = self.encode(self.value)
+        else:  # never decoded, so nothing could have changed
+            encoded = self._raw
+        if self:
+            return '{};{}:{}'.format(
+                self.name,
+                ';'.join([
+                    '{}={}'.format(key, self._format_parameter(value=value))
+                    for key,value in sorted(self.items())]),
+                encoded)
+        return '{}:{}'.format(self.name, encoded)
+
+    def _serialize(self, chunks, newline='\r\n', width=75):
+        """Append the folded content line to the list ``chunks``
+
+        Lines are folded so no physical line is longer than ``width``
+        octets (not counting ``newline``), without splitting UTF-8
+        sequences (:RFC:`5545`, section 3.1).
+
+        >>> from .descriptive import Summary
+        >>> chunks = []
+        >>> Summary(value='\xe9' * 40)._serialize(chunks=chunks)
+        >>> [len(line.encode('UTF-8'))
+        ...  for line in ''.join(chunks).splitlines()]
+        [74, 15]
+        """
+        if self._line is not None:  # unchanged since parsing
+            line = self._line
+        else:
+            line = self._format()
+        if not width or len(line) <= width // 4:
+            chunks.extend((line, newline))
+        elif line.isascii():
+            if len(line) <= width:
+                chunks.extend((line, newline))
+                return
+            chunks.extend((line[:width], newline))
+            for i in range(width, len(line), width - 1):
+                chunks.extend((' ', line[i:i + width - 1], newline))
+        else:
+            _fold_octets(
+                chunks=chunks, line=line.encode('UTF-8'), newline=newline,
+                width=width)
+
+
+_collections_abc.MutableMapping.register(Property)
+
+
+class ListProperty (Property):
+    "A property whose value is a comma-separated list"
+    def decode(self, value, tzinfos=None):
+        return [super(ListProperty, self).decode(value=v, tzinfos=tzinfos)
+                for v in value.split(',')]
+
+    def encode(self, value):
+        dtype = self._get_dtype()
+        return ','.join(dtype.encode(property=self, value=v) for v in value)
+
+
+class SharedParameters (dict):
+    """A read-only parameter dict shared between several properties
+
+    >>> parameters = SharedParameters({'VALUE': 'DATE'})
+    >>> parameters['VALUE'] = 'DATE-TIME'
+    Traceback (most recent call last):
+      ...
+    TypeError: shared parameters are read-only
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('shared parameters are read-only')
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+def _fold_octets(chunks, line, newline, width):
+    start = 0
+    length = len(line)
+    while True:
+        end = start + width
+        if end >= length:
+            end = length
+        else:  # don't split UTF-8 sequences
+            while line[end] & 0xC0 == 0x80:
+                end -= 1
+        if start:
+            chunks.append(' ')
+        chunks.extend((line[start:end].decode('UTF-8'), newline))
+        if end == length:
+            return
+        if not start:
+            width -= 1  # make room for the indent space
+        start = end
@@ -23,8 +23,10 @@ Properties).
 from . import base as _base
 
 
-    ## RFC 5545, section 3.8.7 (Change Management Component Properties)
+class DateTimeCreated (_base.Property):
     ### RFC 5545, section 3.8.7.1 (Date-Time Created)
+    name = 'CREATED'
+    dtypes = ['DATE-TIME']
 
 
 class DateTimeStamp (_base.Property):
@@ -33,7 +35,10 @@ class DateTimeStamp (_base.Property):
     dtypes = ['DATE-TIME']
 
 
+class LastModified (_base.Property):
     ### RFC 5545, section 3.8.7.3 (Last Modified)
+    name = 'LAST-MODIFIED'
+    dtypes = ['DATE-TIME']
 
 
 class SequenceNumber (_base.Property):
@@ -51,8 +51,27 @@ class DateTimeStart (_base.Property):
     dtypes = ['DATE-TIME', 'DATE']
 
 
+class Duration (_base.Property):
     ### RFC 5545, section 3.8.2.5 (Duration)
+    name = 'DURATION'
+    dtypes = ['DURATION']
+
+
+class FreeBusyTime (_base.ListProperty):
+    r"""Free/busy time
+
+    >>> from . import parse
+    >>> prop = parse(
+    ...     'FREEBUSY;FBTYPE=BUSY:19970308T160000Z/PT3H,19970308T200000Z/PT1H')
+    >>> [(start.hour, end) for start,end in prop.value]
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [(16, datetime.timedelta(seconds=10800)),
+     (20, datetime.timedelta(seconds=3600))]
+    """
     ### RFC 5545, section 3.8.2.6 (Free/Busy Time)
+    name = 'FREEBUSY'
+    parameters = ['FBTYPE']
+    dtypes = ['PERIOD']
 
 
 class TimeTransparency (_base.Property):
@@ -1,4 +1,82 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Classes representing miscellaneous properties
+
+As defined in :RFC:`5545`, section 3.8.8 (Miscellaneous Component
+Properties).
+"""
+
+from . import base as _base
+
+
+class _InstanceName (object):
+    """A per-instance property name, falling back to a class-wide default
+
+    The default (e.g. ``X-PROP``) is what components list in their
+    ``optional`` properties.
+    """
+    def __init__(self, default):
+        self.default = default
+
+    def __get__(self, instance, owner):
+        if instance is None or instance._name is None:
+            return self.default
+        return instance._name
+
+    def __set__(self, instance, value):
+        instance._name = value
+
+
     ## RFC 5545, section 3.8.8 (Miscellaneous Component Properties)
+
+
+class IANAProperty (_base.Property):
     ### RFC 5545, section 3.8.8.1 (IANA Properties)
+    r"""A registered property without its own class
+
+    The value and parameters are passed through untouched.
+
+    >>> prop = IANAProperty(name='NEW-PROP', raw=r'a\,b;c')
+    >>> print(prop)
+    NEW-PROP:a\,b;c
+    >>> prop.value
+    'a\\,b;c'
+    """
+    __slots__ = ('_name',)
+
+    name = _InstanceName(default='IANA-PROP')
+
+    def __init__(self, name=None, **kwargs):
+        super(IANAProperty, self).__init__(**kwargs)
+        self._name = name
+
+    def decode(self, value):
+        return value
+
+    def encode(self, value):
+        return value
+
+    def check_parameters(self):
+        pass
+
+
+class NonStandardProperty (IANAProperty):
     ### RFC 5545, section 3.8.8.2 (Non-Standard Properties)
+    name = _InstanceName(default='X-PROP')
+
+
     ### RFC 5545, section 3.8.8.3 (Request Status)
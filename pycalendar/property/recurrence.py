@@ -1,4 +1,54 @@
-    ## RFC 5545, section 3.8.5 (Recurrence Component Properties)
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Classes representing recurrence properties
+
+As defined in :RFC:`5545`, section 3.8.5 (Recurrence Component
+Properties).
+"""
+
+from . import base as _base
+
+
+class ExceptionDateTimes (_base.ListProperty):
+    r"""Exception date-times
+
+    >>> from . import parse
+    >>> prop = parse('EXDATE:19960402T010000Z,19960403T010000Z')
+    >>> prop.value  # doctest: +NORMALIZE_WHITESPACE
+    [datetime.datetime(1996, 4, 2, 1, 0, tzinfo=datetime.timezone.utc),
+     datetime.datetime(1996, 4, 3, 1, 0, tzinfo=datetime.timezone.utc)]
+    >>> prop.value = prop.value[:1]
+    >>> print(prop)
+    EXDATE:19960402T010000Z
+    """
     ### RFC 5545, section 3.8.5.1 (Exception Date-Times)
-    ### RFC 5545, section 3.8.5.1 (Recurrence Date-Times)
-    ### RFC 5545, section 3.8.5.1 (Recurrence Rule)
+    name = 'EXDATE'
+    parameters = ['TZID', 'VALUE']
+    dtypes = ['DATE-TIME', 'DATE']
+
+
+class RecurrenceDateTimes (_base.ListProperty):
+    ### RFC 5545, section 3.8.5.2 (Recurrence Date-Times)
+    name = 'RDATE'
+    parameters = ['TZID', 'VALUE']
+    dtypes = ['DATE-TIME', 'DATE', 'PERIOD']
+
+
+class RecurrenceRule (_base.Property):
+    ### RFC 5545, section 3.8.5.3 (Recurrence Rule)
+    name = 'RRULE'
+    dtypes = ['RECUR']
@@ -24,10 +24,34 @@ from . import base as _base
 
 
     ## RFC 5545, section 3.8.4 (Relationship Component Properties)
+
+
+class Attendee (_base.Property):
     ### RFC 5545, section 3.8.4.1 (Attendee)
+    name = 'ATTENDEE'
+    parameters = [
+        'CUTYPE', 'MEMBER', 'ROLE', 'PARTSTAT', 'RSVP', 'DELEGATED-TO',
+        'DELEGATED-FROM', 'SENT-BY', 'CN', 'DIR', 'LANGUAGE']
+    dtypes = ['CAL-ADDRESS']
+
+
     ### RFC 5545, section 3.8.4.2 (Contact)
+
+
+class Organizer (_base.Property):
     ### RFC 5545, section 3.8.4.3 (Organizer)
+    name = 'ORGANIZER'
+    parameters = ['CN', 'DIR', 'SENT-BY', 'LANGUAGE']
+    dtypes = ['CAL-ADDRESS']
+
+
+class RecurrenceID (_base.Property):
     ### RFC 5545, section 3.8.4.4 (Recurrence ID)
+    name = 'RECURRENCE-ID'
+    parameters = ['VALUE', 'TZID', 'RANGE']
+    dtypes = ['DATE-TIME', 'DATE']
+
+
     ### RFC 5545, section 3.8.4.5 (Related To)
 
 
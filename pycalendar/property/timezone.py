@@ -1,6 +1,54 @@
-    ## RFC 5545, section 3.8.3 (Time Zone Component Properties)
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Classes representing time zone properties
+
+As defined in :RFC:`5545`, section 3.8.3 (Time Zone Component
+Properties).
+"""
+
+from . import base as _base
+
+
+class TimeZoneIdentifier (_base.Property):
     ### RFC 5545, section 3.8.3.1 (Time Zone Identifier)
+    name = 'TZID'
+    dtypes = ['TEXT']
+
+
+class TimeZoneName (_base.Property):
     ### RFC 5545, section 3.8.3.2 (Time Zone Name)
+    name = 'TZNAME'
+    parameters = ['LANGUAGE']
+    dtypes = ['TEXT']
+
+
+class TimeZoneOffsetFrom (_base.Property):
     ### RFC 5545, section 3.8.3.3 (Time Zone Offset From)
+    name = 'TZOFFSETFROM'
+    dtypes = ['UTC-OFFSET']
+
+
+class TimeZoneOffsetTo (_base.Property):
     ### RFC 5545, section 3.8.3.4 (Time Zone Offset To)
+    name = 'TZOFFSETTO'
+    dtypes = ['UTC-OFFSET']
+
+
+class TimeZoneURL (_base.Property):
     ### RFC 5545, section 3.8.3.5 (Time Zone URL)
+    name = 'TZURL'
+    dtypes = ['URI']
@@ -0,0 +1,542 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+r"""Expanding recurring components
+
+``expand`` lazily generates the occurrences of a single recurrence
+rule (see ``dtype.recur``), and ``occurrences`` combines a
+component's ``DTSTART``, ``RRULE`` and ``RDATE`` and removes its
+``EXDATE``\s.  Both only generate occurrences inside a requested time
+window, and jump straight to the recurrence period containing the
+window's start instead of iterating from ``DTSTART``.
+"""
+
+import bisect as _bisect
+import calendar as _calendar
+import datetime as _datetime
+import heapq as _heapq
+
+from .dtype import time as _time
+
+
+_DAY = _datetime.timedelta(days=1)
+
+_SECONDS = {'HOURLY': 3600, 'MINUTELY': 60, 'SECONDLY': 1}
+
+
+def expand(dtstart, rule, start=None, end=None):
+    """Lazily generate the occurrences of ``rule``, in order
+
+    Occurrences have the same type (and time zone) as ``dtstart``,
+    and only occurrences in ``[start, end)`` are generated.  As in
+    ``dateutil``, ``dtstart`` itself is only generated if it matches
+    the rule.
+
+    >>> import datetime
+    >>> from .dtype.recur import Recur
+    >>> def rule(value):
+    ...     return Recur.decode(property={}, value=value)
+    >>> dtstart = datetime.datetime(1997, 9, 2, 9)
+    >>> for d in expand(dtstart, rule('FREQ=WEEKLY;COUNT=4;BYDAY=TU,TH')):
+    ...     print(d)
+    1997-09-02 09:00:00
+    1997-09-04 09:00:00
+    1997-09-09 09:00:00
+    1997-09-11 09:00:00
+    >>> for d in expand(dtstart, rule('FREQ=MONTHLY;BYDAY=-1FR;COUNT=3')):
+    ...     print(d)
+    1997-09-26 09:00:00
+    1997-10-31 09:00:00
+    1997-11-28 09:00:00
+    >>> for d in expand(
+    ...         datetime.date(1997, 9, 2),
+    ...         rule('FREQ=YEARLY;BYMONTH=1;BYDAY=SU,MO;BYSETPOS=-1'),
+    ...         end=datetime.date(2000, 1, 1)):
+    ...     print(d)
+    1998-01-26
+    1999-01-31
+
+    Long-running rules jump straight to the window.
+
+    >>> weekly = rule('FREQ=WEEKLY;BYDAY=TU;UNTIL=20300101T000000Z')
+    >>> utc = datetime.timezone.utc
+    >>> list(expand(
+    ...     datetime.datetime(2005, 1, 4, 10, tzinfo=utc), weekly,
+    ...     start=datetime.date(2013, 7, 1), end=datetime.date(2013, 7, 15)))
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [datetime.datetime(2013, 7, 2, 10, 0, tzinfo=datetime.timezone.utc),
+     datetime.datetime(2013, 7, 9, 10, 0, tzinfo=datetime.timezone.utc)]
+    >>> counted = rule('FREQ=DAILY;INTERVAL=2;COUNT=5000')
+    >>> list(expand(
+    ...     datetime.date(2005, 1, 1), counted,
+    ...     start=datetime.date(2018, 9, 1), end=datetime.date(2018, 9, 5)))
+    [datetime.date(2018, 9, 2), datetime.date(2018, 9, 4)]
+    >>> list(expand(
+    ...     datetime.date(2005, 1, 1), counted,
+    ...     start=datetime.date(2032, 5, 15), end=datetime.date(2032, 5, 25)))
+    [datetime.date(2032, 5, 15), datetime.date(2032, 5, 17)]
+    """
+    is_date = not isinstance(dtstart, _datetime.datetime)
+    tzinfo = None if is_date else dtstart.tzinfo
+    if is_date:
+        base = _datetime.datetime.combine(dtstart, _datetime.time())
+    else:
+        base = dtstart.replace(tzinfo=None)
+    until = rule.until
+    if until is not None:
+        if not is_date and not isinstance(until, _datetime.datetime):
+            until = _datetime.datetime.combine(until, _datetime.time.max)
+        until = coerce(value=until, like=dtstart)
+    if start is not None:
+        start = coerce(value=start, like=dtstart)
+    if end is not None:
+        end = coerce(value=end, like=dtstart, ceil=True)
+
+    if is_date:
+        def make(naive):
+            return naive.date()
+    else:
+        def make(naive):
+            return _time.localize(naive=naive, tzinfo=tzinfo)
+
+    expansion = _Expansion(rule=rule, base=base, is_date=is_date)
+    count = rule.count
+    emitted = 0
+    period = 0
+    if start is not None and start > make(base):
+        period,emitted = expansion.skip(
+            point=_naive(value=start, tzinfo=tzinfo), count=count)
+        if count is not None and emitted >= count:
+            return
+    empty = 0
+    while True:
+        try:
+            first,candidates = expansion.period(index=period)
+        except (OverflowError, ValueError):  # past datetime.MAXYEAR
+            return
+        if end is not None and make(first) >= end:
+            return
+        if until is not None and make(first) > until:
+            return
+        if candidates:
+            empty = 0
+        else:
+            empty += 1
+            if empty > expansion.max_empty:  # the rule never matches
+                return
+        for naive in candidates:
+            if naive < base:
+                continue
+            occurrence = make(naive)
+            if until is not None and occurrence > until:
+                return
+            if count is not None:
+                if emitted >= count:
+                    return
+                emitted += 1
+            if end is not None and occurrence >= end:
+                return
+            if start is None or occurrence >= start:
+                yield occurrence
+        period += 1
+
+
+def occurrences(component, start=None, end=None):
+    r"""Lazily generate a component's occurrence starts, in order
+
+    The recurrence set is ``DTSTART``, the ``RRULE`` occurrences and
+    the ``RDATE``\s, without the ``EXDATE``\s.  Only occurrences that
+    overlap ``[start, end)`` (using the component's ``DTEND`` or
+    ``DURATION``) are generated.
+
+    >>> import datetime
+    >>> from .component.event import Event
+    >>> from .property import parse
+    >>> event = Event()
+    >>> for line in [
+    ...         'DTSTART;TZID=America/New_York:20050104T100000',
+    ...         'DURATION:PT1H',
+    ...         'RRULE:FREQ=WEEKLY;BYDAY=TU,TH',
+    ...         'RDATE;TZID=America/New_York:20130706T120000',
+    ...         'EXDATE;TZID=America/New_York:20130704T100000',
+    ...         ]:
+    ...     event.add_property(parse(line))
+    >>> for d in occurrences(
+    ...         event, start=datetime.datetime(2013, 7, 2, 10, 30),
+    ...         end=datetime.date(2013, 7, 10)):
+    ...     print(d.strftime('%a %Y-%m-%d %H:%M'))
+    Tue 2013-07-02 10:00
+    Sat 2013-07-06 12:00
+    Tue 2013-07-09 10:00
+    """
+    dtstart = component['DTSTART'].value
+    duration = _duration(component=component)
+    if start is not None:
+        start = coerce(value=start, like=dtstart)
+    if end is not None:
+        end = coerce(value=end, like=dtstart, ceil=True)
+    search_start = start
+    if start is not None and duration:
+        search_start = start - duration
+    streams = [[dtstart]]
+    for rule in values(component=component, name='RRULE'):
+        streams.append(expand(
+            dtstart=dtstart, rule=rule, start=search_start, end=end))
+    rdates = sorted(
+        coerce(value=value[0] if isinstance(value, tuple) else value,
+               like=dtstart)  # PERIOD values start at value[0]
+        for values in values(component=component, name='RDATE')
+        for value in values)
+    if rdates:
+        streams.append(rdates)
+    exdates = sorted(set(
+        coerce(value=value, like=dtstart)
+        for values in values(component=component, name='EXDATE')
+        for value in values))
+    previous = None
+    for occurrence in _heapq.merge(*streams):
+        if end is not None and occurrence >= end:
+            return
+        if occurrence == previous:
+            continue
+        previous = occurrence
+        if start is not None:
+            if duration:
+                if occurrence + duration <= start:
+                    continue
+            elif occurrence < start:
+                continue
+        i = _bisect.bisect_left(exdates, occurrence)
+        if i < len(exdates) and exdates[i] == occurrence:
+            continue
+        yield occurrence
+
+
+def coerce(value, like, ceil=False):
+    """Convert a date or datetime to compare with ``like``
+
+    Dates become midnight datetimes and floating times take ``like``'s
+    time zone.  When ``like`` is a date, datetimes are truncated to
+    their date (or rounded up to the next date, with ``ceil``).
+
+    >>> import datetime
+    >>> coerce(datetime.date(2013, 7, 1), like=datetime.datetime(2013, 1, 1))
+    datetime.datetime(2013, 7, 1, 0, 0)
+    >>> coerce(datetime.datetime(2013, 7, 1, 12), like=datetime.date(2013, 1, 1),
+    ...        ceil=True)
+    datetime.date(2013, 7, 2)
+    """
+    if isinstance(like, _datetime.datetime):
+        if not isinstance(value, _datetime.datetime):
+            value = _datetime.datetime.combine(value, _datetime.time())
+        if like.tzinfo is None:
+            return value.replace(tzinfo=None)
+        if value.tzinfo is None:
+            return _time.localize(naive=value, tzinfo=like.tzinfo)
+        return value
+    if isinstance(value, _datetime.datetime):
+        date = value.date()
+        if ceil and value.time() != _datetime.time():
+            date += _DAY
+        return date
+    return value
+
+
+def _naive(value, tzinfo):
+    "Return ``value`` as a naive datetime in ``tzinfo``"
+    if not isinstance(value, _datetime.datetime):
+        return _datetime.datetime.combine(value, _datetime.time())
+    if value.tzinfo is not None and tzinfo is not None:
+        value = value.astimezone(tzinfo)
+    return value.replace(tzinfo=None)
+
+
+def values(component, name):
+    """Return the values of a component's (possibly repeated) property
+
+    >>> from .component.event import Event
+    >>> from .property import parse
+    >>> event = Event()
+    >>> event.add_property(parse('RDATE:20130701T090000Z'))
+    >>> values(component=event, name='RDATE')
+    [[datetime.datetime(2013, 7, 1, 9, 0, tzinfo=datetime.timezone.utc)]]
+    >>> values(component=event, name='EXDATE')
+    []
+    """
+    props = component.get(name, [])
+    if not isinstance(props, list):
+        props = [props]
+    return [prop.value for prop in props]
+
+
+def _duration(component):
+    dtstart = component['DTSTART'].value
+    if 'DTEND' in component:
+        end = coerce(value=component['DTEND'].value, like=dtstart)
+        return max(end - dtstart, _datetime.timedelta(0))
+    if 'DURATION' in component:
+        return component['DURATION'].value
+    if (component.name == 'VEVENT' and
+            not isinstance(dtstart, _datetime.datetime)):
+        return _DAY
+    return _datetime.timedelta(0)
+
+
+class _Expansion (object):
+    """Generate the candidate occurrences in each recurrence period
+
+    Periods are numbered from the one holding ``base`` (``0``),
+    counting every ``INTERVAL``-th period.  Candidates are naive
+    datetimes, which may precede ``base`` in the first period.
+    """
+    def __init__(self, rule, base, is_date):
+        self.rule = rule
+        self.base = base
+        self.is_date = is_date
+        self.freq = rule.freq
+        self.interval = rule.interval
+        self.bymonth = rule.bymonth
+        self.bymonthday = rule.bymonthday
+        self.byyearday = rule.byyearday
+        self.byweekno = rule.byweekno
+        self.byday = rule.byday
+        if self.freq == 'YEARLY' and not (
+                rule.byweekno or rule.byyearday or rule.bymonthday or
+                rule.byday):
+            if not self.bymonth:
+                self.bymonth = [base.month]
+            self.bymonthday = [base.day]
+        elif self.freq == 'MONTHLY' and not (
+                rule.byyearday or rule.bymonthday or rule.byday):
+            self.bymonthday = [base.day]
+        elif self.freq == 'WEEKLY' and not rule.byday:
+            self.byday = [(None, base.weekday())]
+        self.weekdays = set()
+        self.nth_weekdays = set()
+        for ordinal,weekday in self.byday or []:
+            if ordinal is None or self.freq not in ('MONTHLY', 'YEARLY'):
+                self.weekdays.add(weekday)
+            else:
+                self.nth_weekdays.add((ordinal, weekday))
+        self.filter_days = bool(
+            self.bymonth or self.bymonthday or self.byyearday or
+            self.byweekno or self.byday)
+        self.hours = sorted(set(rule.byhour or [base.hour]))
+        self.minutes = sorted(set(rule.byminute or [base.minute]))
+        self.seconds = sorted(set(rule.bysecond or [base.second]))
+        self.week_start = base.date() - _datetime.timedelta(
+            days=(base.weekday() - rule.wkst) % 7)
+        if self.freq in _SECONDS:
+            unit = _SECONDS[self.freq]
+            self.unit = unit
+            midnight = _datetime.datetime.combine(base.date(), _datetime.time())
+            offset = int((base - midnight).total_seconds()) // unit * unit
+            self.first = midnight + _datetime.timedelta(seconds=offset)
+        # the Gregorian calendar repeats every 400 years
+        self.max_empty = {
+            'YEARLY': 400, 'MONTHLY': 400 * 12, 'WEEKLY': 400 * 53,
+            'DAILY': 400 * 366,
+            }.get(self.freq, 400 * 366 * 86400 // _SECONDS.get(self.freq, 1))
+        self.max_empty = max(self.max_empty // self.interval, 1)
+
+    def period(self, index):
+        "Return ``(period start, sorted candidates)`` for the ``index``-th period"
+        step = index * self.interval
+        freq = self.freq
+        if freq == 'YEARLY':
+            year = self.base.year + step
+            first = _datetime.date(year, 1, 1)
+            if self.bymonth and not self.byweekno:  # only scan those months
+                days = []
+                for month in sorted(set(self.bymonth)):
+                    days.extend(_month_days(year=year, month=month))
+            else:
+                days = _date_range(first, _datetime.date(year + 1, 1, 1)
+                                   if year < _datetime.MAXYEAR else None)
+        elif freq == 'MONTHLY':
+            year,month = divmod(self.base.month - 1 + step, 12)
+            year += self.base.year
+            first = _datetime.date(year, month + 1, 1)
+            days = _month_days(year=year, month=month + 1)
+        elif freq == 'WEEKLY':
+            first = self.week_start + _datetime.timedelta(weeks=step)
+            days = [first + _datetime.timedelta(days=i) for i in range(7)]
+        elif freq == 'DAILY':
+            first = self.base.date() + _datetime.timedelta(days=step)
+            days = [first]
+        else:
+            start = self.first + _datetime.timedelta(seconds=step * self.unit)
+            if self.filter_days and not self._match_day(day=start.date()):
+                return (start, [])
+            return (start, self._subdaily(start=start))
+        first = _datetime.datetime.combine(first, _datetime.time())
+        if self.filter_days:
+            days = [day for day in days if self._match_day(day=day)]
+        if self.is_date:
+            candidates = [_datetime.datetime.combine(day, _datetime.time())
+                          for day in days]
+        else:
+            candidates = [
+                _datetime.datetime(
+                    day.year, day.month, day.day, hour, minute, second)
+                for day in days
+                for hour in self.hours
+                for minute in self.minutes
+                for second in self.seconds]
+        return (first, self._setpos(candidates=candidates))
+
+    def skip(self, point, count=None):
+        """Return ``(period index, occurrences skipped)`` to start near ``point``
+
+        Rules with ``COUNT`` only skip ahead when every period (after
+        the first) has the same number of occurrences.
+        """
+        freq = self.freq
+        base = self.base
+        if freq == 'YEARLY':
+            units = point.year - base.year
+        elif freq == 'MONTHLY':
+            units = (point.year - base.year) * 12 + point.month - base.month
+        elif freq == 'WEEKLY':
+            units = (point.date() - self.week_start).days // 7
+        elif freq == 'DAILY':
+            units = (point.date() - base.date()).days
+        else:
+            units = int((point - self.first).total_seconds()) // self.unit
+        index = max(units // self.interval - 1, 0)  # a period of slack
+        if count is None or index == 0:
+            return (index, 0)
+        per_period = self._constant_period_size()
+        if per_period is None:
+            return (0, 0)
+        first = len([c for c in self.period(index=0)[1] if c >= base])
+        return (index, first + (index - 1) * per_period)
+
+    def _constant_period_size(self):
+        rule = self.rule
+        if (self.freq not in ('DAILY', 'WEEKLY') or self.bymonth or
+                self.bymonthday or self.byyearday or self.byweekno or
+                rule.bysetpos or self.nth_weekdays or
+                (self.freq == 'DAILY' and self.byday)):
+            return None
+        days = len(self.weekdays) if self.freq == 'WEEKLY' else 1
+        if self.is_date:
+            return days
+        return days * len(self.hours) * len(self.minutes) * len(self.seconds)
+
+    def _subdaily(self, start):
+        rule = self.rule
+        if rule.byhour and start.hour not in rule.byhour:
+            return []
+        if self.freq == 'HOURLY':
+            minutes = self.minutes
+        elif rule.byminute and start.minute not in rule.byminute:
+            return []
+        else:
+            minutes = [start.minute]
+        if self.freq == 'SECONDLY':
+            if rule.bysecond and start.second not in rule.bysecond:
+                return []
+            seconds = [start.second]
+        else:
+            seconds = self.seconds
+        candidates = [
+            start.replace(minute=minute, second=second)
+            for minute in minutes for second in seconds]
+        return self._setpos(candidates=candidates)
+
+    def _setpos(self, candidates):
+        bysetpos = self.rule.bysetpos
+        if not bysetpos or not candidates:
+            return candidates
+        selected = set()
+        for position in bysetpos:
+            if position > 0:
+                position -= 1
+            if -len(candidates) <= position < len(candidates):
+                selected.add(candidates[position])
+        return sorted(selected)
+
+    def _match_day(self, day):
+        if self.bymonth and day.month not in self.bymonth:
+            return False
+        if self.bymonthday or self.nth_weekdays:
+            month_length = _calendar.monthrange(day.year, day.month)[1]
+        if self.byyearday or self.byweekno or self.nth_weekdays:
+            year_day = day.timetuple().tm_yday
+            year_length = 366 if _calendar.isleap(day.year) else 365
+        if self.bymonthday and not (
+                day.day in self.bymonthday or
+                day.day - month_length - 1 in self.bymonthday):
+            return False
+        if self.byyearday and not (
+                year_day in self.byyearday or
+                year_day - year_length - 1 in self.byyearday):
+            return False
+        if self.byweekno and not self._match_week(day=day):
+            return False
+        if self.byday:
+            weekday = day.weekday()
+            if weekday in self.weekdays:
+                return True
+            if not self.nth_weekdays:
+                return False
+            if self.freq == 'MONTHLY' or self.bymonth:
+                nth = (day.day - 1) // 7 + 1
+                nth_last = -((month_length - day.day) // 7 + 1)
+            else:
+                nth = (year_day - 1) // 7 + 1
+                nth_last = -((year_length - year_day) // 7 + 1)
+            return ((nth, weekday) in self.nth_weekdays or
+                    (nth_last, weekday) in self.nth_weekdays)
+        return True
+
+    def _match_week(self, day):
+        year = day.year
+        week_one = self._week_one(year=year)
+        if day < week_one:
+            year -= 1
+            week_one = self._week_one(year=year)
+        else:
+            next_week_one = self._week_one(year=year + 1)
+            if day >= next_week_one:
+                year += 1
+                week_one = next_week_one
+        weeks = (self._week_one(year=year + 1) - week_one).days // 7
+        week = (day - week_one).days // 7 + 1
+        return week in self.byweekno or week - weeks - 1 in self.byweekno
+
+    def _week_one(self, year):
+        "Return the first day of ``year``'s first week (RFC 5545, BYWEEKNO)"
+        january_first = _datetime.date(year, 1, 1)
+        start = january_first - _datetime.timedelta(
+            days=(january_first.weekday() - self.rule.wkst) % 7)
+        if (january_first - start).days > 3:  # fewer than 4 days in year
+            start += _datetime.timedelta(weeks=1)
+        return start
+
+
+def _date_range(first, stop):
+    if stop is None:
+        stop = _datetime.date(_datetime.MAXYEAR, 12, 31) + _DAY
+    return [first + _datetime.timedelta(days=i)
+            for i in range((stop - first).days)]
+
+
+def _month_days(year, month):
+    first = _datetime.date(year, month, 1)
+    return [first + _datetime.timedelta(days=i)
+            for i in range(_calendar.monthrange(year, month)[1])]
@@ -0,0 +1,232 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Per-stage timings and counters for feeds and aggregators
+
+The stages are:
+
+``fetch``
+  Downloading (or mapping) the feed body, counting ``bytes``.
+``hash``
+  Hashing the body to detect unchanged content.
+``unfold``
+  UTF-8 decoding and unfolding, counting ``lines``.
+``parse``
+  Parsing properties and building components, counting top-level
+  ``components``.
+``process``
+  Running the aggregator's processors.
+``merge``
+  Merging feeds into the aggregate calendar.
+``write``
+  Writing the aggregate calendar, counting ``bytes``.
+"""
+
+import collections as _collections
+import contextlib as _contextlib
+import threading as _threading
+import time as _time
+
+
+COUNTERS = ['bytes', 'lines', 'components']
+
+
+class StageStats (object):
+    "Wall time and counters for one stage of one feed"
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.bytes = 0
+        self.lines = 0
+        self.components = 0
+
+    def __repr__(self):
+        return '<{}.{} {}>'.format(
+            self.__module__, type(self).__name__, self.as_dict())
+
+    def add(self, other):
+        self.seconds += other.seconds
+        self.calls += other.calls
+        for counter in COUNTERS:
+            setattr(self, counter,
+                    getattr(self, counter) + getattr(other, counter))
+
+    def as_dict(self):
+        data = {'seconds': self.seconds, 'calls': self.calls}
+        for counter in COUNTERS:
+            data[counter] = getattr(self, counter)
+        return data
+
+
+class Stats (object):
+    r"""Collect per-stage, per-feed timings and counters
+
+    Instrumentation is off unless you give a ``Stats`` instance to a
+    ``Feed`` or ``Aggregator`` (which shares it with its feeds).
+
+    >>> stats = Stats()
+    >>> with stats.timer(stage='fetch', feed='http://a.invalid/') as stage:
+    ...     stage.bytes += 1024
+    >>> lines = list(stats.timed(
+    ...     ['A:1', 'B:2'], stage='unfold', feed='http://a.invalid/',
+    ...     counter='lines'))
+    >>> sorted(stats.totals())
+    ['fetch', 'unfold']
+    >>> stats.totals()['unfold'].lines
+    2
+    >>> print(stats.openmetrics())  # doctest: +ELLIPSIS, +REPORT_UDIFF
+    # TYPE pycalendar_stage_seconds counter
+    # HELP pycalendar_stage_seconds Wall time spent in each stage.
+    pycalendar_stage_seconds_total{stage="fetch",feed="http://a.invalid/"} ...
+    pycalendar_stage_seconds_total{stage="unfold",feed="http://a.invalid/"} ...
+    # TYPE pycalendar_stage_calls counter
+    # HELP pycalendar_stage_calls Number of times each stage ran.
+    pycalendar_stage_calls_total{stage="fetch",feed="http://a.invalid/"} 1
+    pycalendar_stage_calls_total{stage="unfold",feed="http://a.invalid/"} 1
+    # TYPE pycalendar_stage_bytes counter
+    # HELP pycalendar_stage_bytes Bytes handled by each stage.
+    pycalendar_stage_bytes_total{stage="fetch",feed="http://a.invalid/"} 1024
+    # TYPE pycalendar_stage_lines counter
+    # HELP pycalendar_stage_lines Lines handled by each stage.
+    pycalendar_stage_lines_total{stage="unfold",feed="http://a.invalid/"} 2
+    # TYPE pycalendar_stage_components counter
+    # HELP pycalendar_stage_components Components handled by each stage.
+    # EOF
+    """
+    def __init__(self):
+        self.stages = _collections.OrderedDict()  # {(stage, feed): StageStats}
+        self._lock = _threading.Lock()
+
+    def __repr__(self):
+        return '<{}.{} stages:{}>'.format(
+            self.__module__, type(self).__name__, len(self.stages))
+
+    def stage(self, stage, feed=None):
+        "Return the ``StageStats`` for ``stage`` and ``feed`` (a URL)"
+        key = (stage, feed)
+        try:
+            return self.stages[key]
+        except KeyError:
+            with self._lock:
+                return self.stages.setdefault(key, StageStats())
+
+    @_contextlib.contextmanager
+    def timer(self, stage, feed=None):
+        """Time the body of a ``with`` block
+
+        The block gets the ``StageStats``, so it can update the
+        counters.
+        """
+        stats = self.stage(stage=stage, feed=feed)
+        start = _time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += _time.perf_counter() - start
+            stats.calls += 1
+
+    def timed(self, iterable, stage, feed=None, counter=None, exclude=None):
+        """Time an iterator, excluding the time its consumer spends
+
+        Each item increments ``counter`` (if given).  Time recorded in
+        the ``exclude`` stage while the iterator runs (e.g. for a
+        nested, timed iterator) is subtracted, so stages don't count
+        each other's time.
+        """
+        stats = self.stage(stage=stage, feed=feed)
+        if exclude is not None:
+            excluded = self.stage(stage=exclude, feed=feed)
+        stats.calls += 1
+        iterator = iter(iterable)
+        clock = _time.perf_counter
+        while True:
+            if exclude is not None:
+                before = excluded.seconds
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stats.seconds += clock() - start
+                return
+            finally:
+                if exclude is not None:
+                    stats.seconds -= excluded.seconds - before
+            stats.seconds += clock() - start
+            if counter:
+                setattr(stats, counter, getattr(stats, counter) + 1)
+            yield item
+
+    def totals(self):
+        "Return ``{stage: StageStats}`` summed over all feeds"
+        totals = _collections.OrderedDict()
+        for (stage, feed),stats in list(self.stages.items()):
+            if stage not in totals:
+                totals[stage] = StageStats()
+            totals[stage].add(stats)
+        return totals
+
+    def as_dict(self):
+        "Return ``{feed: {stage: {counter: value, ...}}}``"
+        data = _collections.OrderedDict()
+        for (stage, feed),stats in list(self.stages.items()):
+            data.setdefault(feed, _collections.OrderedDict())[stage] = (
+                stats.as_dict())
+        return data
+
+    def clear(self):
+        with self._lock:
+            self.stages.clear()
+
+    def openmetrics(self, prefix='pycalendar_stage'):
+        "Format the stats in the OpenMetrics text exposition format"
+        lines = []
+        stages = list(self.stages.items())
+        for metric,help in [
+                ('seconds', 'Wall time spent in each stage.'),
+                ('calls', 'Number of times each stage ran.'),
+                ('bytes', 'Bytes handled by each stage.'),
+                ('lines', 'Lines handled by each stage.'),
+                ('components', 'Components handled by each stage.'),
+                ]:
+            name = '{}_{}'.format(prefix, metric)
+            lines.append('# TYPE {} counter'.format(name))
+            lines.append('# HELP {} {}'.format(name, help))
+            for (stage, feed),stats in stages:
+                value = getattr(stats, metric)
+                if metric in COUNTERS and not value:
+                    continue
+                labels = [('stage', stage)]
+                if feed is not None:
+                    labels.append(('feed', feed))
+                lines.append('{}_total{{{}}} {}'.format(
+                    name,
+                    ','.join('{}="{}"'.format(key, _escape(value=v))
+                             for key,v in labels),
+                    value))
+        lines.append('# EOF')
+        return '\n'.join(lines)
+
+
+def timer(stats, stage, feed=None):
+    """Return ``stats.timer(...)``, or a no-op when ``stats`` is ``None``
+    """
+    if stats is None:
+        return _contextlib.nullcontext(StageStats())
+    return stats.timer(stage=stage, feed=feed)
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
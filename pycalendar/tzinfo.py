@@ -0,0 +1,275 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compile ``VTIMEZONE`` components into ``datetime.tzinfo`` objects
+
+Each observance (``STANDARD`` or ``DAYLIGHT``) is expanded once into
+its onsets, giving sorted arrays of UTC transition times and the
+offsets that follow them.  Offset lookups are then a ``bisect``
+away.  Compiled zones are cached by a fingerprint of their
+definition, so feeds sharing a ``VTIMEZONE`` share the ``tzinfo``.
+"""
+
+import bisect as _bisect
+import copy as _copy
+import datetime as _datetime
+import hashlib as _hashlib
+
+from . import cache as _cache
+from . import recurrence as _recurrence
+
+
+CACHE = _cache.LRUCache(maxsize=256)
+
+# expand open-ended observance rules up to this year
+HORIZON = 2100
+
+_EPOCH = _datetime.datetime(1970, 1, 1)
+_SECOND = _datetime.timedelta(seconds=1)
+_ZERO = _datetime.timedelta(0)
+
+
+def _seconds(naive):
+    return (naive - _EPOCH) // _SECOND
+
+
+class TimeZoneInfo (_datetime.tzinfo):
+    """A ``tzinfo`` backed by a table of UTC transitions
+
+    ``transitions`` is a list of ``(utc, offset, dst, name)`` tuples,
+    where ``utc`` is a naive UTC datetime and the rest describe the
+    time after the transition.  ``initial`` is the ``(offset, dst,
+    name)`` before the first transition.
+
+    >>> import datetime
+    >>> hour = datetime.timedelta(hours=1)
+    >>> zone = TimeZoneInfo(
+    ...     tzid='Example', initial=(-5 * hour, 0 * hour, 'EST'),
+    ...     transitions=[
+    ...         (datetime.datetime(2013, 3, 10, 7), -4 * hour, hour, 'EDT'),
+    ...         (datetime.datetime(2013, 11, 3, 6), -5 * hour, 0 * hour, 'EST'),
+    ...         ])
+    >>> zone
+    <TimeZoneInfo 'Example'>
+    >>> datetime.datetime(2013, 7, 1, 12, tzinfo=zone).tzname()
+    'EDT'
+    >>> datetime.datetime(2013, 7, 1, 12, tzinfo=zone).isoformat()
+    '2013-07-01T12:00:00-04:00'
+
+    Nonexistent local times use the offset before the gap, and
+    ambiguous local times use the first occurrence unless ``fold``
+    is set (:RFC:`5545`, section 3.3.5).
+
+    >>> datetime.datetime(2013, 3, 10, 2, 30, tzinfo=zone).isoformat()
+    '2013-03-10T02:30:00-05:00'
+    >>> datetime.datetime(2013, 11, 3, 1, 30, tzinfo=zone).isoformat()
+    '2013-11-03T01:30:00-04:00'
+    >>> datetime.datetime(2013, 11, 3, 1, 30, fold=1, tzinfo=zone).isoformat()
+    '2013-11-03T01:30:00-05:00'
+    >>> utc = datetime.datetime(2013, 11, 3, 6, 30, tzinfo=datetime.timezone.utc)
+    >>> local = utc.astimezone(zone)
+    >>> local.isoformat(), local.fold
+    ('2013-11-03T01:30:00-05:00', 1)
+    """
+    def __init__(self, tzid, initial, transitions):
+        self.tzid = tzid
+        transitions = sorted(transitions, key=lambda t: t[0])
+        self._utc = [_seconds(utc) for utc,offset,dst,name in transitions]
+        self._states = [initial] + [
+            (offset, dst, name) for utc,offset,dst,name in transitions]
+        # local transition times for fold=0 (first occurrence, and
+        # the offset before gaps) and fold=1
+        self._wall = ([], [])
+        for i,utc in enumerate(self._utc):
+            before = int(self._states[i][0].total_seconds())
+            after = int(self._states[i + 1][0].total_seconds())
+            self._wall[0].append(utc + max(before, after))
+            self._wall[1].append(utc + min(before, after))
+
+    def __repr__(self):
+        return '<{} {!r}>'.format(type(self).__name__, self.tzid)
+
+    def _state(self, dt):
+        if dt is None:
+            return self._states[-1]
+        wall = _seconds(dt.replace(tzinfo=None))
+        return self._states[_bisect.bisect_right(self._wall[dt.fold], wall)]
+
+    def utcoffset(self, dt):
+        return self._state(dt)[0]
+
+    def dst(self, dt):
+        return self._state(dt)[1]
+
+    def tzname(self, dt):
+        return self._state(dt)[2]
+
+    def fromutc(self, dt):
+        if dt.tzinfo is not self:
+            raise ValueError('fromutc: dt.tzinfo is not self')
+        utc = _seconds(dt.replace(tzinfo=None))
+        i = _bisect.bisect_right(self._utc, utc)
+        offset = self._states[i][0]
+        local = dt + offset
+        if i:
+            repeated = self._states[i - 1][0] - offset
+            if repeated > _ZERO and (utc - self._utc[i - 1] <
+                                     repeated.total_seconds()):
+                local = local.replace(fold=1)
+        return local
+
+
+def fingerprint(component):
+    """Return a digest identifying a ``VTIMEZONE`` definition
+
+    The ``TZID`` and observances count, but ``LAST-MODIFIED``,
+    ``TZURL`` and the order of the observances don't.
+    """
+    observances = sorted(
+        str(observance)
+        for name in ['STANDARD', 'DAYLIGHT']
+        for observance in component.get(name, []))
+    text = '\n'.join([component['TZID'].value] + observances)
+    return _hashlib.sha1(text.encode('UTF-8')).hexdigest()
+
+
+def compile(component, horizon=HORIZON):
+    r"""Compile a ``VTIMEZONE`` component, reusing cached compilations
+
+    >>> import datetime
+    >>> from .component import parse_bytes
+    >>> vtimezone = b'\r\n'.join([
+    ...     b'BEGIN:VTIMEZONE',
+    ...     b'TZID:Custom Eastern',
+    ...     b'BEGIN:STANDARD',
+    ...     b'DTSTART:20071104T020000',
+    ...     b'RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU',
+    ...     b'TZOFFSETFROM:-0400',
+    ...     b'TZOFFSETTO:-0500',
+    ...     b'TZNAME:EST',
+    ...     b'END:STANDARD',
+    ...     b'BEGIN:DAYLIGHT',
+    ...     b'DTSTART:20070311T020000',
+    ...     b'RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU',
+    ...     b'TZOFFSETFROM:-0500',
+    ...     b'TZOFFSETTO:-0400',
+    ...     b'TZNAME:EDT',
+    ...     b'END:DAYLIGHT',
+    ...     b'END:VTIMEZONE', b''])
+    >>> zone = compile(parse_bytes(vtimezone))
+    >>> zone
+    <TimeZoneInfo 'Custom Eastern'>
+    >>> for month in [1, 7]:
+    ...     d = datetime.datetime(2013, month, 1, 12, tzinfo=zone)
+    ...     print(d.isoformat(), d.tzname(), d.dst())
+    2013-01-01T12:00:00-05:00 EST 0:00:00
+    2013-07-01T12:00:00-04:00 EDT 1:00:00
+    >>> compile(parse_bytes(vtimezone)) is zone
+    True
+
+    Calendars compile their ``VTIMEZONE``\s as they are read, and
+    use them to decode ``TZID``\s.
+
+    >>> calendar = parse_bytes(b'\r\n'.join([
+    ...     b'BEGIN:VCALENDAR', b'VERSION:2.0', b'PRODID:-//Example//EN',
+    ...     vtimezone.strip(),
+    ...     b'BEGIN:VEVENT', b'UID:a', b'DTSTAMP:20130630T000000Z',
+    ...     b'DTSTART;TZID=Custom Eastern:20130701T090000',
+    ...     b'END:VEVENT',
+    ...     b'END:VCALENDAR', b'']))
+    >>> calendar['VEVENT'][0]['DTSTART'].value.isoformat()
+    '2013-07-01T09:00:00-04:00'
+    >>> calendar.tzinfos['Custom Eastern'] is zone
+    True
+
+    Zones may also follow the components that use them, in which case
+    those values are decoded once the whole calendar has been read.
+
+    >>> for lazy in [False, True]:
+    ...     calendar = parse_bytes(b'\r\n'.join([
+    ...         b'BEGIN:VCALENDAR', b'VERSION:2.0', b'PRODID:-//Example//EN',
+    ...         b'BEGIN:VEVENT', b'UID:a', b'DTSTAMP:20130630T000000Z',
+    ...         b'DTSTART;TZID=Custom Eastern:20130701T090000',
+    ...         b'END:VEVENT',
+    ...         vtimezone.strip(),
+    ...         b'END:VCALENDAR', b'']), lazy=lazy)
+    ...     print(calendar['VEVENT'][0]['DTSTART'].value.isoformat())
+    2013-07-01T09:00:00-04:00
+    2013-07-01T09:00:00-04:00
+    """
+    return CACHE.lookup(
+        (fingerprint(component=component), horizon),
+        lambda: _compile(component=component, horizon=horizon))
+
+
+def _compile(component, horizon):
+    end = _datetime.datetime(horizon, 1, 1)
+    onsets = []
+    for name in ['STANDARD', 'DAYLIGHT']:
+        for observance in component.get(name, []):
+            onsets.extend(_onsets(
+                observance=observance, daylight=name == 'DAYLIGHT', end=end))
+    if not onsets:
+        raise ValueError('{} has no observances'.format(
+            component['TZID'].value))
+    onsets.sort(key=lambda onset: onset[0])
+    utc,offset_from,offset_to,daylight,name = onsets[0]
+    standard = offset_from
+    initial = (offset_from, _ZERO, None)
+    transitions = []
+    for utc,offset_from,offset_to,daylight,name in onsets:
+        if daylight:
+            dst = offset_to - standard
+        else:
+            standard = offset_to
+            dst = _ZERO
+        transitions.append((utc, offset_to, dst, name))
+    return TimeZoneInfo(
+        tzid=component['TZID'].value, initial=initial,
+        transitions=transitions)
+
+
+def _onsets(observance, daylight, end):
+    """Return ``(utc, offset from, offset to, daylight, name)`` onsets
+
+    Onsets are given in local time, using the offset they switch from.
+    """
+    dtstart = observance['DTSTART'].value
+    if not isinstance(dtstart, _datetime.datetime):
+        dtstart = _datetime.datetime.combine(dtstart, _datetime.time())
+    dtstart = dtstart.replace(tzinfo=None)
+    offset_from = observance['TZOFFSETFROM'].value
+    offset_to = observance['TZOFFSETTO'].value
+    names = observance.get('TZNAME', [])
+    name = names[0].value if names else None
+    locals_ = [dtstart]
+    for rule in _recurrence.values(component=observance, name='RRULE'):
+        until = rule.until
+        if isinstance(until, _datetime.datetime) and until.tzinfo is not None:
+            rule = _copy.copy(rule)  # compare UNTIL with local onsets
+            rule.until = until.replace(tzinfo=None) + offset_from
+        locals_.extend(_recurrence.expand(dtstart=dtstart, rule=rule, end=end))
+    for values in _recurrence.values(component=observance, name='RDATE'):
+        for value in values:
+            if isinstance(value, tuple):  # a PERIOD
+                value = value[0]
+            if not isinstance(value, _datetime.datetime):
+                value = _datetime.datetime.combine(value, _datetime.time())
+            if value.tzinfo is not None:  # UTC
+                value = value.replace(tzinfo=None) + offset_from
+            locals_.append(value)
+    return [(local - offset_from, offset_from, offset_to, daylight, name)
+            for local in sorted(set(locals_))]
@@ -14,6 +14,18 @@
 # You should have received a copy of the GNU General Public License along with
 # pycalender.  If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib as _contextlib
+import mmap as _mmap
+import re as _re
+import urllib.parse as _urllib_parse
+import urllib.request as _urllib_request
+
+
+# the characters stripped by str.lstrip() that fit in a single byte
+_WHITESPACE = b' \t\x0b\x0c\x1c\x1d\x1e\x1f'
+_FOLD_REGEXP = _re.compile(b'\n[' + _re.escape(_WHITESPACE) + b']+')
+
+
 def _remove_newline(line):
     for newline in ['\r\n', '\n']:
         if line.endswith(newline):
@@ -21,6 +33,40 @@ def _remove_newline(line):
     raise ValueError('invalid line ending in {!r}'.format(line))
 
 
+class _Unfolder (object):
+    "Join physical lines into semantic lines, one physical line at a time"
+    def __init__(self):
+        self.chunks = []
+
+    def push(self, line):
+        """Add a physical line
+
+        Return the semantic line it completes, or ``None``.
+        """
+        line = _remove_newline(line)
+        lstrip = line.lstrip()
+        if lstrip != line:
+            if not self.chunks:
+                raise ValueError(
+                    ('whitespace-prefixed line {!r} is not a continuation '
+                     'of a previous line').format(line))
+            self.chunks.append(lstrip)
+            return None
+        chunks = self.chunks
+        self.chunks = [line]
+        if chunks:
+            return ''.join(chunks)
+        return None
+
+    def finish(self):
+        "Return the last semantic line, or ``None``"
+        chunks = self.chunks
+        self.chunks = []
+        if chunks:
+            return ''.join(chunks)
+        return None
+
+
 def unfold(stream):
     r"""Iterate through semantic lines, unfolding as neccessary
 
@@ -41,19 +87,129 @@ def unfold(stream):
     'DESCRIPTION:Discuss how we can test c&s interoperability\\nusing iCalendar and other IETF standards.'
     'ATTACH;FMTTYPE=text/plain;ENCODING=BASE64;VALUE=BINARY:VGhlIH F1aWNrIGJyb3duIGZveCBqdW1wcyBvdmVyIHRoZSBsYXp5IGRvZy4'
     """
-    semantic_line_chunks = []
+    unfolder = _Unfolder()
     for line in stream:
-        line = _remove_newline(line)
-        lstrip = line.lstrip()
-        if lstrip != line:
-            if not semantic_line_chunks:
-                raise ValueError(
-                    ('whitespace-prefixed line {!r} is not a continuation '
-                     'of a previous line').format(line))
-            semantic_line_chunks.append(lstrip)
-        else:
-            if semantic_line_chunks:
-                yield ''.join(semantic_line_chunks)
-            semantic_line_chunks = [line]
-    if semantic_line_chunks:
-        yield ''.join(semantic_line_chunks)
+        semantic_line = unfolder.push(line=line)
+        if semantic_line is not None:
+            yield semantic_line
+    semantic_line = unfolder.finish()
+    if semantic_line is not None:
+        yield semantic_line
+
+
+def unfold_bytes(buffer, encoding='UTF-8', block_size=1 << 20):
+    r"""Iterate through semantic lines in a bytes-like buffer
+
+    This produces the same lines as ``unfold``, but works directly on
+    encoded data (e.g. ``bytes`` or an ``mmap`` from ``map_file``).
+    Line endings and folds are found on the raw bytes, a block at a
+    time, and each semantic line is decoded exactly once.
+
+    >>> buffer = '\r\n'.join([
+    ...     'BEGIN:VCALENDER',
+    ...     r'DESCRIPTION:Discuss how we can test c&s interoperability\n',
+    ...     ' using iCalendar and other IETF standards.',
+    ...     'ATTACH;FMTTYPE=text/plain;ENCODING=BASE64;VALUE=BINARY:VGhlIH'
+    ...     ' F1aWNrIGJyb3duIGZveCBqdW1wcyBvdmVyIHRoZSBsYXp5IGRvZy4',
+    ...     '']).encode('UTF-8')
+    >>> for line in unfold_bytes(buffer=buffer):
+    ...     print(repr(line))
+    ... # doctest: +REPORT_UDIFF
+    'BEGIN:VCALENDER'
+    'DESCRIPTION:Discuss how we can test c&s interoperability\\nusing iCalendar and other IETF standards.'
+    'ATTACH;FMTTYPE=text/plain;ENCODING=BASE64;VALUE=BINARY:VGhlIH F1aWNrIGJyb3duIGZveCBqdW1wcyBvdmVyIHRoZSBsYXp5IGRvZy4'
+
+    Blocks always end on semantic line boundaries, so folds that
+    straddle ``block_size`` are still joined.
+
+    >>> list(unfold_bytes(buffer=b'A:1\r\n 2\r\nB:3\n', block_size=2))
+    ['A:12', 'B:3']
+    >>> list(unfold_bytes(buffer=b'A:1\r\nB:2'))
+    Traceback (most recent call last):
+      ...
+    ValueError: invalid line ending in 'B:2'
+    """
+    length = len(buffer)
+    start = 0
+    if length and buffer[0] in _WHITESPACE:
+        end = buffer.find(b'\n')
+        if end < 0:
+            end = length
+        line = bytes(buffer[0:end]).rstrip(b'\r')
+        raise ValueError(
+            ('whitespace-prefixed line {!r} is not a continuation '
+             'of a previous line').format(line.decode(encoding)))
+    while start < length:
+        end = start + block_size
+        if end >= length:
+            end = length
+        else:  # extend the block to the end of a semantic line
+            while True:
+                end = buffer.find(b'\n', end)
+                if end < 0 or end + 1 >= length:
+                    end = length
+                    break
+                end += 1
+                if buffer[end] not in _WHITESPACE:
+                    break
+        block = buffer[start:end].replace(b'\r\n', b'\n')
+        block = _FOLD_REGEXP.sub(b'', block)
+        lines = block.split(b'\n')
+        tail = lines.pop()
+        if tail:
+            raise ValueError('invalid line ending in {!r}'.format(
+                tail.decode(encoding)))
+        for line in lines:
+            yield line.decode(encoding)
+        start = end
+
+
+@_contextlib.contextmanager
+def map_file(path):
+    """Memory-map a file for ``unfold_bytes``
+
+    ``path`` may be a filesystem path or a ``file://`` URL.  Empty
+    files (which cannot be mapped) produce an empty ``bytes`` buffer.
+    """
+    if path.startswith('file:'):
+        path = _urllib_request.url2pathname(_urllib_parse.urlsplit(path).path)
+    with open(path, 'rb') as f:
+        try:
+            buffer = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            yield b''
+            return
+        with buffer:
+            yield buffer
+
+
+async def async_unfold(stream):
+    r"""Asynchronously iterate through semantic lines
+
+    Like ``unfold``, but ``stream`` is an asynchronous iterable (e.g.
+    an ``asyncio.StreamReader``).  ``bytes`` lines are decoded as
+    UTF-8.
+
+    >>> import asyncio
+    >>> async def lines():
+    ...     for line in [
+    ...             b'BEGIN:VCALENDER\r\n',
+    ...             b'SUMMARY:Caf\xc3\xa9 mee\r\n',
+    ...             b' ting\r\n',
+    ...             ]:
+    ...         yield line
+    >>> async def collect(stream):
+    ...     return [line async for line in async_unfold(stream=stream)]
+    >>> asyncio.run(collect(stream=lines()))
+    ['BEGIN:VCALENDER', 'SUMMARY:Café meeting']
+    """
+    unfolder = _Unfolder()
+    async for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('UTF-8')
+        semantic_line = unfolder.push(line=line)
+        if semantic_line is not None:
+            yield semantic_line
+    semantic_line = unfolder.finish()
+    if semantic_line is not None:
+        yield semantic_line
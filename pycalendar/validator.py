@@ -0,0 +1,192 @@
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Stores for HTTP cache validators (:RFC:`7232`)
+
+Feeds remember the ``ETag`` and ``Last-Modified`` headers from their
+last successful fetch, and send them back as ``If-None-Match`` and
+``If-Modified-Since`` so the server can answer ``304 Not Modified``
+instead of resending an unchanged body.  Each store maps a feed URL
+to an entry dictionary with (optional) ``ETag``, ``Last-Modified``,
+and ``body`` keys.  The body lets a freshly-created feed rebuild its
+content after a ``304``, which matters when the validators outlive
+the process that fetched them.
+
+>>> store = MemoryValidatorStore()
+>>> store.set('http://example.com/feed.ics', {
+...     'ETag': '"abc"', 'Last-Modified': 'Sun, 30 Jun 2013 00:00:00 GMT',
+...     'body': b'BEGIN:VCALENDAR\\r\\n'})
+>>> store.get('http://example.com/feed.ics')['ETag']
+'"abc"'
+>>> store.get('http://example.com/missing.ics')
+
+The directory store persists entries on disk.
+
+>>> import tempfile
+>>> with tempfile.TemporaryDirectory() as path:
+...     store = DirectoryValidatorStore(path=path)
+...     store.set('http://example.com/feed.ics', {
+...         'ETag': '"abc"', 'body': b'BEGIN:VCALENDAR\\r\\n'})
+...     store = DirectoryValidatorStore(path=path)  # e.g. after a restart
+...     entry = store.get('http://example.com/feed.ics')
+...     store.delete('http://example.com/feed.ics')
+...     missing = store.get('http://example.com/feed.ics')
+>>> sorted(entry.items())
+[('ETag', '"abc"'), ('body', b'BEGIN:VCALENDAR\\r\\n')]
+>>> missing
+"""
+
+import hashlib as _hashlib
+import json as _json
+import os as _os
+import tempfile as _tempfile
+import threading as _threading
+
+
+VALIDATORS = ['ETag', 'Last-Modified']
+
+
+class ValidatorStore (object):
+    """Base class for validator stores
+
+    Subclasses must be safe to use from several threads at once (see
+    ``Aggregator``'s ``workers``).
+    """
+    def get(self, url):
+        """Return the entry for ``url``, or ``None`` if there isn't one
+        """
+        raise NotImplementedError('cannot get entries from {!r}'.format(self))
+
+    def set(self, url, entry):
+        raise NotImplementedError('cannot set entries in {!r}'.format(self))
+
+    def delete(self, url):
+        raise NotImplementedError(
+            'cannot delete entries from {!r}'.format(self))
+
+
+class MemoryValidatorStore (ValidatorStore):
+    """Keep validators in memory
+
+    Feed bodies are only kept if ``bodies`` is ``True``, since a copy
+    of every body would roughly double the memory used by feeds that
+    have already parsed their content (and don't need them).  Without
+    bodies, new feed instances sharing this store won't send
+    conditional requests; use a ``DirectoryValidatorStore`` to keep
+    bodies on disk instead.
+
+    >>> store = MemoryValidatorStore()
+    >>> store.set('http://example.com/feed.ics', {
+    ...     'ETag': '"abc"', 'body': b'BEGIN:VCALENDAR\\r\\n'})
+    >>> store.get('http://example.com/feed.ics')
+    {'ETag': '"abc"'}
+    >>> store = MemoryValidatorStore(bodies=True)
+    >>> store.set('http://example.com/feed.ics', {
+    ...     'ETag': '"abc"', 'body': b'BEGIN:VCALENDAR\\r\\n'})
+    >>> sorted(store.get('http://example.com/feed.ics'))
+    ['ETag', 'body']
+    """
+    def __init__(self, bodies=False):
+        self.bodies = bodies
+        self._entries = {}
+
+    def get(self, url):
+        entry = self._entries.get(url, None)
+        if entry is not None:
+            entry = dict(entry)
+        return entry
+
+    def set(self, url, entry):
+        entry = dict(entry)
+        if not self.bodies:
+            entry.pop('body', None)
+        self._entries[url] = entry
+
+    def delete(self, url):
+        self._entries.pop(url, None)
+
+
+class DirectoryValidatorStore (ValidatorStore):
+    """Keep validators (and bodies) in a directory on disk
+
+    Each URL gets a ``<hash>.json`` file for its validators and a
+    ``<hash>.ics`` file for its body, so entries survive restarts.
+    """
+    def __init__(self, path, bodies=True):
+        self.path = path
+        self.bodies = bodies
+        self._lock = _threading.Lock()
+        _os.makedirs(path, exist_ok=True)
+
+    def _paths(self, url):
+        key = _hashlib.sha1(url.encode('UTF-8')).hexdigest()
+        return (_os.path.join(self.path, '{}.json'.format(key)),
+                _os.path.join(self.path, '{}.ics'.format(key)))
+
+    def get(self, url):
+        json_path,body_path = self._paths(url=url)
+        try:
+            with open(json_path, 'r', encoding='UTF-8') as f:
+                entry = _json.load(f)
+        except FileNotFoundError:
+            return None
+        if entry.pop('url', None) != url:  # hash collision
+            return None
+        if self.bodies:
+            try:
+                with open(body_path, 'rb') as f:
+                    entry['body'] = f.read()
+            except FileNotFoundError:
+                pass
+        return entry
+
+    def set(self, url, entry):
+        json_path,body_path = self._paths(url=url)
+        data = {'url': url}
+        data.update(
+            (key, value) for key,value in entry.items() if key != 'body')
+        body = entry.get('body', None)
+        with self._lock:
+            if self.bodies and body is not None:
+                self._write(path=body_path, data=body)
+            else:
+                self._remove(path=body_path)
+            self._write(
+                path=json_path,
+                data=_json.dumps(data, sort_keys=True).encode('UTF-8'))
+
+    def delete(self, url):
+        with self._lock:
+            for path in self._paths(url=url):
+                self._remove(path=path)
+
+    def _write(self, path, data):
+        "Atomically replace ``path`` with ``data``"
+        fd,tmp_path = _tempfile.mkstemp(dir=self.path)
+        try:
+            with _os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            _os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(path=tmp_path)
+            raise
+
+    @staticmethod
+    def _remove(path):
+        try:
+            _os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -59,6 +59,7 @@ setup(
         _name,
         '{}.component'.format(_name),
         '{}.dtype'.format(_name),
+        '{}.index'.format(_name),
         '{}.property'.format(_name),
         ],
     provides=[_name],
@@ -30,6 +30,7 @@ import sys as _sys
 
 import pycalendar.aggregator as _pycalendar_aggregator
 import pycalendar.feed as _pycalendar_feed
+import pycalendar.stats as _pycalendar_stats
 
 
 class Map (list):
@@ -47,26 +48,65 @@ class Map (list):
                 event['UID'], lat, lon))
 
 
-def get_urls(root=_os.path.dirname(__file__)):
+def get_urls(root=_os.path.join(_os.path.dirname(__file__), 'data'),
+             base_url=None):
+    """Iterate through feed URLs for the ``.ics`` files under ``root``
+
+    By default, the URLs use the ``file://`` scheme.  Set
+    ``base_url`` to get URLs relative to a server (e.g. the one in
+    ``test/server.py``) serving ``root``.
+    """
     for dirpath, dirnames, filenames in _os.walk(root):
-        for filename in filenames:
+        dirnames.sort()
+        for filename in sorted(filenames):
             base,ext = _os.path.splitext(filename)
             if ext == '.ics':
                 path = _os.path.abspath(_os.path.join(dirpath, filename))
-                yield 'file://{}'.format(path.replace(_os.sep, '/'))
+                if base_url:
+                    relpath = _os.path.relpath(path, root)
+                    yield '{}/{}'.format(
+                        base_url.rstrip('/'), relpath.replace(_os.sep, '/'))
+                else:
+                    yield 'file://{}'.format(path.replace(_os.sep, '/'))
 
 
-def aggregate(**kwargs):
+def aggregate(base_url=None, **kwargs):
     aggregator = _pycalendar_aggregator.Aggregator(
         prodid='-//pycalendar//NONSGML testing//EN',
         feeds=[_pycalendar_feed.Feed(url=url)
-               for url in get_urls()],
+               for url in get_urls(base_url=base_url)],
         **kwargs)
     aggregator.fetch()
     return aggregator
 
 
 if __name__ == '__main__':
+    import argparse as _argparse
+
+    parser = _argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--base-url', help='fetch feeds from this server instead of disk')
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='number of feeds to fetch concurrently')
+    parser.add_argument(
+        '--host-connections', type=int,
+        help='maximum number of concurrent fetches from a single host')
+    parser.add_argument(
+        '--metrics', metavar='PATH',
+        help='write per-stage timings and counters here (OpenMetrics text)')
+    args = parser.parse_args()
+
+    stats = None
+    if args.metrics:
+        stats = _pycalendar_stats.Stats()
     geomap = Map()
-    aggregator = aggregate(processors=[geomap.add_feed])
+    aggregator = aggregate(
+        base_url=args.base_url, processors=[geomap.add_feed],
+        workers=args.workers, host_connections=args.host_connections,
+        stats=stats)
     aggregator.write(stream=_sys.stdout)
+    if args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(stats.openmetrics())
+            f.write('\n')
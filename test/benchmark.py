@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+r"""Measure parsing and writing throughput on synthetic feeds
+
+This script generates reproducible synthetic feeds (long, folded
+``DESCRIPTION``\s, many ``TZID``\s and long ``ATTENDEE`` lists) at
+each requested size, times each processing stage, and prints the
+results as JSON.  Save the output from two releases to compare them.
+"""
+
+import codecs as _codecs
+import io as _io
+import json as _json
+import os as _os
+import platform as _platform
+import random as _random
+import tempfile as _tempfile
+import time as _time
+
+import pytz as _pytz
+
+import pycalendar as _pycalendar
+import pycalendar.aggregator as _pycalendar_aggregator
+import pycalendar.component.calendar as _pycalendar_component_calendar
+import pycalendar.feed as _pycalendar_feed
+import pycalendar.property as _pycalendar_property
+import pycalendar.unfold as _pycalendar_unfold
+
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua ut enim ad minim '
+    'veniam quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea '
+    'commodo consequat').split()
+
+
+def fold(line, width=75):
+    "Fold an ASCII content line, as ``Property.write`` does"
+    lines = []
+    while len(line) > width:
+        lines.append(line[:width])
+        line = ' ' + line[width:]
+        width = 75
+    lines.append(line)
+    return '\r\n'.join(lines)
+
+
+def generate_event(random, index, timezones, attendees=(5, 40),
+                   description=(50, 400)):
+    "Return the content lines for a synthetic VEVENT"
+    tzid = random.choice(timezones)
+    start = random.randrange(0, 10 * 365 * 24) * 3600
+    dtstart = _time.strftime('%Y%m%dT%H%M%S', _time.gmtime(1262304000 + start))
+    dtend = _time.strftime(
+        '%Y%m%dT%H%M%S', _time.gmtime(1262304000 + start + 3600))
+    words = ' '.join(random.choice(WORDS) for i in range(
+        random.randint(*description)))
+    lines = [
+        'BEGIN:VEVENT',
+        'DTSTAMP:20130630T000000Z',
+        'UID:{}@benchmark.invalid'.format(index),
+        'DTSTART;TZID={}:{}'.format(tzid, dtstart),
+        'DTEND;TZID={}:{}'.format(tzid, dtend),
+        'SUMMARY:Event {}\\, {}'.format(index, random.choice(WORDS)),
+        'DESCRIPTION:{}'.format(words),
+        'LOCATION:Room {}'.format(random.randint(1, 500)),
+        'GEO:{:.6f};{:.6f}'.format(
+            random.uniform(-90, 90), random.uniform(-180, 180)),
+        'ORGANIZER;CN=Organizer {0}:mailto:organizer{0}@example.com'.format(
+            random.randint(1, 100)),
+        ]
+    for i in range(random.randint(*attendees)):
+        person = random.randint(1, 100000)
+        if person % 5:
+            cn = 'Person {}'.format(person)
+        else:  # exercise quoted parameter values
+            cn = '"Doe, Person {}"'.format(person)
+        lines.append(
+            ('ATTENDEE;CN={};ROLE=REQ-PARTICIPANT;PARTSTAT=ACCEPTED;RSVP=TRUE'
+             ':mailto:person{}@example.com').format(cn, person))
+    lines.append('END:VEVENT')
+    return lines
+
+
+def generate(stream, events, seed=0, start=0, **kwargs):
+    """Write a synthetic feed with ``events`` VEVENTs to a text stream
+
+    The same ``seed`` always produces the same feed.
+    """
+    random = _random.Random(seed)
+    timezones = _pytz.common_timezones
+    stream.write('BEGIN:VCALENDAR\r\n')
+    stream.write('VERSION:2.0\r\n')
+    stream.write('PRODID:-//pycalendar//NONSGML benchmark//EN\r\n')
+    for index in range(start, start + events):
+        for line in generate_event(
+                random=random, index=index, timezones=timezones, **kwargs):
+            stream.write(fold(line=line))
+            stream.write('\r\n')
+    stream.write('END:VCALENDAR\r\n')
+
+
+def generate_files(directory, events, feeds=1, seed=0):
+    "Write ``feeds`` synthetic feeds splitting ``events`` between them"
+    paths = []
+    for i in range(feeds):
+        count = events // feeds + (i < events % feeds)
+        path = _os.path.join(directory, 'feed-{}-{}.ics'.format(events, i))
+        with open(path, 'w', newline='') as f:
+            generate(
+                stream=f, events=count, seed=seed + i,
+                start=i * (events // feeds + 1))
+        paths.append(path)
+    return paths
+
+
+def best_time(function, repeat):
+    "Return the best wall time over ``repeat`` calls"
+    best = None
+    for i in range(repeat):
+        start = _time.perf_counter()
+        function()
+        elapsed = _time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def benchmark(events, directory, feeds=1, repeat=3, workers=1, seed=0):
+    """Time each stage on a synthetic feed with ``events`` VEVENTs
+
+    Aggregation covers all the feeds, fetching them over ``file://``
+    URLs and writing the aggregate calendar.  The other stages only
+    use the first feed.  The results include ``{stage: {'seconds':
+    ..., 'items': ..., 'items_per_second': ...}}``.
+    """
+    paths = generate_files(
+        directory=directory, events=events, feeds=feeds, seed=seed)
+    path = paths[0]  # the single-feed stages only use the first feed
+    path_events = events // feeds + bool(events % feeds)
+    with open(path, 'rb') as f:
+        buffer = f.read()
+    lines = list(_pycalendar_unfold.unfold_bytes(buffer=buffer))
+    calendar = _pycalendar_component_calendar.Calendar()
+    calendar.read(lines=iter(lines[1:]))
+
+    def unfold():
+        with _codecs.open(path, 'r', 'UTF-8') as f:
+            for line in _pycalendar_unfold.unfold(stream=f):
+                pass
+
+    def unfold_bytes():
+        for line in _pycalendar_unfold.unfold_bytes(buffer=buffer):
+            pass
+
+    def parse():
+        for line in lines:
+            _pycalendar_property.parse(line=line)
+
+    def read():
+        _pycalendar_component_calendar.Calendar().read(lines=iter(lines[1:]))
+
+    def write():
+        calendar.write(stream=_io.StringIO())
+
+    def aggregate():
+        aggregator = _pycalendar_aggregator.Aggregator(
+            prodid='-//pycalendar//NONSGML benchmark//EN',
+            feeds=[_pycalendar_feed.Feed(url='file://{}'.format(
+                       _os.path.abspath(p).replace(_os.sep, '/')))
+                   for p in paths],
+            workers=workers)
+        aggregator.fetch()
+        aggregator.write(stream=_io.StringIO())
+
+    results = {}
+    for stage,function,items in [
+            ('unfold', unfold, len(lines)),
+            ('unfold_bytes', unfold_bytes, len(lines)),
+            ('property.parse', parse, len(lines)),
+            ('Component.read', read, path_events),
+            ('Component.write', write, path_events),
+            ('Aggregator.fetch', aggregate, events),
+            ]:
+        seconds = best_time(function=function, repeat=repeat)
+        results[stage] = {
+            'seconds': seconds,
+            'items': items,
+            'items_per_second': items / seconds,
+            }
+    for path in paths:
+        _os.remove(path)
+    return {
+        'events': events,
+        'feeds': feeds,
+        'feed_events': path_events,
+        'feed_lines': len(lines),
+        'feed_bytes': len(buffer),
+        'stages': results,
+        }
+
+
+def run(sizes, directory=None, **kwargs):
+    "Benchmark each size, returning a JSON-serializable dict"
+    data = {
+        'pycalendar': _pycalendar.__version__,
+        'python': _platform.python_version(),
+        'implementation': _platform.python_implementation(),
+        'platform': _platform.platform(),
+        'time': _time.strftime('%Y-%m-%dT%H:%M:%SZ', _time.gmtime()),
+        'parameters': kwargs,
+        'results': [],
+        }
+    with _tempfile.TemporaryDirectory(dir=directory) as tempdir:
+        for events in sizes:
+            data['results'].append(
+                benchmark(events=events, directory=tempdir, **kwargs))
+    return data
+
+
+if __name__ == '__main__':
+    import argparse as _argparse
+    import sys as _sys
+
+    parser = _argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--events', type=int, nargs='+', default=[1000, 10000],
+        help='number of VEVENTs in each benchmarked feed set')
+    parser.add_argument(
+        '--feeds', type=int, default=1,
+        help='number of feeds to split the events between')
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='number of feeds the aggregator fetches concurrently')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='number of timing runs (the best is reported)')
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='random seed for the synthetic feeds')
+    parser.add_argument(
+        '--directory',
+        help='directory for the temporary feed files')
+    parser.add_argument(
+        '--output', metavar='PATH',
+        help='write the JSON results here instead of to stdout')
+    parser.add_argument(
+        '--generate', metavar='PATH',
+        help=('just write a synthetic feed with the first --events count '
+              'to PATH'))
+    args = parser.parse_args()
+
+    if args.generate:
+        with open(args.generate, 'w', newline='') as f:
+            generate(stream=f, events=args.events[0], seed=args.seed)
+        _sys.exit(0)
+    data = run(
+        sizes=args.events, directory=args.directory, feeds=args.feeds,
+        repeat=args.repeat, workers=args.workers, seed=args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            _json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
+    else:
+        _json.dump(data, _sys.stdout, indent=2, sort_keys=True)
+        _sys.stdout.write('\n')
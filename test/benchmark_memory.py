@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare the memory used by parsed properties
+
+This script parses a synthetic feed (see ``test/benchmark.py``) and
+measures, with ``tracemalloc``, the bytes per event taken by the
+whole parsed calendar (optionally with interning), by the
+``__slots__``-based properties and by dict-based properties laid out
+like the ones they replaced.
+"""
+
+import io as _io
+import os as _os
+import sys as _sys
+import tracemalloc as _tracemalloc
+
+import pycalendar.component.calendar as _pycalendar_component_calendar
+import pycalendar.interning as _pycalendar_interning
+import pycalendar.unfold as _pycalendar_unfold
+
+_sys.path.insert(0, _os.path.dirname(__file__))
+import benchmark as _benchmark
+
+
+class DictProperty (dict):
+    "The dict-based layout (parameters in the dict, a ``__dict__`` for the rest)"
+    def __init__(self, parameters, value, raw, line):
+        super(DictProperty, self).__init__()
+        self.update(parameters)
+        self._value = value
+        self._raw = raw
+        self._line = line
+
+
+def measure(function):
+    "Return ``(result, bytes)`` allocated (and still held) by ``function``"
+    _tracemalloc.start()
+    try:
+        before = _tracemalloc.get_traced_memory()[0]
+        result = function()
+        after = _tracemalloc.get_traced_memory()[0]
+    finally:
+        _tracemalloc.stop()
+    return (result, after - before)
+
+
+def copy(prop):
+    "Copy a slotted property, including its parameter dict"
+    new = object.__new__(type(prop))
+    for cls in type(prop).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            setattr(new, slot, getattr(prop, slot))
+    if prop._parameters is not None:
+        new._parameters = dict(prop._parameters)
+    return new
+
+
+def properties(component):
+    for name,value in component.items():
+        if isinstance(value, list):
+            for v in value:
+                if hasattr(v, 'subcomponents'):
+                    for prop in properties(component=v):
+                        yield prop
+                else:
+                    yield v
+        else:
+            yield value
+
+
+def run(events, lazy=False, interner_size=None, seed=0):
+    stream = _io.StringIO()
+    _benchmark.generate(stream=stream, events=events, seed=seed)
+    lines = list(_pycalendar_unfold.unfold(
+        stream=_io.StringIO(stream.getvalue(), newline='')))
+
+    def parse():
+        interner = None
+        if interner_size:
+            interner = _pycalendar_interning.Interner(maxsize=interner_size)
+        calendar = _pycalendar_component_calendar.Calendar()
+        calendar.read(lines=iter(lines[1:]), lazy=lazy, interner=interner)
+        return calendar
+
+    calendar,total = measure(function=parse)
+    props = list(properties(component=calendar))
+
+    def build_slotted():
+        return [copy(prop=p) for p in props]
+
+    def build_dict():
+        return [DictProperty(
+                    parameters=dict(p.items()), value=p._value, raw=p._raw,
+                    line=p._line)
+                for p in props]
+
+    # values are shared with the parsed properties, so only the
+    # property objects and their parameter dicts are counted
+    slotted_props,slotted = measure(function=build_slotted)
+    dict_props,dicts = measure(function=build_dict)
+    return {
+        'events': events,
+        'properties': len(props),
+        'parsed bytes per event': total / events,
+        'property bytes per event (slots)': slotted / events,
+        'property bytes per event (dict)': dicts / events,
+        'bytes saved per event': (dicts - slotted) / events,
+        }
+
+
+if __name__ == '__main__':
+    import argparse as _argparse
+
+    parser = _argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--events', type=int, default=1000,
+        help='number of VEVENTs in the synthetic feed')
+    parser.add_argument(
+        '--lazy', action='store_const', const=True, default=False,
+        help='parse lazily (without decoding values)')
+    parser.add_argument(
+        '--interner-size', type=int,
+        help='share repeated values through an interner of this size')
+    args = parser.parse_args()
+
+    for key,value in run(
+            events=args.events, lazy=args.lazy,
+            interner_size=args.interner_size).items():
+        if isinstance(value, float):
+            value = '{:,.0f}'.format(value)
+        print('{}: {}'.format(key, value))
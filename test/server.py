@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2013 W. Trevor King <wking@tremily.us>
+#
+# This file is part of pycalender.
+#
+# pycalender is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pycalender is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pycalender.  If not, see <http://www.gnu.org/licenses/>.
+
+"""A slow local HTTP server for exercising concurrent fetches
+
+This script serves the ``.ics`` files in the ``test/data`` directory
+over HTTP, sleeping before each response to stand in for a remote
+feed host.  Point ``test/aggregate.py`` at it with::
+
+  $ test/server.py --delay 0.5 &
+  $ PYTHONPATH=. test/aggregate.py --base-url http://localhost:8000/ \\
+  >   --workers 16 --host-connections 8
+"""
+
+import functools as _functools
+import http.server as _http_server
+import os as _os
+import socketserver as _socketserver
+import time as _time
+
+
+class DelayedRequestHandler (_http_server.SimpleHTTPRequestHandler):
+    extensions_map = dict(
+        _http_server.SimpleHTTPRequestHandler.extensions_map)
+    extensions_map['.ics'] = 'text/calendar'
+
+    def __init__(self, *args, delay=0, **kwargs):
+        self.delay = delay
+        super(DelayedRequestHandler, self).__init__(*args, **kwargs)
+
+    def send_head(self):
+        if self.delay:
+            _time.sleep(self.delay)
+        return super(DelayedRequestHandler, self).send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingHTTPServer (_socketserver.ThreadingMixIn,
+                           _http_server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(root=_os.path.join(_os.path.dirname(__file__), 'data'),
+          host='localhost', port=8000, delay=0):
+    """Return an HTTP server for ``root`` (call ``.serve_forever()``)
+
+    Use ``port=0`` to have the operating system pick a free port,
+    which you can read from ``server.server_address``.
+    """
+    handler = _functools.partial(
+        DelayedRequestHandler, delay=delay, directory=root)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    import argparse as _argparse
+
+    parser = _argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--host', default='localhost', help='interface to listen on')
+    parser.add_argument(
+        '--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument(
+        '--delay', type=float, default=0,
+        help='seconds to sleep before each response')
+    args = parser.parse_args()
+
+    server = serve(host=args.host, port=args.port, delay=args.delay)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()